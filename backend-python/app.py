@@ -4,13 +4,32 @@ Quote API - 统一的 Flask 应用
 通过环境变量自动适配
 """
 import os
-from flask import Flask, request, jsonify
+import hashlib
+import threading
+import secrets
+from flask import Flask, request, jsonify, g, stream_with_context
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt, get_jwt_identity
 import sqlite3
-import bcrypt
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
+from pg_pool import PoolTimeout, PostgresPool
+from jwt_cache import CachingJWTManager
+from password_hashing import DEFAULT_ROUNDS, HashPoolBusy, PasswordHasher
+from sqlite_conn import SQLiteConnectionManager, parse_pragma_overrides
+from pagination import DEFAULT_SORT, SORTS, cursor_after, decode_cursor, keyset_condition, order_by_clause
+from migrations import LATEST_VERSION, migrate
+from response_cache import LRUCache, ResponseCache
+from validation import canonical_author, clean_quote_fields
+from bulk_import import DEFAULT_BATCH_SIZE, ImportFormatError, detect_format, import_quotes, iter_rows
+from quote_export import EXPORT_FORMATS, encode_rows, gzip_chunks
+from random_sample import IdSampler
+from author_index import AuthorIndex
+from shuffle import FeistelPermutation
+from search import (
+    bigram_match_expression, fts_match_expression, like_pattern, make_snippet, needs_gram_index, parse_terms,
+    split_bigram_terms, split_indexed_terms, term_grams
+)
 
 # 加载环境变量
 load_dotenv()
@@ -19,7 +38,15 @@ app = Flask(__name__)
 
 # 基础配置
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'dev_jwt_secret_key_change_in_production')
-jwt = JWTManager(app)
+# 访问令牌短期有效，过期后用长期有效的刷新令牌换新（/api/auth/refresh），不需要重新校验密码
+app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 15)))
+app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 30)))
+# 校验通过的 token 按摘要缓存（最晚在 exp 过期），同一个 token 重复请求时不再重新校验签名
+jwt = CachingJWTManager(
+    app,
+    max_entries=int(os.getenv('JWT_CACHE_SIZE', 1024)),
+    max_ttl=int(os.getenv('JWT_CACHE_TTL', 300))
+)
 
 # CORS 配置 - 根据环境自动调整
 def setup_cors():
@@ -42,49 +69,84 @@ if IS_PRODUCTION:
     import psycopg2
     from psycopg2.extras import RealDictCursor
     
+    # 违反唯一约束等完整性错误
+    IntegrityError = psycopg2.IntegrityError
+    
+    # 连接池按进程创建：gunicorn 使用 preload_app，主进程不能持有连接，
+    # 否则 fork 出的 worker 会共享同一个 socket
+    _pg_pool = None
+    _pg_pool_pid = None
+    _pg_pool_lock = threading.Lock()
+    
+    def get_pg_pool():
+        """获取当前进程的连接池，首次调用（或 fork 之后）时创建"""
+        global _pg_pool, _pg_pool_pid
+        pid = os.getpid()
+        if _pg_pool is None or _pg_pool_pid != pid:
+            with _pg_pool_lock:
+                if _pg_pool is None or _pg_pool_pid != pid:
+                    _pg_pool = PostgresPool(
+                        lambda: psycopg2.connect(DATABASE_URL),
+                        min_size=int(os.getenv('PG_POOL_MIN_SIZE', 1)),
+                        max_size=int(os.getenv('PG_POOL_MAX_SIZE', 5)),
+                        max_lifetime=float(os.getenv('PG_POOL_MAX_LIFETIME', 1800)),
+                        checkout_timeout=float(os.getenv('PG_POOL_CHECKOUT_TIMEOUT', 5)),
+                        health_check_idle=float(os.getenv('PG_POOL_HEALTH_CHECK_IDLE', 30))
+                    )
+                    _pg_pool_pid = pid
+        return _pg_pool
+    
+    def get_pool_stats():
+        """连接池状态，连接池尚未创建时返回 None"""
+        if _pg_pool is None or _pg_pool_pid != os.getpid():
+            return None
+        return _pg_pool.stats()
+    
     def get_db_connection():
-        return psycopg2.connect(DATABASE_URL)
+        return get_pg_pool().getconn()
+    
+    def release_db_connection(conn):
+        """把连接归还给连接池"""
+        get_pg_pool().putconn(conn)
+    
+    def close_db_connections():
+        """关闭当前进程的连接池（worker 退出时调用）"""
+        global _pg_pool
+        if _pg_pool is not None and _pg_pool_pid == os.getpid():
+            _pg_pool.closeall()
+        _pg_pool = None
         
     def init_database():
-        """初始化 PostgreSQL 数据库"""
+        """初始化 PostgreSQL 数据库：执行尚未应用的迁移，schema 已是最新时只做一次版本查询"""
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # 创建用户表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) UNIQUE NOT NULL,
-                    password VARCHAR(255) NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建名言表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS quotes (
-                    id SERIAL PRIMARY KEY,
-                    content TEXT NOT NULL,
-                    author VARCHAR(255) NOT NULL,
-                    user_id INTEGER REFERENCES users(id),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            print("✅ PostgreSQL 数据库初始化完成")
+            try:
+                applied = migrate(conn, 'postgresql')
+            finally:
+                release_db_connection(conn)
+            if applied:
+                print(f"✅ PostgreSQL 数据库迁移完成: {applied}")
+            else:
+                print(f"✅ PostgreSQL 数据库已是最新版本 (v{LATEST_VERSION})")
         except Exception as e:
             print(f"❌ PostgreSQL 数据库初始化失败: {e}")
             raise
+    
+    def begin_request_transaction(conn, consistent_read):
+        """开始请求级事务；只读请求使用 REPEATABLE READ，保证多条查询读到同一个快照"""
+        if consistent_read:
+            conn.set_session(isolation_level='REPEATABLE READ')
+    
+    def end_request_transaction(conn):
+        """结束请求级事务（未提交的修改会被回滚），并恢复连接的默认隔离级别"""
+        conn.rollback()
+        conn.set_session(isolation_level='DEFAULT')
             
     def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-        """执行 PostgreSQL 查询"""
-        conn = get_db_connection()
+        """执行 PostgreSQL 查询（使用当前请求的连接与事务，写操作需调用 commit_db 提交）"""
+        conn = get_request_db()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
         try:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
             cursor.execute(query, params or ())
             
             if fetch_one:
@@ -94,78 +156,149 @@ if IS_PRODUCTION:
             else:
                 result = None
                 
-            conn.commit()
             return result
         finally:
-            conn.close()
+            cursor.close()
+    
+    def iter_query(query, params=None, fetch_size=1000):
+        """逐行产出查询结果：使用命名（服务器端）游标，每次只从服务器取 fetch_size 行"""
+        conn = get_request_db()
+        cursor = conn.cursor(name='quote_stream', cursor_factory=RealDictCursor)
+        try:
+            cursor.itersize = fetch_size
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
             
 else:
     print("🔧 开发环境模式: 使用 SQLite")
     
+    # 违反唯一约束等完整性错误
+    IntegrityError = sqlite3.IntegrityError
+    
+    # 持久连接：每个线程每个数据库文件只连接一次，并按配置档设置 WAL 等 PRAGMA
+    _sqlite_manager = SQLiteConnectionManager(
+        profile=os.getenv('SQLITE_PROFILE', 'default'),
+        overrides=parse_pragma_overrides(os.getenv('SQLITE_PRAGMAS', '')),
+        checkpoint_interval=float(os.getenv('SQLITE_CHECKPOINT_INTERVAL', 300))
+    )
+    
     def get_db_connection():
         # 优先使用Flask配置中的DATABASE路径（测试时使用）
         db_path = app.config.get('DATABASE') or os.getenv('DATABASE_PATH', './db/quote.db')
-        
-        # 确保数据库目录存在
-        db_dir = os.path.dirname(db_path)
-        if db_dir and not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"📁 创建数据库目录: {db_dir}")
-        
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return _sqlite_manager.acquire(db_path)
+    
+    def release_db_connection(conn):
+        """请求结束时归还连接，持久连接保持打开"""
+        _sqlite_manager.release(conn)
+    
+    def get_pool_stats():
+        """SQLite 连接管理器状态"""
+        return _sqlite_manager.stats()
+    
+    def close_db_connections():
+        """关闭本进程的所有 SQLite 连接（worker 退出时调用）"""
+        _sqlite_manager.close_all()
         
     def init_database():
-        """初始化 SQLite 数据库"""
+        """初始化 SQLite 数据库：执行尚未应用的迁移，schema 已是最新时只做一次版本查询"""
         try:
             conn = get_db_connection()
-            
-            # 创建用户表
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建名言表
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS quotes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    content TEXT NOT NULL,
-                    author TEXT NOT NULL,
-                    user_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            print("✅ SQLite 数据库初始化完成")
+            try:
+                applied = migrate(conn, 'sqlite')
+            finally:
+                release_db_connection(conn)
+            if applied:
+                print(f"✅ SQLite 数据库迁移完成: {applied}")
+            else:
+                print(f"✅ SQLite 数据库已是最新版本 (v{LATEST_VERSION})")
         except Exception as e:
             print(f"❌ SQLite 数据库初始化失败: {e}")
             raise
+    
+    def begin_request_transaction(conn, consistent_read):
+        """开始请求级事务；只读请求显式 BEGIN，保证多条查询读到同一个快照
+
+        写请求沿用 sqlite3 的隐式事务（第一条写语句前才开始），
+        避免读锁升级为写锁时与其他写入者冲突，也不会在 bcrypt 计算期间持有锁。
+        """
+        if consistent_read:
+            conn.execute('BEGIN')
+    
+    def end_request_transaction(conn):
+        """结束请求级事务，未提交的修改会被回滚"""
+        conn.rollback()
             
     def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-        """执行 SQLite 查询"""
-        conn = get_db_connection()
+        """执行 SQLite 查询（使用当前请求的连接与事务，写操作需调用 commit_db 提交）"""
+        conn = get_request_db()
+        if fetch_one:
+            return conn.execute(query, params or ()).fetchone()
+        elif fetch_all:
+            return conn.execute(query, params or ()).fetchall()
+        conn.execute(query, params or ())
+        return None
+    
+    def iter_query(query, params=None, fetch_size=1000):
+        """逐行产出查询结果：sqlite3 游标本身按需单步执行，fetchmany 每次只取 fetch_size 行"""
+        cursor = get_request_db().execute(query, params or ())
         try:
-            if fetch_one:
-                result = conn.execute(query, params or ()).fetchone()
-            elif fetch_all:
-                result = conn.execute(query, params or ()).fetchall()
-            else:
-                conn.execute(query, params or ())
-                result = None
-                
-            conn.commit()
-            return result
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
         finally:
-            conn.close()
+            cursor.close()
+
+# ==================== 请求级连接与事务 ====================
+
+def get_request_db():
+    """获取当前请求共用的数据库连接，首次调用时取连接并开始事务
+
+    同一个请求内的所有查询共用一个连接和一个事务，请求结束时由 teardown 归还连接。
+    """
+    if 'db_conn' not in g:
+        conn = get_db_connection()
+        try:
+            begin_request_transaction(conn, request.method in ('GET', 'HEAD'))
+        except Exception:
+            release_db_connection(conn)
+            raise
+        g.db_conn = conn
+    return g.db_conn
+
+def commit_db():
+    """提交当前请求的事务"""
+    conn = g.get('db_conn')
+    if conn is not None:
+        conn.commit()
+
+def release_request_db():
+    """回滚当前请求未提交的事务并归还连接；之后的查询会重新取连接、开始新的事务
+
+    请求结束时由 teardown 调用，也用于在 bcrypt 等耗时计算之前提前归还连接，
+    避免连接在计算期间空闲地停在事务中、占着连接池。
+    """
+    conn = g.pop('db_conn', None)
+    if conn is None:
+        return
+    try:
+        end_request_transaction(conn)
+    except Exception as e:
+        print(f"结束请求事务失败: {e}")
+    finally:
+        release_db_connection(conn)
+
+@app.teardown_appcontext
+def teardown_request_db(error):
+    """请求结束：回滚未提交的事务并归还连接"""
+    release_request_db()
 
 # 健康检查和监控端点
 @app.route('/health')
@@ -189,6 +322,83 @@ def index():
     }
 
 # 用户认证路由
+
+# 密码哈希：整台机器同时进行的 bcrypt 运算数有上限，登录高峰时多余的认证请求快速返回 503，不占满 worker；
+# 并发数加排队数不小于 gunicorn worker 数时，worker 启动时会自动收紧（见 gunicorn.conf.py）
+password_hasher = PasswordHasher(
+    slots=int(os.getenv('BCRYPT_CONCURRENCY', 2)),
+    queue_size=int(os.getenv('BCRYPT_QUEUE_SIZE', 1)),
+    queue_timeout=float(os.getenv('BCRYPT_QUEUE_TIMEOUT', 2.0)),
+    lock_dir=os.getenv('BCRYPT_LOCK_DIR'),
+    rounds=int(os.getenv('BCRYPT_ROUNDS', DEFAULT_ROUNDS))
+)
+
+def upgrade_password_hash(user_id, password):
+    """登录成功后用当前配置的 cost 重新哈希；哈希繁忙时跳过，下次登录再试"""
+    try:
+        hashed_password = password_hasher.hash(password)
+    except HashPoolBusy:
+        return
+    if IS_PRODUCTION:
+        execute_query('UPDATE users SET password = %s WHERE id = %s', (hashed_password, user_id))
+    else:
+        execute_query('UPDATE users SET password = ? WHERE id = ?', (hashed_password, user_id))
+    commit_db()
+
+# 刷新令牌：每次刷新换发新令牌并吊销旧令牌（轮换），记录保存在 refresh_tokens 表；
+# 已被换掉的令牌再次出现说明可能被盗用，吊销同一次登录（family）签发的全部刷新令牌。
+# 多个标签页同时刷新时后到的请求会拿着刚被换掉的令牌，宽限期内只拒绝、不吊销整个 family
+REFRESH_TOKEN_REUSE_GRACE = int(os.getenv('REFRESH_TOKEN_REUSE_GRACE', 10))
+
+def utc_timestamp(offset_seconds=0):
+    """与 refresh_tokens 时间列比较用的 UTC 时间字符串"""
+    moment = datetime.now(timezone.utc) + timedelta(seconds=offset_seconds)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def new_refresh_token(user_id, family):
+    """生成刷新令牌，返回 (token, jti)；jti 由这里指定，不需要再解码一次"""
+    jti = secrets.token_hex(16)
+    token = create_refresh_token(identity=str(user_id), additional_claims={'jti': jti, 'fam': family})
+    return token, jti
+
+def store_refresh_token(jti, user_id, family):
+    """写入刷新令牌记录（不提交，随调用方的事务一起提交）"""
+    expires_at = utc_timestamp(app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+    if IS_PRODUCTION:
+        execute_query(
+            'INSERT INTO refresh_tokens (jti, user_id, family, expires_at) VALUES (%s, %s, %s, %s)',
+            (jti, user_id, family, expires_at)
+        )
+    else:
+        execute_query(
+            'INSERT INTO refresh_tokens (jti, user_id, family, expires_at) VALUES (?, ?, ?, ?)',
+            (jti, user_id, family, expires_at)
+        )
+
+def issue_refresh_token(user_id):
+    """登录时开始一个新的 family，顺带清理该用户已过期的记录"""
+    if IS_PRODUCTION:
+        execute_query('DELETE FROM refresh_tokens WHERE user_id = %s AND expires_at <= %s', (user_id, utc_timestamp()))
+    else:
+        execute_query('DELETE FROM refresh_tokens WHERE user_id = ? AND expires_at <= ?', (user_id, utc_timestamp()))
+    family = secrets.token_hex(16)
+    token, jti = new_refresh_token(user_id, family)
+    store_refresh_token(jti, user_id, family)
+    return token
+
+def revoke_refresh_family(family):
+    """吊销同一个 family 中尚未吊销的刷新令牌（不提交）"""
+    if IS_PRODUCTION:
+        execute_query(
+            'UPDATE refresh_tokens SET revoked_at = %s WHERE family = %s AND revoked_at IS NULL',
+            (utc_timestamp(), family)
+        )
+    else:
+        execute_query(
+            'UPDATE refresh_tokens SET revoked_at = ? WHERE family = ? AND revoked_at IS NULL',
+            (utc_timestamp(), family)
+        )
+
 @app.route('/api/auth/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -209,48 +419,23 @@ def register():
         return jsonify({'message': '用户名和密码不能为空'}), 400
     
     try:
-        # 检查用户是否存在
-        if IS_PRODUCTION:
-            existing_user = execute_query(
-                'SELECT id FROM users WHERE username = %s', 
-                (username,), 
-                fetch_one=True
-            )
-        else:
-            existing_user = execute_query(
-                'SELECT id FROM users WHERE username = ?', 
-                (username,), 
-                fetch_one=True
-            )
-            
-        if existing_user:
-            return jsonify({'message': '用户已存在'}), 400
-            
-        # 创建用户
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        # 先计算哈希（此时还没有占用数据库连接），再用一条 INSERT ... RETURNING 创建用户；
+        # 不预先查询用户名是否存在，并发注册同一个用户名时由唯一约束保证只有一个成功
+        hashed_password = password_hasher.hash(password)
         
         if IS_PRODUCTION:
-            execute_query(
-                'INSERT INTO users (username, password) VALUES (%s, %s)',
-                (username, hashed_password.decode('utf-8'))
-            )
-            # 获取新创建用户的ID
             user = execute_query(
-                'SELECT id FROM users WHERE username = %s', 
-                (username,), 
+                'INSERT INTO users (username, password) VALUES (%s, %s) RETURNING id',
+                (username, hashed_password),
                 fetch_one=True
             )
         else:
-            execute_query(
-                'INSERT INTO users (username, password) VALUES (?, ?)', 
-                (username, hashed_password.decode('utf-8'))
-            )
-            # 获取新创建用户的ID
             user = execute_query(
-                'SELECT id FROM users WHERE username = ?', 
-                (username,), 
+                'INSERT INTO users (username, password) VALUES (?, ?) RETURNING id',
+                (username, hashed_password),
                 fetch_one=True
             )
+        commit_db()
         
         # 创建JWT token
         token = create_access_token(identity=str(user['id']))
@@ -263,6 +448,11 @@ def register():
             }
         }), 201
         
+    except IntegrityError:
+        # 事务由请求结束时的 teardown 回滚
+        return jsonify({'message': '用户已存在'}), 400
+    except (PoolTimeout, HashPoolBusy):
+        raise
     except Exception as e:
         print(f"注册错误: {e}")
         return jsonify({'message': '注册失败，请重试'}), 500
@@ -304,19 +494,25 @@ def login():
         if not user:
             return jsonify({'message': '用户名或密码错误'}), 401
         
-        # 验证密码
-        stored_password = user['password']
-        if isinstance(stored_password, str):
-            stored_password = stored_password.encode('utf-8')
+        # 校验密码前归还连接，bcrypt 计算期间不占用连接池；之后的写入会重新取连接
+        release_request_db()
         
-        if bcrypt.checkpw(password.encode('utf-8'), stored_password):
+        # 验证密码
+        if password_hasher.verify(password, user['password']):
+            # 已存哈希的 cost 与配置不同（调整过 BCRYPT_ROUNDS）时透明地重新哈希（先哈希再取连接）
+            if password_hasher.needs_rehash(user['password']):
+                upgrade_password_hash(user['id'], password)
             # 创建JWT token
             token = create_access_token(
                 identity=str(user['id'])  # JWT subject 必须是字符串
             )
+            # 之后访问令牌过期时用刷新令牌换新，每次会话只需要校验一次密码
+            refresh_token = issue_refresh_token(user['id'])
+            commit_db()
             return jsonify({
                 'message': '登录成功',
                 'token': token, 
+                'refresh_token': refresh_token,
                 'user': {
                     'username': user['username']
                 }
@@ -324,14 +520,376 @@ def login():
         else:
             return jsonify({'message': '用户名或密码错误'}), 401
             
+    except (PoolTimeout, HashPoolBusy):
+        raise
     except Exception as e:
         print(f"登录错误: {e}")
         return jsonify({'message': '登录失败，请重试'}), 500
 
+@app.route('/api/auth/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    claims = get_jwt()
+    user_id = int(claims['sub'])
+    family = claims.get('fam')
+    
+    try:
+        token, jti = new_refresh_token(user_id, family)
+        now = utc_timestamp()
+        # 只有未吊销、未过期的令牌能换新；条件 UPDATE 保证同一个令牌只能成功使用一次
+        if IS_PRODUCTION:
+            current = execute_query(
+                '''
+                UPDATE refresh_tokens SET revoked_at = %s, replaced_by = %s
+                WHERE jti = %s AND user_id = %s AND revoked_at IS NULL AND expires_at > %s
+                RETURNING family
+                ''',
+                (now, jti, claims['jti'], user_id, now),
+                fetch_one=True
+            )
+        else:
+            current = execute_query(
+                '''
+                UPDATE refresh_tokens SET revoked_at = ?, replaced_by = ?
+                WHERE jti = ? AND user_id = ? AND revoked_at IS NULL AND expires_at > ?
+                RETURNING family
+                ''',
+                (now, jti, claims['jti'], user_id, now),
+                fetch_one=True
+            )
+        
+        if not current:
+            if IS_PRODUCTION:
+                previous = execute_query(
+                    'SELECT revoked_at, replaced_by FROM refresh_tokens WHERE jti = %s',
+                    (claims['jti'],),
+                    fetch_one=True
+                )
+            else:
+                previous = execute_query(
+                    'SELECT revoked_at, replaced_by FROM refresh_tokens WHERE jti = ?',
+                    (claims['jti'],),
+                    fetch_one=True
+                )
+            # 刚被并发请求换掉的令牌只拒绝；更早被换掉的令牌再次出现视为盗用，吊销整个 family
+            recently_rotated = (
+                previous and previous['replaced_by']
+                and str(previous['revoked_at'])[:19] >= utc_timestamp(-REFRESH_TOKEN_REUSE_GRACE)
+            )
+            if family and not recently_rotated:
+                revoke_refresh_family(family)
+                commit_db()
+            return jsonify({'message': '登录已失效，请重新登录'}), 401
+        
+        store_refresh_token(jti, user_id, current['family'])
+        commit_db()
+        
+        return jsonify({
+            'token': create_access_token(identity=str(user_id)),
+            'refresh_token': token
+        }), 200
+        
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"刷新令牌错误: {e}")
+        return jsonify({'message': '刷新失败，请重试'}), 500
+
+@app.route('/api/auth/logout', methods=['POST'])
+@jwt_required(refresh=True)
+def logout():
+    """吊销本次登录签发的全部刷新令牌，已签发的访问令牌在短暂的有效期后自然失效"""
+    family = get_jwt().get('fam')
+    
+    try:
+        if family:
+            revoke_refresh_family(family)
+            commit_db()
+        return jsonify({'message': '已退出登录'}), 200
+        
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"退出登录错误: {e}")
+        return jsonify({'message': '退出登录失败，请重试'}), 500
+
 # 名言相关路由
+
+# 热门列表页的响应缓存：进程内 LRU + 可选的共享 Redis，缓存键带数据版本号，写入后自动失效
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', 256)),
+    redis_url=os.getenv('RESPONSE_CACHE_REDIS_URL'),
+    redis_ttl=int(os.getenv('RESPONSE_CACHE_TTL', 300))
+)
+
+# 单条名言缓存：id -> (修改版本号, 响应字节, ETag)；只有修改或删除名言时修改版本号才会变化
+quote_cache = LRUCache(max_entries=int(os.getenv('QUOTE_CACHE_SIZE', 1024)))
+# 单条名言响应的浏览器/CDN 缓存时间（秒），过期后凭 ETag 重新验证
+QUOTE_CACHE_MAX_AGE = int(os.getenv('QUOTE_CACHE_MAX_AGE', 86400))
+
+# 随机名言使用的内存 id 数组
+id_sampler = IdSampler(max_filtered=int(os.getenv('RANDOM_SAMPLER_AUTHOR_SETS', 64)))
+
+# 作者联想使用的内存前缀索引，每次最多返回 AUTHOR_SUGGEST_MAX 位作者
+AUTHOR_SUGGEST_MAX = 50
+author_index = AuthorIndex(scan_limit=int(os.getenv('AUTHOR_SUGGEST_SCAN_LIMIT', 2000)),
+                           max_limit=AUTHOR_SUGGEST_MAX)
+
+def reset_caches():
+    """清空进程内缓存（测试或切换数据库时使用）"""
+    response_cache.clear()
+    quote_cache.clear()
+    id_sampler.clear()
+    author_index.clear()
+    jwt.clear_token_cache()
+
+# 总数策略：exact 读取触发器维护的计数行（O(1)）；estimate 读取数据库统计信息，超大表上不需要维护计数；
+# none 不返回总数。可通过 ?count= 按请求指定
+COUNT_STRATEGIES = ('exact', 'estimate', 'none')
+DEFAULT_COUNT_STRATEGY = os.getenv('QUOTES_COUNT_STRATEGY', 'exact')
+
+def get_quote_stats():
+    """读取 quotes 的计数行：行数、数据版本号、修改版本号、最后修改时间（一次主键查询）"""
+    return execute_query(
+        "SELECT row_count, data_version, mutation_version, updated_at FROM table_stats WHERE table_name = 'quotes'",
+        fetch_one=True
+    )
+
+def make_etag(version, key):
+    """由数据版本号和查询参数生成强 ETag"""
+    return hashlib.sha1(f'{version}|{key}'.encode('utf-8')).hexdigest()
+
+def to_http_datetime(value):
+    """把数据库中的时间（SQLite 为 UTC 字符串，PostgreSQL 为 timestamptz）转换为带时区的 UTC 时间"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+def not_modified_response(etag, last_modified, cache_control='no-cache'):
+    """客户端缓存仍然有效（If-None-Match 与 ETag 匹配）时返回 304 响应，否则返回 None
+
+    只按由版本号生成的 ETag 判断：Last-Modified 只精确到秒，同一秒内的两次写入得到相同的时间，
+    而写入在提交前就取了时间，晚提交的写入也可能落在已经发出的 Last-Modified 之内，
+    按 If-Modified-Since 返回 304 会让客户端继续使用旧数据。Last-Modified 仍然返回，仅供参考。
+    """
+    fresh = bool(request.if_none_match) and request.if_none_match.contains(etag)
+    if not fresh:
+        return None
+    response = app.response_class(status=304)
+    return set_validators(response, etag, last_modified, cache_control)
+
+def set_validators(response, etag, last_modified, cache_control='no-cache'):
+    """设置 ETag / Last-Modified / Cache-Control 响应头"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+# 只按作者过滤时，总数直接读 authors 表由触发器维护的 quote_count（主键或唯一名字查找），不扫描 quotes
+AUTHOR_COUNT_QUERIES = {
+    'q.author = ?': 'SELECT quote_count AS total FROM authors WHERE name = ?',
+    'q.author = %s': 'SELECT quote_count AS total FROM authors WHERE name = %s',
+    'q.author_id = ?': 'SELECT quote_count AS total FROM authors WHERE id = ?',
+    'q.author_id = %s': 'SELECT quote_count AS total FROM authors WHERE id = %s',
+}
+
+def count_quotes(strategy, stats, clauses=None, params=None):
+    """按策略获取名言总数，返回 (total, 实际使用的策略)
+
+    有过滤条件时计数行和统计信息都不适用，estimate 也按过滤条件精确计数（走过滤列的索引）；
+    只有 author 或 author_id 一个过滤条件时读取作者表维护的计数。
+    """
+    if strategy == 'none':
+        return None, 'none'
+    
+    if clauses and len(clauses) == 1 and clauses[0] in AUTHOR_COUNT_QUERIES:
+        row = execute_query(AUTHOR_COUNT_QUERIES[clauses[0]], tuple(params), fetch_one=True)
+        # 作者不存在时没有名言
+        return (row['total'] if row else 0), 'exact'
+    
+    if clauses:
+        row = execute_query(
+            f"SELECT COUNT(*) AS total FROM quotes q WHERE {' AND '.join(clauses)}",
+            tuple(params), fetch_one=True
+        )
+        return row['total'], 'exact'
+    
+    if strategy == 'estimate':
+        if IS_PRODUCTION:
+            row = execute_query(
+                "SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = 'quotes'::regclass",
+                fetch_one=True
+            )
+            # 从未 ANALYZE 过的表 reltuples 为 -1
+            if row and row['estimate'] >= 0:
+                return row['estimate'], 'estimate'
+        else:
+            has_stats = execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'",
+                fetch_one=True
+            )
+            if has_stats:
+                row = execute_query(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = 'quotes' LIMIT 1",
+                    fetch_one=True
+                )
+                if row:
+                    return int(row['stat'].split()[0]), 'estimate'
+        # 还没有统计信息时退回精确计数
+    
+    return stats['row_count'], 'exact'
+
+def parse_filter_datetime(value, name):
+    """解析日期过滤参数（ISO 格式），统一为数据库中的 'YYYY-MM-DD HH:MM:SS' 文本（UTC）"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} 参数必须是 ISO 格式的日期或时间')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+def build_quote_filters(args):
+    """根据查询参数构造 quotes 的过滤条件，返回 (WHERE 子句列表, 参数列表)
+
+    支持 author（规范化后精确匹配）、author_id、user_id、from/created_after（含）和 to/created_before（不含）
+    按 created_at 过滤，参数不合法时抛出 ValueError。
+    """
+    clauses, params = [], []
+    
+    author = canonical_author(args.get('author', ''))
+    if author:
+        clauses.append('q.author = %s' if IS_PRODUCTION else 'q.author = ?')
+        params.append(author)
+    
+    for name in ('author_id', 'user_id'):
+        value = args.get(name)
+        if value is not None:
+            try:
+                params.append(int(value))
+            except ValueError:
+                raise ValueError(f'{name} 参数必须是整数')
+            clauses.append(f'q.{name} = %s' if IS_PRODUCTION else f'q.{name} = ?')
+    
+    for names, operator in ((('from', 'created_after'), '>='), (('to', 'created_before'), '<')):
+        name = next((n for n in names if args.get(n)), None)
+        if name is not None:
+            value = args.get(name)
+            params.append(parse_filter_datetime(value, name))
+            if IS_PRODUCTION:
+                clauses.append(f'q.created_at {operator} %s::timestamp')
+            else:
+                clauses.append(f'q.created_at {operator} ?')
+    
+    return clauses, params
+
+# fields 参数可选的字段（按响应中的顺序）
+QUOTE_FIELDS = ('id', 'content', 'author', 'author_id', 'user_id', 'created_at', 'added_by')
+
+def parse_quote_fields(value):
+    """解析 fields 参数，返回按固定顺序排列的字段元组；未指定时返回 None（全部字段）"""
+    if value is None:
+        return None
+    requested = {part.strip() for part in value.split(',') if part.strip()}
+    unknown = requested - set(QUOTE_FIELDS)
+    if not requested or unknown:
+        raise ValueError(f"fields 参数只支持: {', '.join(QUOTE_FIELDS)}")
+    return tuple(field for field in QUOTE_FIELDS if field in requested)
+
+def quote_select_clause(fields, required=('id', 'created_at')):
+    """根据字段构造 SELECT 列和 JOIN，返回 (columns, join)
+
+    游标分页需要的排序键（required）总会查询；不需要 added_by 时不 JOIN users 表。
+    """
+    if fields is None:
+        return 'q.*, u.username as added_by', 'LEFT JOIN users u ON q.user_id = u.id'
+    columns = [f'q.{field}' for field in QUOTE_FIELDS
+               if field != 'added_by' and (field in fields or field in required)]
+    if 'added_by' in fields:
+        columns.append('u.username as added_by')
+        return ', '.join(columns), 'LEFT JOIN users u ON q.user_id = u.id'
+    return ', '.join(columns), ''
+
+def serialize_quote(row, fields=None):
+    """把一行名言查询结果转换为响应中的字典（各个名言接口共用），fields 不为 None 时只保留这些字段"""
+    if fields is None:
+        return dict(row)
+    return {field: row[field] for field in fields}
+
+def fetch_quotes_by_ids(ids):
+    """一次查询按 id 读取名言（带添加者用户名），按 ids 的顺序返回，不存在的 id 跳过"""
+    if not ids:
+        return []
+    if IS_PRODUCTION:
+        rows = execute_query('''
+            SELECT q.*, u.username as added_by
+            FROM quotes q
+            LEFT JOIN users u ON q.user_id = u.id
+            WHERE q.id = ANY(%s)
+        ''', (list(ids),), fetch_all=True)
+    else:
+        placeholders = ', '.join(['?'] * len(ids))
+        rows = execute_query(f'''
+            SELECT q.*, u.username as added_by
+            FROM quotes q
+            LEFT JOIN users u ON q.user_id = u.id
+            WHERE q.id IN ({placeholders})
+        ''', tuple(ids), fetch_all=True)
+    by_id = {row['id']: serialize_quote(row) for row in rows}
+    return [by_id[quote_id] for quote_id in ids if quote_id in by_id]
+
+# 批量获取名言时一次最多请求的 id 数
+QUOTES_BATCH_MAX = int(os.getenv('QUOTES_BATCH_MAX', 100))
+
+def parse_quote_ids(raw_ids):
+    """解析 id 列表（逗号分隔的字符串或 JSON 数组），去重并保持顺序；不合法时抛出 ValueError"""
+    if isinstance(raw_ids, str):
+        raw_ids = [part for part in raw_ids.split(',') if part.strip()]
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError('ids 必须是非空的 id 列表')
+    ids, seen = [], set()
+    for raw in raw_ids:
+        if isinstance(raw, bool):
+            raise ValueError(f'无效的名言 id: {raw}')
+        try:
+            quote_id = int(raw.strip() if isinstance(raw, str) else raw)
+        except (TypeError, ValueError):
+            raise ValueError(f'无效的名言 id: {raw}')
+        if quote_id <= 0 or (not isinstance(raw, str) and quote_id != raw):
+            raise ValueError(f'无效的名言 id: {raw}')
+        if quote_id not in seen:
+            # 超过上限立即拒绝，超长列表不会被完整解析
+            if len(ids) >= QUOTES_BATCH_MAX:
+                raise ValueError(f'一次最多获取 {QUOTES_BATCH_MAX} 条名言')
+            seen.add(quote_id)
+            ids.append(quote_id)
+    return ids
+
+def batch_quotes_response(raw_ids):
+    """批量获取名言：一次查询，按请求顺序返回，并列出不存在的 id"""
+    try:
+        ids = parse_quote_ids(raw_ids)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    quotes = fetch_quotes_by_ids(ids)
+    found = {quote['id'] for quote in quotes}
+    return jsonify({
+        'quotes': quotes,
+        'missing': [quote_id for quote_id in ids if quote_id not in found]
+    }), 200
+
 @app.route('/api/quotes', methods=['GET'])
 def get_quotes():
     try:
+        # ?ids=1,5,9 批量获取指定的名言
+        if 'ids' in request.args:
+            return batch_quotes_response(request.args['ids'])
+        
         # 处理分页参数，确保它们是有效的正整数
         page = max(int(request.args.get('page', 1)), 1)  # 至少为1
         page_size = int(request.args.get('pageSize', 10))
@@ -341,44 +899,491 @@ def get_quotes():
             page_size = 10
         page_size = min(page_size, 50)  # 限制最大页面大小
         
+        sort = request.args.get('sort', DEFAULT_SORT)
+        if sort not in SORTS:
+            return jsonify({'message': f"sort 参数只支持: {', '.join(SORTS)}"}), 400
+        
+        # 游标分页：cursor 参数存在时按排序键定位，忽略 page
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            try:
+                cursor_keys = decode_cursor(cursor, sort)
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+        
+        # 过滤条件：author、user_id、created_after（含）、created_before（不含）
+        try:
+            clauses, params = build_quote_filters(request.args)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        
+        count_strategy = request.args.get('count', DEFAULT_COUNT_STRATEGY)
+        if count_strategy not in COUNT_STRATEGIES:
+            return jsonify({'message': f"count 参数只支持: {', '.join(COUNT_STRATEGIES)}"}), 400
+        
+        # 稀疏字段：只查询并返回 fields 中列出的字段
+        try:
+            fields = parse_quote_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        columns, join = quote_select_clause(fields, SORTS[sort]['keys'])
+        
+        # 缓存键包含全部查询参数，数据版本号由缓存层拼接
+        stats = get_quote_stats()
+        filter_key = '&'.join(f'{clause}|{value}' for clause, value in zip(clauses, params))
+        cache_key = (f"quotes:list:page={page}&pageSize={page_size}&cursor={cursor or ''}&count={count_strategy}"
+                     f"&fields={','.join(fields or ())}&sort={sort}&filters={filter_key}")
+        
+        # 条件请求：数据版本未变时直接返回 304，不读取名言数据
+        etag = make_etag(stats['data_version'], cache_key)
+        last_modified = to_http_datetime(stats['updated_at'])
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        cached = response_cache.get(stats['data_version'], cache_key)
+        if cached is not None:
+            response = app.response_class(cached, status=200, mimetype='application/json')
+            return set_validators(response, etag, last_modified)
+        
         offset = (page - 1) * page_size
         # 获取总数
+        total, count_strategy = count_quotes(count_strategy, stats, clauses, params)
+        
+        # 获取分页数据（多取一行用于判断是否还有下一页）
+        order_by = order_by_clause(sort)
         if IS_PRODUCTION:
-            total_result = execute_query('SELECT COUNT(*) as count FROM quotes', fetch_one=True)
-            total = total_result['count']
-            
-            # 获取分页数据
-            quotes = execute_query('''
-                SELECT q.*, u.username as added_by 
-                FROM quotes q 
-                LEFT JOIN users u ON q.user_id = u.id 
-                ORDER BY q.created_at DESC 
+            if cursor is not None:
+                clauses.append(keyset_condition(sort, '%s', {'created_at': '::timestamp'}))
+                params.extend(cursor_keys)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            quotes = execute_query(f'''
+                SELECT {columns}
+                FROM quotes q {join}
+                {where}
+                ORDER BY {order_by}
                 LIMIT %s OFFSET %s
-            ''', (page_size, offset), fetch_all=True)
+            ''', tuple(params) + (page_size + 1, 0 if cursor is not None else offset), fetch_all=True)
         else:
-            total_result = execute_query('SELECT COUNT(*) as count FROM quotes', fetch_one=True)
-            total = total_result['count']
-            
-            # 获取分页数据
-            quotes = execute_query('''
-                SELECT q.*, u.username as added_by 
-                FROM quotes q 
-                LEFT JOIN users u ON q.user_id = u.id 
-                ORDER BY q.created_at DESC 
+            if cursor is not None:
+                clauses.append(keyset_condition(sort, '?'))
+                params.extend(cursor_keys)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            quotes = execute_query(f'''
+                SELECT {columns}
+                FROM quotes q {join}
+                {where}
+                ORDER BY {order_by}
                 LIMIT ? OFFSET ?
-            ''', (page_size, offset), fetch_all=True)
+            ''', tuple(params) + (page_size + 1, 0 if cursor is not None else offset), fetch_all=True)
+        
+        has_more = len(quotes) > page_size
+        quotes = quotes[:page_size]
+        next_cursor = cursor_after(quotes[-1], sort) if has_more else None
         
         # 转换为字典列表
-        quotes_list = [dict(quote) for quote in quotes]
+        quotes_list = [serialize_quote(quote, fields) for quote in quotes]
         
-        return jsonify({
+        result = {
+            'quotes': quotes_list,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'count_strategy': count_strategy,
+            'sort': sort
+        }
+        if cursor is None:
+            result['page'] = page
+        if total is not None:
+            result['total'] = total
+            if cursor is None:
+                result['total_pages'] = (total + page_size - 1) // page_size
+        
+        response = jsonify(result)
+        response_cache.set(stats['data_version'], cache_key, response.get_data())
+        return set_validators(response, etag, last_modified), 200
+        
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"获取名言错误: {e}")
+        return jsonify({'message': '获取名言失败'}), 500
+
+# 导出时每次从数据库游标取的行数
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', 1000))
+
+@app.route('/api/quotes/export', methods=['GET'])
+def export_quotes():
+    """流式导出全部（或按条件过滤的）名言，格式为 NDJSON 或 CSV
+
+    响应体由生成器逐块产出，整个导出在一个只读事务（同一快照）内完成，
+    ?gzip=1 或 Accept-Encoding 包含 gzip 时压缩输出。
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': f"format 参数只支持: {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        clauses, params = build_quote_filters(request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    query = f'''
+        SELECT q.id, q.content, q.author, q.user_id, u.username as added_by, q.created_at
+        FROM quotes q
+        LEFT JOIN users u ON q.user_id = u.id
+        {where}
+        ORDER BY q.id
+    '''
+    # 在返回响应之前取连接并开始事务，连接池繁忙时仍能返回 503
+    get_request_db()
+    
+    def generate():
+        try:
+            yield from encode_rows(iter_query(query, params, EXPORT_FETCH_SIZE), fmt)
+        except Exception as e:
+            # 响应头已经发出，只能记录错误并截断输出
+            print(f"导出名言错误: {e}")
+    
+    body = generate()
+    use_gzip = request.args.get('gzip') == '1' or bool(request.accept_encodings['gzip'])
+    if use_gzip:
+        body = gzip_chunks(body)
+    
+    response = app.response_class(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=quotes.{fmt}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def load_quote_ids(after_id=0, author=None):
+    """按 id 升序读取名言 id：after_id 之后的全部 id，或某位作者的全部 id"""
+    if IS_PRODUCTION:
+        if author is not None:
+            rows = execute_query('SELECT id FROM quotes WHERE author = %s ORDER BY id', (author,), fetch_all=True)
+        else:
+            rows = execute_query('SELECT id FROM quotes WHERE id > %s ORDER BY id', (after_id,), fetch_all=True)
+    else:
+        if author is not None:
+            rows = execute_query('SELECT id FROM quotes WHERE author = ? ORDER BY id', (author,), fetch_all=True)
+        else:
+            rows = execute_query('SELECT id FROM quotes WHERE id > ? ORDER BY id', (after_id,), fetch_all=True)
+    return [row['id'] for row in rows]
+
+@app.route('/api/quotes/random', methods=['GET'])
+def random_quotes():
+    """均匀随机返回 n 条不重复的名言（默认 1 条，最多 50 条），可按 author 过滤"""
+    try:
+        n = int(request.args.get('n', 1))
+    except ValueError:
+        return jsonify({'message': 'n 必须是整数'}), 400
+    n = max(1, min(n, 50))
+    author = canonical_author(request.args.get('author', '')) or None
+    
+    try:
+        # 读取版本号和 id 在同一个只读快照内，数组与数据一致
+        stats = get_quote_stats()
+        ids = id_sampler.sample(stats['data_version'], stats['row_count'], load_quote_ids,
+                                n=n, author=author)
+        response = jsonify({'quotes': fetch_quotes_by_ids(ids)})
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+    
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"获取随机名言错误: {e}")
+        return jsonify({'message': '获取随机名言失败'}), 500
+
+# 洗牌浏览每次批量探测的位置数（id 空洞较多时减少查询次数）
+SHUFFLE_PROBE_BATCH = 32
+# 单次请求最多探测的位置数；id 空洞很多时提前返回，客户端从响应中的 position 继续
+SHUFFLE_MAX_PROBES = int(os.getenv('SHUFFLE_MAX_PROBES', 1024))
+
+def quote_id_high_water():
+    """分配过的最大名言 id（只增不减，删除名言不会让它变小），没有分配过时为 0"""
+    if IS_PRODUCTION:
+        row = execute_query(
+            "SELECT COALESCE(pg_sequence_last_value(pg_get_serial_sequence('quotes', 'id')::regclass), 0) AS high_water",
+            fetch_one=True
+        )
+    else:
+        # quotes.id 为 AUTOINCREMENT，sqlite_sequence 记录分配过的最大 id
+        row = execute_query(
+            "SELECT COALESCE(MAX(seq), 0) AS high_water FROM sqlite_sequence WHERE name = 'quotes'",
+            fetch_one=True
+        )
+    return row['high_water']
+
+def existing_quote_ids(ids):
+    """返回 ids 中实际存在的 id 集合（主键查询）"""
+    if IS_PRODUCTION:
+        rows = execute_query('SELECT id FROM quotes WHERE id = ANY(%s)', (list(ids),), fetch_all=True)
+    else:
+        placeholders = ', '.join(['?'] * len(ids))
+        rows = execute_query(f'SELECT id FROM quotes WHERE id IN ({placeholders})', tuple(ids), fetch_all=True)
+    return {row['id'] for row in rows}
+
+@app.route('/api/quotes/shuffle', methods=['GET'])
+def shuffle_quotes():
+    """按 seed 决定的伪随机顺序不重复地遍历全部名言，服务端无状态
+
+    客户端把响应中的 seed、position、max_id 原样带回即可取下一条；
+    max_id 固定了本轮排列的范围，之后新增的名言会出现在下一轮（done 为 true 后换一个 seed），
+    中途删除名言也不会改变排列。单次请求最多探测 SHUFFLE_MAX_PROBES 个位置，
+    返回的名言少于 n 条且 done 为 false 时从 position 继续即可。
+    """
+    try:
+        position = int(request.args.get('position', 0))
+        n = max(1, min(int(request.args.get('n', 1)), 50))
+        max_id_param = request.args.get('max_id')
+        max_id_param = int(max_id_param) if max_id_param is not None else None
+    except ValueError:
+        return jsonify({'message': 'position、n 和 max_id 必须是整数'}), 400
+    if position < 0:
+        return jsonify({'message': 'position 不能为负数'}), 400
+    seed = request.args.get('seed') or str(secrets.randbelow(2 ** 32))
+    
+    try:
+        # 排列的域以客户端带回的 max_id 为准，不随 MAX(id) 变化；
+        # 只用只增不减的 id 高水位校验，避免构造过大的空域
+        high_water = quote_id_high_water()
+        if max_id_param is None:
+            max_id = high_water
+        elif 0 <= max_id_param <= high_water:
+            max_id = max_id_param
+        else:
+            return jsonify({'message': 'max_id 超出范围'}), 400
+        
+        found = []
+        if max_id > 0:
+            permutation = FeistelPermutation(max_id, seed)
+            probe_end = min(position + SHUFFLE_MAX_PROBES, max_id)
+            while len(found) < n and position < probe_end:
+                end = min(position + SHUFFLE_PROBE_BATCH, probe_end)
+                candidates = [permutation.permute(i) + 1 for i in range(position, end)]
+                existing = existing_quote_ids(candidates)
+                for candidate in candidates:
+                    position += 1
+                    if candidate in existing:
+                        found.append(candidate)
+                        if len(found) == n:
+                            break
+        
+        response = jsonify({
+            'quotes': fetch_quotes_by_ids(found),
+            'seed': seed,
+            'position': position,
+            'max_id': max_id,
+            'done': position >= max_id
+        })
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+    
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"洗牌浏览错误: {e}")
+        return jsonify({'message': '获取名言失败'}), 500
+
+# 搜索结果摘要的长度（字符数）
+SEARCH_SNIPPET_WIDTH = int(os.getenv('SEARCH_SNIPPET_WIDTH', 60))
+# 搜索词全部无法走索引（SQLite 下只由标点组成的短词）时，只逐行检查最新的这么多条名言
+SEARCH_SCAN_LIMIT = int(os.getenv('SEARCH_SCAN_LIMIT', 5000))
+
+@app.route('/api/quotes/search', methods=['GET'])
+def search_quotes():
+    """搜索名言内容和作者，按相关度排序分页，返回带 <mark> 高亮的摘要
+
+    多个词（空白分隔）之间为 AND。SQLite 使用 FTS5 trigram 索引并按 bm25 排序，
+    PostgreSQL 使用 pg_trgm GIN 索引并按 word_similarity 排序。
+    少于 3 个字符的词（大多数中文词）走二元组索引（SQLite 为 quotes_bigram，PostgreSQL 为 quote_grams 数组），
+    候选行再用 LIKE 精确过滤。SQLite 下只由标点组成的短词没有索引可用，全部搜索词都是这种词时
+    只检查最新的 SEARCH_SCAN_LIMIT 条名言，响应中 scan_limited 为 true 表示结果可能不完整。
+    """
+    terms = parse_terms(request.args.get('q'))
+    if not terms:
+        return jsonify({'message': '搜索词不能为空'}), 400
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        page_size = int(request.args.get('pageSize', 10))
+    except ValueError:
+        return jsonify({'message': 'page 和 pageSize 必须是整数'}), 400
+    if page_size <= 0:
+        page_size = 10
+    page_size = min(page_size, 50)
+    offset = (page - 1) * page_size
+    
+    try:
+        stats = get_quote_stats()
+        cache_key = f"quotes:search:q={' '.join(terms)}&page={page}&pageSize={page_size}"
+        etag = make_etag(stats['data_version'], cache_key)
+        last_modified = to_http_datetime(stats['updated_at'])
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        cached = response_cache.get(stats['data_version'], cache_key)
+        if cached is not None:
+            response = app.response_class(cached, status=200, mimetype='application/json')
+            return set_validators(response, etag, last_modified)
+        
+        indexed, short = split_indexed_terms(terms)
+        scan_limited = False
+        if IS_PRODUCTION:
+            clauses, params = [], []
+            for term in terms:
+                clauses.append('(q.content ILIKE %s OR q.author ILIKE %s)')
+                params.extend([like_pattern(term)] * 2)
+            # pg_trgm 提取不到 trigram 的词用二元组数组索引缩小候选范围
+            grams = sorted({gram for term in terms if needs_gram_index(term) for gram in term_grams(term)})
+            if grams:
+                clauses.insert(0, '(quote_grams(q.content) || quote_grams(q.author)) @> %s::text[]')
+                params.insert(0, grams)
+            query_text = ' '.join(terms)
+            quotes = execute_query(f'''
+                SELECT q.*, u.username as added_by,
+                       GREATEST(word_similarity(%s, q.content), word_similarity(%s, q.author)) AS rank
+                FROM quotes q
+                LEFT JOIN users u ON q.user_id = u.id
+                WHERE {' AND '.join(clauses)}
+                ORDER BY rank DESC, q.created_at DESC, q.id DESC
+                LIMIT %s OFFSET %s
+            ''', [query_text, query_text] + params + [page_size + 1, offset], fetch_all=True)
+        else:
+            bigram, _ = split_bigram_terms(short)
+            clauses, params = [], []
+            for term in short:
+                clauses.append("(q.content LIKE ? ESCAPE '\\' OR q.author LIKE ? ESCAPE '\\')")
+                params.extend([like_pattern(term)] * 2)
+            if indexed:
+                where, match_params = ['quotes_fts MATCH ?'], [fts_match_expression(indexed)]
+                if bigram:
+                    where.append('q.id IN (SELECT rowid FROM quotes_bigram WHERE quotes_bigram MATCH ?)')
+                    match_params.append(bigram_match_expression(bigram))
+                quotes = execute_query(f'''
+                    SELECT q.*, u.username as added_by, bm25(quotes_fts) AS rank
+                    FROM quotes_fts
+                    JOIN quotes q ON q.id = quotes_fts.rowid
+                    LEFT JOIN users u ON q.user_id = u.id
+                    WHERE {' AND '.join(where + clauses)}
+                    ORDER BY rank, q.id DESC
+                    LIMIT ? OFFSET ?
+                ''', match_params + params + [page_size + 1, offset], fetch_all=True)
+            elif bigram:
+                where = ' AND '.join(['quotes_bigram MATCH ?'] + clauses)
+                quotes = execute_query(f'''
+                    SELECT q.*, u.username as added_by, bm25(quotes_bigram) AS rank
+                    FROM quotes_bigram
+                    JOIN quotes q ON q.id = quotes_bigram.rowid
+                    LEFT JOIN users u ON q.user_id = u.id
+                    WHERE {where}
+                    ORDER BY rank, q.id DESC
+                    LIMIT ? OFFSET ?
+                ''', [bigram_match_expression(bigram)] + params + [page_size + 1, offset], fetch_all=True)
+            else:
+                # 没有可用的索引：只检查最新的 SEARCH_SCAN_LIMIT 条，扫描行数有上限
+                quotes = execute_query(f'''
+                    SELECT q.*, u.username as added_by
+                    FROM (
+                        SELECT * FROM quotes ORDER BY created_at DESC, id DESC LIMIT ?
+                    ) q
+                    LEFT JOIN users u ON q.user_id = u.id
+                    WHERE {' AND '.join(clauses)}
+                    ORDER BY q.created_at DESC, q.id DESC
+                    LIMIT ? OFFSET ?
+                ''', [SEARCH_SCAN_LIMIT] + params + [page_size + 1, offset], fetch_all=True)
+                scan_limited = stats['row_count'] > SEARCH_SCAN_LIMIT
+
+        has_more = len(quotes) > page_size
+        quotes_list = []
+        for quote in quotes[:page_size]:
+            item = serialize_quote(quote)
+            item.pop('rank', None)
+            item['highlight'] = {
+                'content': make_snippet(item['content'], terms, width=SEARCH_SNIPPET_WIDTH),
+                'author': make_snippet(item['author'], terms, width=SEARCH_SNIPPET_WIDTH),
+            }
+            quotes_list.append(item)
+        
+        response = jsonify({
             'quotes': quotes_list,
-            'total': total,
+            'query': ' '.join(terms),
             'page': page,
             'page_size': page_size,
-            'total_pages': (total + page_size - 1) // page_size
-        }), 200
+            'has_more': has_more,
+            'scan_limited': scan_limited
+        })
+        response_cache.set(stats['data_version'], cache_key, response.get_data())
+        return set_validators(response, etag, last_modified), 200
+    
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"搜索名言错误: {e}")
+        return jsonify({'message': '搜索失败'}), 500
+
+@app.route('/api/quotes/batch', methods=['POST'])
+def batch_get_quotes():
+    """批量获取名言，请求体为 {"ids": [...]}，适合 URL 放不下的长列表"""
+    data = request.get_json(silent=True)
+    try:
+        return batch_quotes_response(data.get('ids') if isinstance(data, dict) else None)
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"批量获取名言错误: {e}")
+        return jsonify({'message': '获取名言失败'}), 500
+
+@app.route('/api/quotes/<int:quote_id>', methods=['GET'])
+def get_quote(quote_id):
+    """获取单条名言（主键查询），响应可被浏览器和 CDN 长期缓存"""
+    try:
+        stats = get_quote_stats()
+        entry = quote_cache.get(quote_id)
+        if entry is not None and entry[0] != stats['mutation_version']:
+            # 有名言被修改或删除过，但不一定是这一条：只核对本行的版本号（主键查询，不 JOIN 也不重新序列化）
+            if IS_PRODUCTION:
+                row = execute_query('SELECT version FROM quotes WHERE id = %s', (quote_id,), fetch_one=True)
+            else:
+                row = execute_query('SELECT version FROM quotes WHERE id = ?', (quote_id,), fetch_one=True)
+            if row is not None and row['version'] == entry[1]:
+                entry = (stats['mutation_version'],) + entry[1:]
+                quote_cache.set(quote_id, entry)
+            else:
+                entry = None
+        if entry is None:
+            if IS_PRODUCTION:
+                quote = execute_query('''
+                    SELECT q.*, u.username as added_by
+                    FROM quotes q
+                    LEFT JOIN users u ON q.user_id = u.id
+                    WHERE q.id = %s
+                ''', (quote_id,), fetch_one=True)
+            else:
+                quote = execute_query('''
+                    SELECT q.*, u.username as added_by
+                    FROM quotes q
+                    LEFT JOIN users u ON q.user_id = u.id
+                    WHERE q.id = ?
+                ''', (quote_id,), fetch_one=True)
+            if quote is None:
+                return jsonify({'message': '名言不存在'}), 404
+            body = jsonify(serialize_quote(quote)).get_data()
+            # ETag 由响应内容决定，缓存失效后内容没变时客户端仍可得到 304
+            entry = (stats['mutation_version'], quote['version'], body, hashlib.sha1(body).hexdigest())
+            quote_cache.set(quote_id, entry)
         
+        _, _, body, etag = entry
+        cache_control = f'public, max-age={QUOTE_CACHE_MAX_AGE}'
+        not_modified = not_modified_response(etag, None, cache_control)
+        if not_modified is not None:
+            return not_modified
+        response = app.response_class(body, status=200, mimetype='application/json')
+        return set_validators(response, etag, None, cache_control)
+    
+    except PoolTimeout:
+        raise
     except Exception as e:
         print(f"获取名言错误: {e}")
         return jsonify({'message': '获取名言失败'}), 500
@@ -389,44 +1394,312 @@ def add_quote():
     current_user_id = get_jwt_identity()  # 这现在是字符串形式的用户ID
     data = request.get_json()
     
-    content = data.get('content') or ''
-    author = data.get('author') or ''
-    
-    if isinstance(content, str):
-        content = content.strip()
-    else:
-        content = ''
-        
-    if isinstance(author, str):
-        author = author.strip()
-    else:
-        author = ''
-    
-    if not content or not author:
-        return jsonify({'message': '内容和作者不能为空'}), 400
+    content, author, error = clean_quote_fields(data)
+    if error:
+        return jsonify({'message': error}), 400
     
     try:
+        # 一条语句插入并取回数据库生成的 id 和 created_at，客户端不需要再读一次
         if IS_PRODUCTION:
-            execute_query(
-                'INSERT INTO quotes (content, author, user_id) VALUES (%s, %s, %s)',
-                (content, author, int(current_user_id))
+            quote = execute_query(
+                'INSERT INTO quotes (content, author, user_id) VALUES (%s, %s, %s) RETURNING id, created_at',
+                (content, author, int(current_user_id)),
+                fetch_one=True
             )
         else:
-            execute_query(
-                'INSERT INTO quotes (content, author, user_id) VALUES (?, ?, ?)', 
-                (content, author, int(current_user_id))
+            quote = execute_query(
+                'INSERT INTO quotes (content, author, user_id) VALUES (?, ?, ?) RETURNING id, created_at',
+                (content, author, int(current_user_id)),
+                fetch_one=True
             )
+        commit_db()
         
         return jsonify({
             'message': '添加成功',
+            'id': quote['id'],
             'content': content,
-            'author': author
+            'author': author,
+            'user_id': int(current_user_id),
+            'created_at': quote['created_at']
         }), 201
         
+    except PoolTimeout:
+        raise
     except Exception as e:
         print(f"添加名言错误: {e}")
         return jsonify({'message': '添加失败，请重试'}), 500
 
+BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+@app.route('/api/quotes/bulk', methods=['POST'])
+@jwt_required()
+def bulk_add_quotes():
+    """批量导入名言，请求体为 NDJSON 或 CSV（可 gzip 压缩），流式读取"""
+    current_user_id = get_jwt_identity()
+    fmt, gzipped = detect_format(content_type=request.mimetype)
+    fmt = request.args.get('format', fmt)
+    gzipped = gzipped or request.headers.get('Content-Encoding', '').lower() == 'gzip' \
+        or request.args.get('gzip') == '1'
+    try:
+        batch_size = int(request.args.get('batch_size', BULK_IMPORT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({'message': 'batch_size 必须是整数'}), 400
+
+    try:
+        report = import_quotes(
+            get_request_db(),
+            'postgresql' if IS_PRODUCTION else 'sqlite',
+            iter_rows(request.stream, fmt, gzipped),
+            user_id=int(current_user_id),
+            batch_size=batch_size
+        )
+        commit_db()
+        return jsonify({'message': '导入完成', **report}), 201
+
+    except ImportFormatError as e:
+        return jsonify({'message': str(e)}), 400
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"批量导入错误: {e}")
+        return jsonify({'message': '导入失败，请重试'}), 500
+
+# 作者相关路由
+# 作者排序：name 使用 (name, quote_count) WHERE quote_count > 0 部分索引，count 使用 (quote_count DESC, name) 索引
+AUTHOR_SORTS = {
+    'name': 'name',
+    'count': 'quote_count DESC, name',
+}
+
+@app.route('/api/authors', methods=['GET'])
+def get_authors():
+    """作者列表及每位作者的名言数（由触发器维护，不需要对 quotes 做 GROUP BY）"""
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        page_size = int(request.args.get('pageSize', 20))
+    except ValueError:
+        return jsonify({'message': 'page 和 pageSize 必须是整数'}), 400
+    if page_size <= 0:
+        page_size = 20
+    page_size = min(page_size, 100)
+    sort = request.args.get('sort', 'name')
+    if sort not in AUTHOR_SORTS:
+        return jsonify({'message': f"sort 参数只支持: {', '.join(AUTHOR_SORTS)}"}), 400
+    offset = (page - 1) * page_size
+    
+    try:
+        # 作者计数只随 quotes 的写入变化，沿用 quotes 的数据版本号做缓存和 ETag
+        stats = get_quote_stats()
+        cache_key = f'authors:list:page={page}&pageSize={page_size}&sort={sort}'
+        etag = make_etag(stats['data_version'], cache_key)
+        last_modified = to_http_datetime(stats['updated_at'])
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        cached = response_cache.get(stats['data_version'], cache_key)
+        if cached is not None:
+            response = app.response_class(cached, status=200, mimetype='application/json')
+            return set_validators(response, etag, last_modified)
+        
+        if IS_PRODUCTION:
+            authors = execute_query(f'''
+                SELECT id, name, quote_count FROM authors
+                WHERE quote_count > 0
+                ORDER BY {AUTHOR_SORTS[sort]}
+                LIMIT %s OFFSET %s
+            ''', (page_size + 1, offset), fetch_all=True)
+        else:
+            authors = execute_query(f'''
+                SELECT id, name, quote_count FROM authors
+                WHERE quote_count > 0
+                ORDER BY {AUTHOR_SORTS[sort]}
+                LIMIT ? OFFSET ?
+            ''', (page_size + 1, offset), fetch_all=True)
+        
+        response = jsonify({
+            'authors': [dict(author) for author in authors[:page_size]],
+            'page': page,
+            'page_size': page_size,
+            'has_more': len(authors) > page_size,
+            'sort': sort
+        })
+        response_cache.set(stats['data_version'], cache_key, response.get_data())
+        return set_validators(response, etag, last_modified), 200
+    
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"获取作者列表错误: {e}")
+        return jsonify({'message': '获取作者列表失败'}), 500
+
+def load_authors():
+    """读取全部有名言的作者及当前最大名言 id（作者联想索引整体加载时使用）"""
+    rows = execute_query('SELECT id, name, quote_count FROM authors WHERE quote_count > 0', fetch_all=True)
+    max_id = execute_query('SELECT MAX(id) AS max_id FROM quotes', fetch_one=True)['max_id']
+    return [(row['id'], row['name'], row['quote_count']) for row in rows], max_id
+
+def load_new_authors(after_id):
+    """按作者汇总 id 大于 after_id 的名言（主键范围查询，作者联想索引增量刷新时使用）"""
+    if IS_PRODUCTION:
+        rows = execute_query('''
+            SELECT a.id, a.name, COUNT(*) AS added, MAX(q.id) AS max_id
+            FROM quotes q JOIN authors a ON a.id = q.author_id
+            WHERE q.id > %s
+            GROUP BY a.id, a.name
+        ''', (after_id,), fetch_all=True)
+    else:
+        rows = execute_query('''
+            SELECT a.id, a.name, COUNT(*) AS added, MAX(q.id) AS max_id
+            FROM quotes q JOIN authors a ON a.id = q.author_id
+            WHERE q.id > ?
+            GROUP BY a.id, a.name
+        ''', (after_id,), fetch_all=True)
+    return [(row['id'], row['name'], row['added'], row['max_id']) for row in rows]
+
+@app.route('/api/authors/suggest', methods=['GET'])
+def suggest_authors():
+    """按前缀联想作者名（不区分大小写），名言数多的作者排在前面；查询走进程内索引，不访问 authors 表"""
+    try:
+        n = int(request.args.get('n', 10))
+    except ValueError:
+        return jsonify({'message': 'n 必须是整数'}), 400
+    n = max(1, min(n, AUTHOR_SUGGEST_MAX))
+    prefix = canonical_author(request.args.get('prefix', ''))
+    
+    try:
+        # 读取版本号和刷新索引在同一个只读快照内
+        stats = get_quote_stats()
+        etag = make_etag(stats['data_version'], f'authors:suggest:{prefix}:{n}')
+        last_modified = to_http_datetime(stats['updated_at'])
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        authors = author_index.suggest(stats['data_version'], stats['mutation_version'], stats['row_count'],
+                                       load_authors, load_new_authors, prefix, limit=n)
+        response = jsonify({
+            'prefix': prefix,
+            'authors': [{'id': author_id, 'name': name, 'quote_count': count}
+                        for author_id, name, count in authors]
+        })
+        return set_validators(response, etag, last_modified), 200
+    
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"作者联想错误: {e}")
+        return jsonify({'message': '获取作者联想失败'}), 500
+
+# 用户相关路由
+# 用户名言列表只支持按时间排序，两种方向都由 (user_id, created_at DESC, id DESC) 索引直接提供
+USER_QUOTE_SORTS = ('newest', 'oldest')
+
+def user_quotes_response(user_id, cache_control='no-cache'):
+    """某个用户添加的名言（游标分页），总数读取触发器维护的 users.quote_count"""
+    try:
+        page_size = int(request.args.get('pageSize', 10))
+    except ValueError:
+        return jsonify({'message': 'pageSize 必须是整数'}), 400
+    if page_size <= 0:
+        page_size = 10
+    page_size = min(page_size, 50)
+    sort = request.args.get('sort', DEFAULT_SORT)
+    if sort not in USER_QUOTE_SORTS:
+        return jsonify({'message': f"sort 参数只支持: {', '.join(USER_QUOTE_SORTS)}"}), 400
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            cursor_keys = decode_cursor(cursor, sort)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+    try:
+        fields = parse_quote_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    columns, join = quote_select_clause(fields, SORTS[sort]['keys'])
+    
+    try:
+        stats = get_quote_stats()
+        cache_key = (f"users:{user_id}:quotes:pageSize={page_size}&cursor={cursor or ''}"
+                     f"&fields={','.join(fields or ())}&sort={sort}")
+        etag = make_etag(stats['data_version'], cache_key)
+        last_modified = to_http_datetime(stats['updated_at'])
+        not_modified = not_modified_response(etag, last_modified, cache_control)
+        if not_modified is not None:
+            return not_modified
+        
+        cached = response_cache.get(stats['data_version'], cache_key)
+        if cached is not None:
+            response = app.response_class(cached, status=200, mimetype='application/json')
+            return set_validators(response, etag, last_modified, cache_control)
+        
+        if IS_PRODUCTION:
+            user = execute_query('SELECT id, username, quote_count FROM users WHERE id = %s',
+                                 (user_id,), fetch_one=True)
+        else:
+            user = execute_query('SELECT id, username, quote_count FROM users WHERE id = ?',
+                                 (user_id,), fetch_one=True)
+        if not user:
+            return jsonify({'message': '用户不存在'}), 404
+        
+        params = [user_id]
+        if IS_PRODUCTION:
+            clauses = ['q.user_id = %s']
+            if cursor is not None:
+                clauses.append(keyset_condition(sort, '%s', {'created_at': '::timestamp'}))
+                params.extend(cursor_keys)
+            quotes = execute_query(f'''
+                SELECT {columns}
+                FROM quotes q {join}
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {order_by_clause(sort)}
+                LIMIT %s
+            ''', tuple(params) + (page_size + 1,), fetch_all=True)
+        else:
+            clauses = ['q.user_id = ?']
+            if cursor is not None:
+                clauses.append(keyset_condition(sort, '?'))
+                params.extend(cursor_keys)
+            quotes = execute_query(f'''
+                SELECT {columns}
+                FROM quotes q {join}
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {order_by_clause(sort)}
+                LIMIT ?
+            ''', tuple(params) + (page_size + 1,), fetch_all=True)
+        
+        has_more = len(quotes) > page_size
+        quotes = quotes[:page_size]
+        response = jsonify({
+            'user': {'id': user['id'], 'username': user['username']},
+            'quotes': [serialize_quote(quote, fields) for quote in quotes],
+            'page_size': page_size,
+            'next_cursor': cursor_after(quotes[-1], sort) if has_more else None,
+            'total': user['quote_count'],
+            'sort': sort
+        })
+        response_cache.set(stats['data_version'], cache_key, response.get_data())
+        return set_validators(response, etag, last_modified, cache_control), 200
+    
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        print(f"获取用户名言错误: {e}")
+        return jsonify({'message': '获取用户名言失败'}), 500
+
+@app.route('/api/users/me/quotes', methods=['GET'])
+@jwt_required()
+def get_my_quotes():
+    """当前登录用户添加的名言"""
+    # 响应因用户而异，不允许共享缓存保存
+    return user_quotes_response(int(get_jwt_identity()), cache_control='private, no-cache')
+
+@app.route('/api/users/<int:user_id>/quotes', methods=['GET'])
+def get_user_quotes(user_id):
+    """指定用户添加的名言"""
+    return user_quotes_response(user_id)
+
 # ==================== 详细监控端点 ====================
 
 @app.route('/health/detailed', methods=['GET'])
@@ -450,12 +1723,15 @@ def detailed_health_check():
             cursor.execute('SELECT 1')
             cursor.fetchone()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             health_status['checks']['database'] = {
                 'status': 'healthy',
                 'type': 'postgresql',
                 'message': 'Database connection successful'
             }
+            pool_stats = get_pool_stats()
+            if pool_stats is not None:
+                health_status['checks']['database']['pool'] = pool_stats
         else:
             # SQLite 连接检查
             conn = get_db_connection()
@@ -463,12 +1739,15 @@ def detailed_health_check():
             cursor.execute('SELECT 1')
             cursor.fetchone()
             cursor.close()
-            conn.close()
+            release_db_connection(conn)
             health_status['checks']['database'] = {
                 'status': 'healthy',
                 'type': 'sqlite',
                 'message': 'Database connection successful'
             }
+            pool_stats = get_pool_stats()
+            if pool_stats is not None:
+                health_status['checks']['database']['connections'] = pool_stats
     except Exception as e:
         health_status['status'] = 'unhealthy'
         health_status['checks']['database'] = {
@@ -476,6 +1755,16 @@ def detailed_health_check():
             'message': f'Database connection failed: {str(e)}'
         }
     
+    # 缓存命中统计
+    health_status['metrics'] = {
+        'response_cache': response_cache.stats(),
+        'quote_cache': quote_cache.stats(),
+        'random_sampler': id_sampler.stats(),
+        'author_index': author_index.stats(),
+        'password_hashing': password_hasher.stats(),
+        'jwt_cache': jwt.token_cache_stats()
+    }
+    
     # JWT配置检查
     try:
         jwt_secret = app.config.get('JWT_SECRET_KEY')
@@ -559,6 +1848,20 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'message': '服务器内部错误'}), 500
 
+@app.errorhandler(PoolTimeout)
+def database_busy(error):
+    print(f"数据库连接池耗尽: {error}")
+    response = jsonify({'message': '服务繁忙，请稍后重试'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@app.errorhandler(HashPoolBusy)
+def password_hashing_busy(error):
+    print(f"密码哈希繁忙: {error}")
+    response = jsonify({'message': '登录请求过多，请稍后重试'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 if __name__ == '__main__':
     # 初始化数据库
     try:
@@ -0,0 +1,198 @@
+"""
+作者名前缀索引（输入联想）
+在内存中保存按名字排序的作者数组，前缀查询用 bisect 定位到一段连续区间，不需要每次按键都查询数据库。
+匹配区间较小时直接在区间内取名言数最多的几位；区间很大（前缀很短）时读取为该前缀维护的
+名言数最多的 max_limit 位作者，这份列表在整体加载时建好，新增名言时就地更新，两种情况都只检查少量元素。
+索引随数据版本号刷新：只有新增名言时增量读取新名言涉及的作者，发生修改或删除时整体重新加载
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from itertools import groupby
+
+# 前缀之后可能出现的最大字符，用来求前缀区间的右端点
+_MAX_CHAR = '\U0010ffff'
+
+
+def prefix_key(name):
+    """前缀匹配使用的键（不区分大小写）"""
+    return name.casefold()
+
+
+class AuthorIndex:
+    """按数据版本号维护的作者前缀索引，线程安全
+
+    load_authors() 由调用方提供，返回 (作者列表, 当前最大名言 id)，作者为 (id, name, quote_count)，
+    只包含有名言的作者；load_new_authors(after_id) 返回 id 大于 after_id 的名言按作者汇总的
+    (id, name, 新增名言数, 其中最大的名言 id)。
+    """
+
+    def __init__(self, scan_limit=2000, max_limit=50):
+        # 匹配区间不超过 scan_limit 个作者时在区间内选取，否则读取该前缀维护的前 max_limit 位作者
+        self.scan_limit = scan_limit
+        self.max_limit = max_limit
+        self._lock = threading.Lock()
+        self.full_reloads = 0
+        self.incremental_refreshes = 0
+        # 前缀查询次数与检查过的作者数，用来确认每次查询只检查少量元素
+        self.lookups = 0
+        self.examined = 0
+        self._reset()
+
+    def _reset(self):
+        self._keys = []        # 按前缀键排序
+        self._ids = []         # 与 _keys 一一对应的作者 id
+        self._names = {}       # 作者 id -> 名字
+        self._key_by_id = {}   # 作者 id -> 前缀键
+        self._counts = {}      # 作者 id -> 名言数
+        self._ranked = []      # 作者 id，按 (名言数降序, 前缀键) 排序
+        self._total = 0
+        self._max_quote_id = 0
+        # 大区间（短前缀）-> 名言数最多的 max_limit 位作者 id（按排名）；每一层这类前缀最多 N / scan_limit 个
+        self._top = {}
+        self._version = None
+        self._mutation_version = None
+
+    def _rank_key(self, author_id):
+        return (-self._counts[author_id], self._key_by_id[author_id])
+
+    def _add(self, author_id, name, count):
+        key = prefix_key(name)
+        position = bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._ids.insert(position, author_id)
+        self._names[author_id] = name
+        self._key_by_id[author_id] = key
+        self._counts[author_id] = count
+        insort(self._ranked, author_id, key=self._rank_key)
+        self._promote(author_id)
+
+    def _increment(self, author_id, added):
+        position = bisect_left(self._ranked, self._rank_key(author_id), key=self._rank_key)
+        while self._ranked[position] != author_id:
+            position += 1
+        del self._ranked[position]
+        self._counts[author_id] += added
+        insort(self._ranked, author_id, key=self._rank_key)
+        self._promote(author_id)
+
+    def _promote(self, author_id):
+        """作者新加入或名言数增加后，更新包含它的大区间前缀的前 max_limit 位作者
+
+        增量刷新时名言数只增不减，不在列表中的作者只有自己的名言数增加时才可能进入，列表始终准确
+        """
+        key = self._key_by_id[author_id]
+        for length in range(len(key) + 1):
+            top = self._top.get(key[:length])
+            if top is None:
+                continue
+            if author_id in top:
+                top.remove(author_id)
+            elif len(top) == self.max_limit and self._rank_key(author_id) >= self._rank_key(top[-1]):
+                continue
+            insort(top, author_id, key=self._rank_key)
+            del top[self.max_limit:]
+
+    def _index_wide_prefixes(self):
+        """整体加载后找出匹配区间超过 scan_limit 的前缀，沿名言数顺序一次填好它们的前 max_limit 位作者"""
+        level = [('', 0, len(self._keys))] if len(self._keys) > self.scan_limit else []
+        wide = []
+        while level:
+            wide.extend(key for key, _, _ in level)
+            children = []
+            for key, low, high in level:
+                # 区间内的键已排序，按多一个字符的前缀分组即得到各个子区间
+                position = low
+                for child, group in groupby(self._keys[low:high], key=lambda k: k[:len(key) + 1]):
+                    size = sum(1 for _ in group)
+                    if child != key and size > self.scan_limit:
+                        children.append((child, position, position + size))
+                    position += size
+            level = children
+        self._top = {key: [] for key in wide}
+        unfilled = len(self._top)
+        for author_id in self._ranked:
+            if not unfilled:
+                break
+            key = self._key_by_id[author_id]
+            # 大区间前缀的前缀同样是大区间前缀，遇到第一个不在其中的长度即可停止
+            for length in range(len(key) + 1):
+                top = self._top.get(key[:length])
+                if top is None:
+                    break
+                if len(top) < self.max_limit:
+                    top.append(author_id)
+                    unfilled -= len(top) == self.max_limit
+
+    def _refresh(self, row_count, mutation_version, load_authors, load_new_authors):
+        if self._version is not None and mutation_version == self._mutation_version:
+            rows = load_new_authors(self._max_quote_id)
+            for author_id, name, added, max_id in rows:
+                if author_id in self._counts:
+                    self._increment(author_id, added)
+                else:
+                    self._add(author_id, name, added)
+                self._total += added
+                self._max_quote_id = max(self._max_quote_id, max_id)
+            # 总数对得上说明没有漏掉提交顺序与 id 顺序不一致的名言
+            if self._total == row_count:
+                self.incremental_refreshes += 1
+                return
+
+        self._reset()
+        authors, max_quote_id = load_authors()
+        authors = sorted(authors, key=lambda author: prefix_key(author[1]))
+        self._keys = [prefix_key(name) for _, name, _ in authors]
+        self._ids = [author_id for author_id, _, _ in authors]
+        self._names = {author_id: name for author_id, name, _ in authors}
+        self._key_by_id = dict(zip(self._ids, self._keys))
+        self._counts = {author_id: count for author_id, _, count in authors}
+        self._ranked = sorted(self._ids, key=self._rank_key)
+        self._total = sum(self._counts.values())
+        self._max_quote_id = max_quote_id or 0
+        self._index_wide_prefixes()
+        self.full_reloads += 1
+
+    def _match(self, key, limit):
+        low = bisect_left(self._keys, key)
+        high = bisect_left(self._keys, key + _MAX_CHAR, low)
+        self.lookups += 1
+        if high - low <= self.scan_limit:
+            self.examined += high - low
+            # nsmallest 与 sorted 一样是稳定的，名言数相同时保持名字顺序
+            return heapq.nsmallest(limit, self._ids[low:high], key=self._rank_key)
+
+        if limit > self.max_limit:
+            self.examined += high - low
+            return heapq.nsmallest(limit, self._ids[low:high], key=self._rank_key)
+        top = self._top.get(key)
+        if top is None:
+            # 整体加载之后靠新增作者才变大的区间：在区间内选取一次，之后随新增名言就地更新
+            self.examined += high - low
+            top = self._top[key] = heapq.nsmallest(self.max_limit, self._ids[low:high], key=self._rank_key)
+        self.examined += min(limit, len(top))
+        return top[:limit]
+
+    def suggest(self, version, mutation_version, row_count, load_authors, load_new_authors,
+                prefix, limit=10):
+        """返回名字以 prefix 开头（不区分大小写）、名言数最多的 limit 位作者，(id, name, quote_count) 列表"""
+        with self._lock:
+            if version != self._version:
+                self._refresh(row_count, mutation_version, load_authors, load_new_authors)
+                self._version = version
+                self._mutation_version = mutation_version
+            return [(author_id, self._names[author_id], self._counts[author_id])
+                    for author_id in self._match(prefix_key(prefix), limit)]
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self):
+        return {
+            'authors': len(self._ids),
+            'full_reloads': self.full_reloads,
+            'incremental_refreshes': self.incremental_refreshes,
+            'lookups': self.lookups,
+            'examined': self.examined,
+        }
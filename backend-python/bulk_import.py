@@ -0,0 +1,188 @@
+"""
+批量导入名言
+支持 NDJSON（每行一个 {"content": ..., "author": ...}）和 CSV（表头包含 content,author），可选 gzip 压缩。
+逐行流式解析，按批写入：PostgreSQL 使用 COPY，SQLite 使用 executemany，整个导入在一个事务内完成。
+内存占用只与批大小有关，与文件大小无关。
+
+命令行用法:
+    python bulk_import.py quotes.ndjson
+    python bulk_import.py quotes.csv.gz --batch-size 5000 --user-id 1
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import sys
+import zlib
+
+from validation import clean_quote_fields
+
+FORMATS = ('ndjson', 'csv')
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+# 错误报告最多保留的条数，超出部分只计数
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportFormatError(ValueError):
+    """导入文件无法解析（格式不支持、CSV 缺少表头、gzip 损坏等）"""
+
+
+def detect_format(filename=None, content_type=None):
+    """根据文件名或 Content-Type 推断格式，返回 (format, gzipped)"""
+    name = (filename or '').lower()
+    gzipped = name.endswith('.gz')
+    if gzipped:
+        name = name[:-3]
+    if name.endswith('.csv') or (content_type or '').startswith('text/csv'):
+        return 'csv', gzipped
+    return 'ndjson', gzipped
+
+
+def iter_rows(stream, fmt, gzipped=False):
+    """逐行读取二进制流，产出 (行号, 数据字典或 None, 错误信息或 None)"""
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"不支持的导入格式: {fmt}，只支持 {', '.join(FORMATS)}")
+    if gzipped:
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    try:
+        if fmt == 'ndjson':
+            yield from _iter_ndjson(text)
+        else:
+            yield from _iter_csv(text)
+    except (OSError, EOFError, zlib.error) as e:
+        raise ImportFormatError(f'gzip 数据损坏: {e}')
+    except UnicodeDecodeError:
+        raise ImportFormatError('文件不是有效的 UTF-8 编码')
+
+
+def _iter_ndjson(text):
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f'JSON 解析失败: {e.msg}'
+            continue
+        if not isinstance(data, dict):
+            yield line_no, None, '每行必须是 JSON 对象'
+            continue
+        yield line_no, data, None
+
+
+def _iter_csv(text):
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or not {'content', 'author'} <= set(reader.fieldnames):
+        raise ImportFormatError('CSV 表头必须包含 content 和 author')
+    for data in reader:
+        # 表头占第 1 行
+        yield reader.line_num, data, None
+
+
+def import_quotes(conn, dialect, rows, user_id=None, batch_size=DEFAULT_BATCH_SIZE):
+    """校验并批量写入名言，不提交事务（由调用方提交），返回导入报告"""
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    report = {'inserted': 0, 'failed': 0, 'batches': 0, 'errors': [], 'errors_truncated': False}
+    batch = []
+
+    def record_error(line_no, message):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_no, 'message': message})
+        else:
+            report['errors_truncated'] = True
+
+    for line_no, data, error in rows:
+        if error is None:
+            content, author, error = clean_quote_fields(data)
+        if error:
+            record_error(line_no, error)
+            continue
+        batch.append((content, author, user_id))
+        if len(batch) >= batch_size:
+            _write_batch(conn, dialect, batch)
+            report['inserted'] += len(batch)
+            report['batches'] += 1
+            batch = []
+
+    if batch:
+        _write_batch(conn, dialect, batch)
+        report['inserted'] += len(batch)
+        report['batches'] += 1
+    return report
+
+
+def _write_batch(conn, dialect, batch):
+    if dialect == 'postgresql':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        cursor = conn.cursor()
+        # CSV 格式中未加引号的空字段即 NULL（user_id 为空时）
+        cursor.copy_expert(
+            'COPY quotes (content, author, user_id) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+        cursor.close()
+    else:
+        conn.executemany('INSERT INTO quotes (content, author, user_id) VALUES (?, ?, ?)', batch)
+
+
+def connect_from_env():
+    """按与 app.py 相同的环境变量连接数据库，返回 (conn, dialect)"""
+    database_url = os.getenv('DATABASE_URL')
+    if database_url and database_url.startswith('postgresql://'):
+        import psycopg2
+        return psycopg2.connect(database_url), 'postgresql'
+    db_path = os.getenv('DATABASE_PATH', './db/quote.db')
+    return sqlite3.connect(db_path), 'sqlite'
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+    from migrations import migrate
+
+    parser = argparse.ArgumentParser(description='批量导入名言（NDJSON / CSV，可 gzip 压缩）')
+    parser.add_argument('file', help='导入文件路径，- 表示标准输入')
+    parser.add_argument('--format', choices=FORMATS, help='文件格式（默认按扩展名推断）')
+    parser.add_argument('--gzip', action='store_true', help='文件经过 gzip 压缩（.gz 扩展名会自动识别）')
+    parser.add_argument('--batch-size', type=int,
+                        default=int(os.getenv('BULK_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE)))
+    parser.add_argument('--user-id', type=int, default=None, help='记录为该用户添加')
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    fmt, gzipped = detect_format(args.file)
+    fmt = args.format or fmt
+    gzipped = gzipped or args.gzip
+
+    conn, dialect = connect_from_env()
+    try:
+        migrate(conn, dialect)
+        stream = sys.stdin.buffer if args.file == '-' else open(args.file, 'rb')
+        with stream:
+            report = import_quotes(conn, dialect, iter_rows(stream, fmt, gzipped),
+                                   user_id=args.user_id, batch_size=args.batch_size)
+        conn.commit()
+    except ImportFormatError as e:
+        conn.rollback()
+        print(f'❌ 导入失败: {e}')
+        return 1
+    finally:
+        conn.close()
+
+    print(f"✅ 导入完成: 成功 {report['inserted']} 条，失败 {report['failed']} 条，共 {report['batches']} 批")
+    for error in report['errors']:
+        print(f"  第 {error['line']} 行: {error['message']}")
+    if report['errors_truncated']:
+        print(f'  ……只显示前 {MAX_REPORTED_ERRORS} 条错误')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,7 @@
 import sqlite3
 import os
 from datetime import datetime
+from migrations import migrate
 
 # 创建数据库目录
 db_dir = './db'
@@ -11,35 +12,14 @@ if not os.path.exists(db_dir):
 db_path = os.path.join(db_dir, 'quote.db')
 
 def init_database():
-    """初始化数据库表"""
+    """初始化数据库表（执行尚未应用的迁移）"""
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # 创建用户表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # 创建名言表
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS quotes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            content TEXT NOT NULL,
-            author TEXT NOT NULL,
-            user_id INTEGER,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    ''')
-    
-    conn.commit()
+    applied = migrate(conn, 'sqlite')
     conn.close()
-    print('数据库初始化完成')
+    if applied:
+        print(f'数据库初始化完成，已执行迁移: {applied}')
+    else:
+        print('数据库已是最新版本')
 
 def seed_quotes():
     """插入默认名言数据"""
@@ -37,3 +37,34 @@ secure_scheme_headers = {
     'X-FORWARDED-PROTO': 'https',
     'X-FORWARDED-SSL': 'on'
 }
+
+# 数据库迁移 - 主进程启动时执行一次；schema 已是最新时只查询一次版本号
+def on_starting(server):
+    import app
+    app.init_database()
+    # 主进程不保留连接，避免 fork 出的 worker 继承同一个 socket
+    app.close_db_connections()
+
+# 数据库连接池 - preload_app 时主进程只导入应用，连接池在每个 worker fork 之后各自创建
+def post_fork(server, worker):
+    import app
+    if app.IS_PRODUCTION:
+        try:
+            app.get_pg_pool()
+        except Exception as e:
+            # 预热失败不影响 worker 启动，首次请求时会重新建立连接
+            server.log.warning(f"worker {worker.pid} 连接池预热失败: {e}")
+
+# 密码哈希限流 - 哈希和排队的请求都占着 worker，并发数加排队数必须小于 worker 数，否则登录高峰时读请求无 worker 可用
+def post_worker_init(worker):
+    import app
+    hasher = app.password_hasher
+    if hasher.fit_workers(worker.cfg.workers):
+        worker.log.warning(
+            f"BCRYPT_CONCURRENCY + BCRYPT_QUEUE_SIZE 不小于 worker 数 {worker.cfg.workers}，"
+            f"已调整为 {hasher.slots} 个并发、{hasher.queue_size} 个排队"
+        )
+
+def worker_exit(server, worker):
+    import app
+    app.close_db_connections()
@@ -0,0 +1,93 @@
+"""
+已验证 JWT 的解码缓存
+同一个客户端会反复发送同一个 token，每次请求都重新校验 HMAC 签名、解析 JSON 是重复劳动。
+这里缓存校验通过后的 claims：键是原始 token 与解码密钥的 SHA-256 摘要（不保存 token 本身），
+条目最晚在 token 的 exp 过期，LRU 限制条目数。
+只缓存签名校验这一步，token 类型、黑名单（token_in_blocklist_loader）等检查每次请求仍照常执行，
+之后加上吊销也会立即生效
+"""
+import hashlib
+import threading
+import time
+
+from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config
+
+from response_cache import LRUCache
+
+
+class CachingJWTManager(JWTManager):
+    """带解码缓存的 JWTManager
+
+    - max_entries: 缓存的 token 数上限（0 表示不缓存）
+    - max_ttl: 条目最长保留秒数，没有 exp 的 token 也按这个时间过期
+    """
+
+    def __init__(self, app=None, max_entries=1024, max_ttl=300, **kwargs):
+        self.token_cache = LRUCache(max_entries=max_entries)
+        self.max_ttl = max_ttl
+        self._stats_lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'decode_time_ms': 0.0}
+        super().__init__(app, **kwargs)
+
+    def _cache_key(self, encoded_token):
+        # 解码密钥参与摘要，更换密钥后旧条目自然失效
+        digest = hashlib.sha256()
+        digest.update(str(config.decode_key).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(encoded_token.encode('utf-8'))
+        return digest.digest()
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # cookie 中的 token 需要逐次校验 CSRF 值，允许过期的解码也不走缓存
+        if csrf_value is not None or allow_expired or self.token_cache.max_entries <= 0:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = self._cache_key(encoded_token)
+        entry = self.token_cache.get(key)
+        now = time.time()
+        if entry is not None:
+            claims, expires_at = entry
+            if now < expires_at:
+                with self._stats_lock:
+                    self._counters['hits'] += 1
+                return dict(claims)
+            self.token_cache.pop(key)
+            with self._stats_lock:
+                self._counters['expired'] += 1
+
+        started = time.perf_counter()
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._counters['misses'] += 1
+            self._counters['decode_time_ms'] += elapsed_ms
+
+        expires_at = now + self.max_ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, claims['exp'])
+        if expires_at > now:
+            self.token_cache.set(key, (dict(claims), expires_at))
+        return claims
+
+    def clear_token_cache(self):
+        self.token_cache.clear()
+
+    def token_cache_stats(self):
+        """命中率与按未命中时平均解码耗时估算的节省时间"""
+        with self._stats_lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        average_ms = stats['decode_time_ms'] / stats['misses'] if stats['misses'] else 0.0
+        cache_stats = self.token_cache.stats()
+        return {
+            'entries': cache_stats['entries'],
+            'max_entries': cache_stats['max_entries'],
+            'evictions': cache_stats['evictions'],
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'expired': stats['expired'],
+            'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+            'average_decode_ms': round(average_ms, 4),
+            'saved_ms': round(stats['hits'] * average_ms, 2),
+        }
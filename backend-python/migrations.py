@@ -0,0 +1,815 @@
+"""
+数据库迁移
+schema_version 表记录已执行的迁移版本。启动时先查一次版本号，已是最新就不再执行任何 DDL；
+需要迁移时加锁（PostgreSQL 用 advisory lock，SQLite 用 BEGIN IMMEDIATE），
+多个 worker 同时启动也只会有一个执行迁移
+"""
+
+from validation import canonical_author
+
+# PostgreSQL advisory lock 的键，用于串行化并发迁移
+MIGRATION_LOCK_ID = 73052024
+
+
+def _canonicalize_authors(dialect):
+    """迁移步骤：把已有名言的作者名改写为规范形式（规范化规则在 Python 中，无法用 SQL 表达）"""
+    def step(conn):
+        rows = _execute(conn, dialect, 'SELECT DISTINCT author FROM quotes').fetchall()
+        for row in rows:
+            author = row[0]
+            canonical = canonical_author(author)
+            if canonical and canonical != author:
+                _execute(
+                    conn, dialect,
+                    'UPDATE quotes SET author = {0} WHERE author = {0}'.format(PLACEHOLDER[dialect]),
+                    (canonical, author)
+                )
+    return step
+
+
+def _bigrams_sql(column):
+    """生成相邻两个字符（最后一个字符单独一项）用空格连接的 SQL 表达式
+
+    SQLite 触发器里不能用 WITH 递归，这里用 zeroblob 生成长度为 n 的 JSON 数组，
+    再用 json_each 逐个位置取子串；只用内置函数，任何连接写入 quotes 都能执行触发器
+    """
+    return (
+        "(SELECT group_concat(substr({0}, key + 1, 2), ' ') "
+        "FROM json_each('[' || substr(replace(hex(zeroblob(length({0}))), '00', ',0'), 2) || ']'))"
+    ).format(column)
+
+
+# 迁移按版本号顺序执行，已发布的迁移不要修改，新的变更追加新版本
+# 每个步骤可以是 SQL 字符串，也可以是接收 (conn) 的函数
+MIGRATIONS = [
+    {
+        'version': 1,
+        'description': '创建 users 和 quotes 表',
+        'sqlite': [
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS quotes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content TEXT NOT NULL,
+                author TEXT NOT NULL,
+                user_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            ''',
+        ],
+        'postgresql': [
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                password VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS quotes (
+                id SERIAL PRIMARY KEY,
+                content TEXT NOT NULL,
+                author VARCHAR(255) NOT NULL,
+                user_id INTEGER REFERENCES users(id),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+        ],
+    },
+    {
+        'version': 2,
+        'description': '名言列表排序索引与 user_id 关联索引',
+        # (created_at, id) 与列表查询的 ORDER BY 完全一致：首页和游标翻页都是索引范围扫描，不需要排序
+        # (user_id, created_at, id) 用于按用户过滤/关联，同时保留时间顺序
+        'sqlite': [
+            'CREATE INDEX IF NOT EXISTS idx_quotes_created_at_id ON quotes (created_at DESC, id DESC)',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_user_id_created_at ON quotes (user_id, created_at DESC, id DESC)',
+        ],
+        'postgresql': [
+            'CREATE INDEX IF NOT EXISTS idx_quotes_created_at_id ON quotes (created_at DESC, id DESC)',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_user_id_created_at ON quotes (user_id, created_at DESC, id DESC)',
+        ],
+    },
+    {
+        'version': 3,
+        'description': 'table_stats 计数表：由触发器在插入/删除时同一事务内维护 quotes 行数',
+        'sqlite': [
+            '''
+            CREATE TABLE IF NOT EXISTS table_stats (
+                table_name TEXT PRIMARY KEY,
+                row_count INTEGER NOT NULL DEFAULT 0
+            )
+            ''',
+            "INSERT INTO table_stats (table_name, row_count) SELECT 'quotes', COUNT(*) FROM quotes",
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_quotes_count_insert AFTER INSERT ON quotes
+            BEGIN
+                UPDATE table_stats SET row_count = row_count + 1 WHERE table_name = 'quotes';
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trg_quotes_count_delete AFTER DELETE ON quotes
+            BEGIN
+                UPDATE table_stats SET row_count = row_count - 1 WHERE table_name = 'quotes';
+            END
+            ''',
+        ],
+        # 语句级触发器 + 过渡表：批量插入（包括 COPY）每条语句只更新一次计数行
+        'postgresql': [
+            '''
+            CREATE TABLE IF NOT EXISTS table_stats (
+                table_name VARCHAR(64) PRIMARY KEY,
+                row_count BIGINT NOT NULL DEFAULT 0
+            )
+            ''',
+            # 阻止迁移期间的并发写入，保证初始计数与触发器衔接
+            'LOCK TABLE quotes IN SHARE MODE',
+            "INSERT INTO table_stats (table_name, row_count) SELECT 'quotes', COUNT(*) FROM quotes",
+            '''
+            CREATE OR REPLACE FUNCTION quotes_count_insert() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_stats SET row_count = row_count + (SELECT COUNT(*) FROM new_rows)
+                WHERE table_name = 'quotes';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_count_delete() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_stats SET row_count = row_count - (SELECT COUNT(*) FROM old_rows)
+                WHERE table_name = 'quotes';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS trg_quotes_count_insert ON quotes',
+            '''
+            CREATE TRIGGER trg_quotes_count_insert AFTER INSERT ON quotes
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_count_insert()
+            ''',
+            'DROP TRIGGER IF EXISTS trg_quotes_count_delete ON quotes',
+            '''
+            CREATE TRIGGER trg_quotes_count_delete AFTER DELETE ON quotes
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_count_delete()
+            ''',
+        ],
+    },
+    {
+        'version': 4,
+        'description': 'table_stats 增加数据版本号与最后修改时间，quotes 每次写入时递增',
+        'sqlite': [
+            'ALTER TABLE table_stats ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0',
+            'ALTER TABLE table_stats ADD COLUMN updated_at TIMESTAMP',
+            'UPDATE table_stats SET updated_at = CURRENT_TIMESTAMP',
+            'DROP TRIGGER IF EXISTS trg_quotes_count_insert',
+            'DROP TRIGGER IF EXISTS trg_quotes_count_delete',
+            '''
+            CREATE TRIGGER trg_quotes_count_insert AFTER INSERT ON quotes
+            BEGIN
+                UPDATE table_stats
+                SET row_count = row_count + 1, data_version = data_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_count_delete AFTER DELETE ON quotes
+            BEGIN
+                UPDATE table_stats
+                SET row_count = row_count - 1, data_version = data_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_touch_update AFTER UPDATE ON quotes
+            BEGIN
+                UPDATE table_stats
+                SET data_version = data_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+            END
+            ''',
+        ],
+        'postgresql': [
+            '''
+            ALTER TABLE table_stats
+                ADD COLUMN IF NOT EXISTS data_version BIGINT NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_count_insert() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_stats
+                SET row_count = row_count + (SELECT COUNT(*) FROM new_rows),
+                    data_version = data_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_count_delete() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_stats
+                SET row_count = row_count - (SELECT COUNT(*) FROM old_rows),
+                    data_version = data_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_touch_update() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_stats
+                SET data_version = data_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS trg_quotes_touch_update ON quotes',
+            '''
+            CREATE TRIGGER trg_quotes_touch_update AFTER UPDATE ON quotes
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_touch_update()
+            ''',
+        ],
+    },
+    {
+        'version': 5,
+        'description': '名言全文检索索引（SQLite FTS5 trigram / PostgreSQL pg_trgm）',
+        # trigram 按字符切分，不依赖分词，中文和英文都能做任意子串匹配
+        'sqlite': [
+            '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(
+                content, author, content='quotes', content_rowid='id', tokenize='trigram'
+            )
+            ''',
+            "INSERT INTO quotes_fts (quotes_fts) VALUES ('rebuild')",
+            '''
+            CREATE TRIGGER trg_quotes_fts_insert AFTER INSERT ON quotes
+            BEGIN
+                INSERT INTO quotes_fts (rowid, content, author) VALUES (new.id, new.content, new.author);
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_fts_delete AFTER DELETE ON quotes
+            BEGIN
+                INSERT INTO quotes_fts (quotes_fts, rowid, content, author)
+                VALUES ('delete', old.id, old.content, old.author);
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_fts_update AFTER UPDATE OF content, author ON quotes
+            BEGIN
+                INSERT INTO quotes_fts (quotes_fts, rowid, content, author)
+                VALUES ('delete', old.id, old.content, old.author);
+                INSERT INTO quotes_fts (rowid, content, author) VALUES (new.id, new.content, new.author);
+            END
+            ''',
+        ],
+        # GIN 索引由 PostgreSQL 在同一事务内维护，不需要触发器
+        'postgresql': [
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_content_trgm ON quotes USING gin (content gin_trgm_ops)',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_author_trgm ON quotes USING gin (author gin_trgm_ops)',
+        ],
+    },
+    {
+        'version': 6,
+        'description': 'table_stats 增加修改版本号，只在 quotes 更新或删除时递增',
+        # 新增不会改变已有名言，按 id 缓存的单条名言只需要在修改或删除时失效
+        'sqlite': [
+            'ALTER TABLE table_stats ADD COLUMN mutation_version INTEGER NOT NULL DEFAULT 0',
+            'DROP TRIGGER IF EXISTS trg_quotes_count_delete',
+            'DROP TRIGGER IF EXISTS trg_quotes_touch_update',
+            '''
+            CREATE TRIGGER trg_quotes_count_delete AFTER DELETE ON quotes
+            BEGIN
+                UPDATE table_stats
+                SET row_count = row_count - 1, data_version = data_version + 1,
+                    mutation_version = mutation_version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_touch_update AFTER UPDATE ON quotes
+            BEGIN
+                UPDATE table_stats
+                SET data_version = data_version + 1, mutation_version = mutation_version + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+            END
+            ''',
+        ],
+        'postgresql': [
+            'ALTER TABLE table_stats ADD COLUMN IF NOT EXISTS mutation_version BIGINT NOT NULL DEFAULT 0',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_count_delete() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_stats
+                SET row_count = row_count - (SELECT COUNT(*) FROM old_rows),
+                    data_version = data_version + 1, mutation_version = mutation_version + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_touch_update() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_stats
+                SET data_version = data_version + 1, mutation_version = mutation_version + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+        ],
+    },
+    {
+        'version': 7,
+        'description': '名言列表按作者、添加者过滤和按作者排序的组合索引',
+        # (author, created_at, id)：author 过滤 + 时间排序、按作者排序；
+        # (user_id, author, created_at, id)：user_id 过滤 + 按作者排序（user_id + 时间排序见 v2 的索引）
+        'sqlite': [
+            'CREATE INDEX IF NOT EXISTS idx_quotes_author_created_at_id ON quotes (author, created_at, id)',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_user_id_author ON quotes (user_id, author, created_at, id)',
+        ],
+        'postgresql': [
+            'CREATE INDEX IF NOT EXISTS idx_quotes_author_created_at_id ON quotes (author, created_at, id)',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_user_id_author ON quotes (user_id, author, created_at, id)',
+        ],
+    },
+    {
+        'version': 8,
+        'description': '作者表：规范化作者名，quotes.author_id 外键，触发器维护每位作者的名言数',
+        # quotes.author 保留（规范化后的名字），author_id 总是由触发器按 author 查找或创建作者后写入
+        'sqlite': [
+            '''
+            CREATE TABLE IF NOT EXISTS authors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                quote_count INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            _canonicalize_authors('sqlite'),
+            'INSERT OR IGNORE INTO authors (name, quote_count) SELECT author, COUNT(*) FROM quotes GROUP BY author',
+            'ALTER TABLE quotes ADD COLUMN author_id INTEGER REFERENCES authors (id)',
+            'UPDATE quotes SET author_id = (SELECT id FROM authors WHERE name = quotes.author)',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_author_id ON quotes (author_id, created_at, id)',
+            'CREATE INDEX IF NOT EXISTS idx_authors_quote_count ON authors (quote_count DESC, name)',
+            # 按名字排序只列有名言的作者，部分索引让这个列表也直接按索引顺序读取
+            'CREATE INDEX IF NOT EXISTS idx_authors_active_name ON authors (name, quote_count) WHERE quote_count > 0',
+            # 触发器回写 author_id 的 UPDATE 不应使单条名言缓存失效，修改版本号只跟踪内容相关的列
+            'DROP TRIGGER IF EXISTS trg_quotes_touch_update',
+            '''
+            CREATE TRIGGER trg_quotes_touch_update AFTER UPDATE OF content, author, user_id, created_at ON quotes
+            BEGIN
+                UPDATE table_stats
+                SET data_version = data_version + 1, mutation_version = mutation_version + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = 'quotes';
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_author_insert AFTER INSERT ON quotes
+            BEGIN
+                INSERT OR IGNORE INTO authors (name) VALUES (new.author);
+                UPDATE authors SET quote_count = quote_count + 1 WHERE name = new.author;
+                UPDATE quotes SET author_id = (SELECT id FROM authors WHERE name = new.author) WHERE id = new.id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_author_update AFTER UPDATE OF author ON quotes
+            BEGIN
+                UPDATE authors SET quote_count = quote_count - 1 WHERE id = old.author_id;
+                INSERT OR IGNORE INTO authors (name) VALUES (new.author);
+                UPDATE authors SET quote_count = quote_count + 1 WHERE name = new.author;
+                UPDATE quotes SET author_id = (SELECT id FROM authors WHERE name = new.author) WHERE id = new.id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_author_delete AFTER DELETE ON quotes
+            BEGIN
+                UPDATE authors SET quote_count = quote_count - 1 WHERE id = old.author_id;
+            END
+            ''',
+        ],
+        'postgresql': [
+            '''
+            CREATE TABLE IF NOT EXISTS authors (
+                id SERIAL PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                quote_count BIGINT NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            _canonicalize_authors('postgresql'),
+            '''
+            INSERT INTO authors (name, quote_count)
+            SELECT author, COUNT(*) FROM quotes GROUP BY author
+            ON CONFLICT (name) DO NOTHING
+            ''',
+            'ALTER TABLE quotes ADD COLUMN IF NOT EXISTS author_id INTEGER REFERENCES authors (id)',
+            'UPDATE quotes q SET author_id = a.id FROM authors a WHERE a.name = q.author',
+            'CREATE INDEX IF NOT EXISTS idx_quotes_author_id ON quotes (author_id, created_at, id)',
+            'CREATE INDEX IF NOT EXISTS idx_authors_quote_count ON authors (quote_count DESC, name)',
+            'CREATE INDEX IF NOT EXISTS idx_authors_active_name ON authors (name, quote_count) WHERE quote_count > 0',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_set_author_id() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO authors (name) VALUES (NEW.author) ON CONFLICT (name) DO NOTHING;
+                SELECT id INTO NEW.author_id FROM authors WHERE name = NEW.author;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS trg_quotes_set_author_id ON quotes',
+            '''
+            CREATE TRIGGER trg_quotes_set_author_id BEFORE INSERT OR UPDATE OF author ON quotes
+            FOR EACH ROW EXECUTE FUNCTION quotes_set_author_id()
+            ''',
+            # 计数按语句批量更新，COPY 导入大量名言时每位作者只更新一次
+            '''
+            CREATE OR REPLACE FUNCTION quotes_author_count_insert() RETURNS trigger AS $$
+            BEGIN
+                UPDATE authors a SET quote_count = a.quote_count + d.delta
+                FROM (SELECT author_id, COUNT(*) AS delta FROM new_rows GROUP BY author_id) d
+                WHERE a.id = d.author_id;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_author_count_delete() RETURNS trigger AS $$
+            BEGIN
+                UPDATE authors a SET quote_count = a.quote_count - d.delta
+                FROM (SELECT author_id, COUNT(*) AS delta FROM old_rows GROUP BY author_id) d
+                WHERE a.id = d.author_id;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_author_count_update() RETURNS trigger AS $$
+            BEGIN
+                UPDATE authors a SET quote_count = a.quote_count + d.delta
+                FROM (
+                    SELECT author_id, SUM(delta) AS delta FROM (
+                        SELECT author_id, 1 AS delta FROM new_rows
+                        UNION ALL
+                        SELECT author_id, -1 AS delta FROM old_rows
+                    ) changes
+                    GROUP BY author_id
+                    HAVING SUM(delta) <> 0
+                ) d
+                WHERE a.id = d.author_id;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS trg_quotes_author_count_insert ON quotes',
+            'DROP TRIGGER IF EXISTS trg_quotes_author_count_delete ON quotes',
+            'DROP TRIGGER IF EXISTS trg_quotes_author_count_update ON quotes',
+            '''
+            CREATE TRIGGER trg_quotes_author_count_insert AFTER INSERT ON quotes
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_author_count_insert()
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_author_count_delete AFTER DELETE ON quotes
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_author_count_delete()
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_author_count_update AFTER UPDATE ON quotes
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_author_count_update()
+            ''',
+        ],
+    },
+    {
+        'version': 9,
+        'description': 'users.quote_count：触发器维护每个用户添加的名言数',
+        'sqlite': [
+            'ALTER TABLE users ADD COLUMN quote_count INTEGER NOT NULL DEFAULT 0',
+            'UPDATE users SET quote_count = (SELECT COUNT(*) FROM quotes WHERE quotes.user_id = users.id)',
+            '''
+            CREATE TRIGGER trg_quotes_user_count_insert AFTER INSERT ON quotes
+            WHEN new.user_id IS NOT NULL
+            BEGIN
+                UPDATE users SET quote_count = quote_count + 1 WHERE id = new.user_id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_user_count_delete AFTER DELETE ON quotes
+            WHEN old.user_id IS NOT NULL
+            BEGIN
+                UPDATE users SET quote_count = quote_count - 1 WHERE id = old.user_id;
+            END
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_user_count_update AFTER UPDATE OF user_id ON quotes
+            WHEN old.user_id IS NOT new.user_id
+            BEGIN
+                UPDATE users SET quote_count = quote_count - 1 WHERE id = old.user_id;
+                UPDATE users SET quote_count = quote_count + 1 WHERE id = new.user_id;
+            END
+            ''',
+        ],
+        'postgresql': [
+            'ALTER TABLE users ADD COLUMN IF NOT EXISTS quote_count BIGINT NOT NULL DEFAULT 0',
+            '''
+            UPDATE users u SET quote_count = c.total
+            FROM (SELECT user_id, COUNT(*) AS total FROM quotes WHERE user_id IS NOT NULL GROUP BY user_id) c
+            WHERE u.id = c.user_id
+            ''',
+            # 与作者计数一样按语句批量更新
+            '''
+            CREATE OR REPLACE FUNCTION quotes_user_count_insert() RETURNS trigger AS $$
+            BEGIN
+                UPDATE users u SET quote_count = u.quote_count + d.delta
+                FROM (SELECT user_id, COUNT(*) AS delta FROM new_rows WHERE user_id IS NOT NULL GROUP BY user_id) d
+                WHERE u.id = d.user_id;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_user_count_delete() RETURNS trigger AS $$
+            BEGIN
+                UPDATE users u SET quote_count = u.quote_count - d.delta
+                FROM (SELECT user_id, COUNT(*) AS delta FROM old_rows WHERE user_id IS NOT NULL GROUP BY user_id) d
+                WHERE u.id = d.user_id;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_user_count_update() RETURNS trigger AS $$
+            BEGIN
+                UPDATE users u SET quote_count = u.quote_count + d.delta
+                FROM (
+                    SELECT user_id, SUM(delta) AS delta FROM (
+                        SELECT user_id, 1 AS delta FROM new_rows
+                        UNION ALL
+                        SELECT user_id, -1 AS delta FROM old_rows
+                    ) changes
+                    WHERE user_id IS NOT NULL
+                    GROUP BY user_id
+                    HAVING SUM(delta) <> 0
+                ) d
+                WHERE u.id = d.user_id;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS trg_quotes_user_count_insert ON quotes',
+            'DROP TRIGGER IF EXISTS trg_quotes_user_count_delete ON quotes',
+            'DROP TRIGGER IF EXISTS trg_quotes_user_count_update ON quotes',
+            '''
+            CREATE TRIGGER trg_quotes_user_count_insert AFTER INSERT ON quotes
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_user_count_insert()
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_user_count_delete AFTER DELETE ON quotes
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_user_count_delete()
+            ''',
+            '''
+            CREATE TRIGGER trg_quotes_user_count_update AFTER UPDATE ON quotes
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION quotes_user_count_update()
+            ''',
+        ],
+    },
+    {
+        'version': 10,
+        'description': 'refresh_tokens 表：刷新令牌的轮换与吊销记录',
+        # 每次刷新都换发新的刷新令牌并吊销旧的（replaced_by 指向新令牌），同一次登录的令牌属于同一个 family；
+        # 已吊销的令牌再次使用说明被盗用，整个 family 一起吊销
+        'sqlite': [
+            '''
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                jti TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users (id),
+                family TEXT NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                revoked_at TIMESTAMP,
+                replaced_by TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens (family)',
+            'CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_id_expires_at ON refresh_tokens (user_id, expires_at)',
+        ],
+        'postgresql': [
+            '''
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                jti TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users (id),
+                family TEXT NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                revoked_at TIMESTAMP,
+                replaced_by TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens (family)',
+            'CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_id_expires_at ON refresh_tokens (user_id, expires_at)',
+        ],
+    },
+    {
+        'version': 11,
+        'description': '短搜索词的二元组索引（SQLite FTS5 unicode61 / PostgreSQL 数组 GIN）',
+        # trigram 只能匹配 3 个字符以上的子串，而中文词大多是两个字。这里按相邻两个字符切分建索引，
+        # 一两个字的词也能按索引查找，候选行再用 LIKE 精确过滤
+        'sqlite': [
+            # 无内容表，只保存索引；单字词用 1 个字符的前缀索引查找
+            '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS quotes_bigram USING fts5(
+                content, author, content='', tokenize='unicode61 remove_diacritics 0', prefix='1'
+            )
+            ''',
+            'INSERT INTO quotes_bigram (rowid, content, author) SELECT id, {}, {} FROM quotes'.format(
+                _bigrams_sql('content'), _bigrams_sql('author')),
+            '''
+            CREATE TRIGGER trg_quotes_bigram_insert AFTER INSERT ON quotes
+            BEGIN
+                INSERT INTO quotes_bigram (rowid, content, author) VALUES (new.id, {}, {});
+            END
+            '''.format(_bigrams_sql('new.content'), _bigrams_sql('new.author')),
+            '''
+            CREATE TRIGGER trg_quotes_bigram_delete AFTER DELETE ON quotes
+            BEGIN
+                INSERT INTO quotes_bigram (quotes_bigram, rowid, content, author)
+                VALUES ('delete', old.id, {}, {});
+            END
+            '''.format(_bigrams_sql('old.content'), _bigrams_sql('old.author')),
+            '''
+            CREATE TRIGGER trg_quotes_bigram_update AFTER UPDATE OF content, author ON quotes
+            BEGIN
+                INSERT INTO quotes_bigram (quotes_bigram, rowid, content, author)
+                VALUES ('delete', old.id, {}, {});
+                INSERT INTO quotes_bigram (rowid, content, author) VALUES (new.id, {}, {});
+            END
+            '''.format(_bigrams_sql('old.content'), _bigrams_sql('old.author'),
+                       _bigrams_sql('new.content'), _bigrams_sql('new.author')),
+        ],
+        # 单字和相邻两字组成的数组上建表达式 GIN 索引，短词用 @> 包含查询
+        'postgresql': [
+            '''
+            CREATE OR REPLACE FUNCTION quote_grams(value TEXT) RETURNS TEXT[] AS $$
+                SELECT ARRAY(
+                    SELECT DISTINCT substr(lower(value), i, n)
+                    FROM generate_series(1, char_length(value)) AS i, generate_series(1, 2) AS n
+                )
+            $$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE
+            ''',
+            '''
+            CREATE INDEX IF NOT EXISTS idx_quotes_grams
+            ON quotes USING gin ((quote_grams(content) || quote_grams(author)))
+            ''',
+        ],
+    },
+    {
+        'version': 12,
+        'description': 'table_stats.updated_at 改为带时区的时间（PostgreSQL）',
+        # TIMESTAMP 列保存的是会话时区的本地时间，而 Last-Modified 按 UTC 输出；
+        # 改为 TIMESTAMPTZ 后读出的时间带时区。已有的值按迁移时的会话时区解释。SQLite 的 CURRENT_TIMESTAMP 本来就是 UTC
+        'sqlite': [],
+        'postgresql': [
+            '''
+            ALTER TABLE table_stats
+            ALTER COLUMN updated_at TYPE TIMESTAMPTZ USING updated_at AT TIME ZONE current_setting('TimeZone')
+            ''',
+        ],
+    },
+    {
+        'version': 13,
+        'description': 'quotes 增加行版本号，内容相关的列被修改时递增',
+        # 全局的修改版本号只说明"有名言被改过"，按 id 缓存的单条名言用行版本号确认改的是不是自己
+        'sqlite': [
+            'ALTER TABLE quotes ADD COLUMN version INTEGER NOT NULL DEFAULT 0',
+            '''
+            CREATE TRIGGER trg_quotes_row_version AFTER UPDATE OF content, author, user_id, created_at ON quotes
+            BEGIN
+                UPDATE quotes SET version = version + 1 WHERE id = new.id;
+            END
+            ''',
+        ],
+        'postgresql': [
+            'ALTER TABLE quotes ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0',
+            '''
+            CREATE OR REPLACE FUNCTION quotes_row_version() RETURNS trigger AS $$
+            BEGIN
+                NEW.version := OLD.version + 1;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS trg_quotes_row_version ON quotes',
+            '''
+            CREATE TRIGGER trg_quotes_row_version BEFORE UPDATE OF content, author, user_id, created_at ON quotes
+            FOR EACH ROW EXECUTE FUNCTION quotes_row_version()
+            ''',
+        ],
+    },
+]
+
+LATEST_VERSION = MIGRATIONS[-1]['version']
+
+SCHEMA_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+# 各数据库的参数占位符
+PLACEHOLDER = {'sqlite': '?', 'postgresql': '%s'}
+
+
+def _execute(conn, dialect, sql, params=()):
+    if dialect == 'postgresql':
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor
+    return conn.execute(sql, params)
+
+
+def current_version(conn, dialect):
+    """当前数据库的 schema 版本，没有 schema_version 表时返回 0"""
+    if dialect == 'postgresql':
+        row = _execute(conn, dialect, "SELECT to_regclass('schema_version')").fetchone()
+        exists = row[0] is not None
+    else:
+        row = _execute(
+            conn, dialect,
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+        ).fetchone()
+        exists = row is not None
+    if not exists:
+        return 0
+    row = _execute(conn, dialect, 'SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, dialect):
+    """执行尚未应用的迁移，返回本次执行的版本号列表（schema 已是最新时返回空列表）"""
+    if dialect not in ('sqlite', 'postgresql'):
+        raise ValueError(f'不支持的数据库类型: {dialect}')
+
+    # 快速路径：版本已是最新，不加锁也不执行 DDL
+    if dialect == 'sqlite' and conn.in_transaction:
+        conn.commit()
+    if current_version(conn, dialect) >= LATEST_VERSION:
+        if dialect == 'postgresql':
+            conn.rollback()
+        return []
+
+    try:
+        if dialect == 'postgresql':
+            _execute(conn, dialect, 'SELECT pg_advisory_xact_lock(%s)', (MIGRATION_LOCK_ID,))
+        else:
+            conn.execute('BEGIN IMMEDIATE')
+        _execute(conn, dialect, SCHEMA_VERSION_TABLE)
+
+        # 拿到锁之后重新确认版本，其他进程可能已经完成迁移
+        version = current_version(conn, dialect)
+        applied = []
+        for migration in MIGRATIONS:
+            if migration['version'] <= version:
+                continue
+            for step in migration[dialect]:
+                if callable(step):
+                    step(conn)
+                else:
+                    _execute(conn, dialect, step)
+            _execute(
+                conn, dialect,
+                'INSERT INTO schema_version (version, description) VALUES ({0}, {0})'.format(PLACEHOLDER[dialect]),
+                (migration['version'], migration['description'])
+            )
+            applied.append(migration['version'])
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
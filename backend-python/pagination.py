@@ -0,0 +1,69 @@
+"""
+游标（keyset）分页
+游标对客户端是不透明的字符串，内容是排序键的 base64 编码，
+下一页用 (排序键) < 游标（或 >，取决于排序方向）的条件直接在索引上定位，不再扫描并丢弃 OFFSET 行。
+默认排序 newest 的游标只包含 [created_at, id]，其他排序在前面加上排序名，换了排序的游标会被拒绝
+"""
+import base64
+import json
+from datetime import datetime
+
+# 支持的排序：排序键（同时是游标内容）、方向、翻页比较符；每种排序都有对应的组合索引
+SORTS = {
+    'newest': {'keys': ('created_at', 'id'), 'direction': 'DESC', 'operator': '<'},
+    'oldest': {'keys': ('created_at', 'id'), 'direction': 'ASC', 'operator': '>'},
+    'author': {'keys': ('author', 'created_at', 'id'), 'direction': 'ASC', 'operator': '>'},
+}
+DEFAULT_SORT = 'newest'
+KEY_TYPES = {'created_at': str, 'author': str, 'id': int}
+
+
+def order_by_clause(sort):
+    """排序对应的 ORDER BY 列表"""
+    spec = SORTS[sort]
+    return ', '.join(f"q.{key} {spec['direction']}" for key in spec['keys'])
+
+
+def keyset_condition(sort, placeholder, casts=None):
+    """翻页条件，例如 (q.created_at, q.id) < (?, ?)；casts 为各列占位符后附加的类型转换"""
+    spec = SORTS[sort]
+    casts = casts or {}
+    columns = ', '.join(f'q.{key}' for key in spec['keys'])
+    values = ', '.join(placeholder + casts.get(key, '') for key in spec['keys'])
+    return f"({columns}) {spec['operator']} ({values})"
+
+
+def encode_cursor(*keys, sort=DEFAULT_SORT):
+    """把排序键编码成游标字符串"""
+    keys = [key.isoformat(sep=' ') if isinstance(key, datetime) else key for key in keys]
+    payload = keys if sort == DEFAULT_SORT else [sort] + keys
+    payload = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort=DEFAULT_SORT):
+    """解析游标字符串，返回排序键元组（newest 为 (created_at, id)）；游标无效或与排序不符时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('无效的分页游标')
+    if not isinstance(payload, list):
+        raise ValueError('无效的分页游标')
+    if sort != DEFAULT_SORT:
+        if not payload or payload[0] != sort:
+            raise ValueError('分页游标与排序方式不一致')
+        payload = payload[1:]
+
+    key_names = SORTS[sort]['keys']
+    if len(payload) != len(key_names):
+        raise ValueError('无效的分页游标')
+    for name, value in zip(key_names, payload):
+        if not isinstance(value, KEY_TYPES[name]) or isinstance(value, bool):
+            raise ValueError('无效的分页游标')
+    return tuple(payload)
+
+
+def cursor_after(row, sort=DEFAULT_SORT):
+    """根据一页的最后一行生成下一页的游标"""
+    return encode_cursor(*(row[key] for key in SORTS[sort]['keys']), sort=sort)
@@ -0,0 +1,329 @@
+"""
+密码哈希的并发限制
+bcrypt 每次哈希/校验要占用 100ms 以上的 CPU。gunicorn sync worker 一次只处理一个请求，
+同时有多个登录时所有 worker 都会卡在 bcrypt 上，读请求全部排队。
+这里把整台机器上同时进行的 bcrypt 运算限制为 slots 个：每个槽位是一个文件锁（flock），
+所有 worker 共用同一组锁文件，进程退出（包括被杀死）时锁由内核自动释放，不会泄漏槽位。
+等待槽位的请求同样要先拿到 queue_size 个排队位置之一（也是文件锁），排队已满时立即抛出 HashPoolBusy，
+排队超过 queue_timeout 秒也抛出 HashPoolBusy，由应用返回 503，其余 worker 继续处理读请求。
+排队的请求同样占着 worker，slots + queue_size 必须小于 worker 数，fit_workers() 在 worker 启动时检查并收紧。
+持有锁的进程把自己的 pid 写在锁文件开头，统计占用时只读这个 pid，不去争抢锁本身。
+bcrypt cost 可配置；登录成功时如果已存哈希的 cost 与配置不同，会用新的 cost 重新哈希。
+命令行 `python password_hashing.py benchmark` 测量各个 cost 在本机上的哈希速度，
+`python password_hashing.py audit` 统计数据库中各个 cost 的账户数
+"""
+import argparse
+import fcntl
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+# 等待槽位时的轮询间隔（秒）
+POLL_INTERVAL = 0.005
+
+# 锁文件开头记录持有者 pid 的字节数
+OWNER_WIDTH = 16
+
+# bcrypt cost 的取值范围与默认值（bcrypt.gensalt() 的默认值）
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+DEFAULT_ROUNDS = 12
+
+
+def hash_rounds(hashed):
+    """从 bcrypt 哈希（$2b$12$...）中取出 cost，格式不对时返回 None"""
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode('utf-8', 'replace')
+    parts = hashed.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class HashPoolBusy(Exception):
+    """在 queue_timeout 内没有等到空闲的哈希槽位"""
+
+
+class PasswordHasher:
+    """跨进程限制并发的 bcrypt 哈希/校验
+
+    - slots: 整台机器同时进行的 bcrypt 运算数上限
+    - queue_size: 整台机器同时等待槽位的请求数上限；等待中的请求也占着 worker，
+      slots + queue_size 应小于 worker 数，给读请求留出 worker
+    - queue_timeout: 等待空闲槽位的最长时间（秒）
+    - lock_dir: 锁文件所在目录，同一台机器上的 worker 必须使用相同的目录
+    - rounds: 生成新哈希时的 bcrypt cost
+    """
+
+    def __init__(self, slots=2, queue_size=1, queue_timeout=2.0, lock_dir=None, rounds=DEFAULT_ROUNDS,
+                 name='quote-bcrypt'):
+        if slots < 1:
+            raise ValueError('slots 必须大于 0')
+        if not MIN_ROUNDS <= rounds <= MAX_ROUNDS:
+            raise ValueError(f'bcrypt cost 必须在 {MIN_ROUNDS} 到 {MAX_ROUNDS} 之间')
+        self.rounds = rounds
+        self.slots = slots
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        lock_dir = lock_dir or tempfile.gettempdir()
+        self._paths = [os.path.join(lock_dir, f'{name}-{i}.lock') for i in range(slots)]
+        self._queue_paths = [os.path.join(lock_dir, f'{name}-queue-{i}.lock') for i in range(queue_size)]
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._counters = {
+            'operations': 0,
+            'rejected': 0,
+            'in_progress': 0,
+            'wait_time_ms': 0.0,
+            'busy_time_ms': 0.0,
+        }
+
+    def fit_workers(self, workers):
+        """把 slots + queue_size 收紧到 worker 数以下（至少留一个 worker 不碰 bcrypt），返回是否做了调整
+
+        先减少排队位置，再减少槽位；只有一个 worker 时保留 1 个槽位、不排队
+        """
+        budget = max(workers - 1, 1)
+        slots = min(self.slots, budget)
+        queue_size = min(self.queue_size, budget - slots)
+        if (slots, queue_size) == (self.slots, self.queue_size):
+            return False
+        self.slots, self.queue_size = slots, queue_size
+        self._paths = self._paths[:slots]
+        self._queue_paths = self._queue_paths[:queue_size]
+        return True
+
+    def _try_lock(self, path):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        os.pwrite(fd, str(os.getpid()).ljust(OWNER_WIDTH).encode('ascii'), 0)
+        return fd
+
+    def _try_any(self, paths):
+        """依次尝试 paths 中的锁，返回第一个拿到的文件描述符，全部被占用时返回 None"""
+        # 从本进程对应的位置开始尝试，减少多个 worker 争抢同一个锁文件
+        offset = os.getpid() % len(paths) if paths else 0
+        for i in range(len(paths)):
+            fd = self._try_lock(paths[(offset + i) % len(paths)])
+            if fd is not None:
+                return fd
+        return None
+
+    def _release(self, fd):
+        os.pwrite(fd, b' ' * OWNER_WIDTH, 0)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _reject(self, message):
+        with self._lock:
+            self._counters['rejected'] += 1
+        raise HashPoolBusy(message)
+
+    def _acquire(self):
+        """取得一个空闲槽位，返回持有锁的文件描述符；排队已满或超时抛出 HashPoolBusy"""
+        started = time.monotonic()
+        fd = self._try_any(self._paths)
+        if fd is None:
+            ticket = self._try_any(self._queue_paths)
+            if ticket is None:
+                self._reject(f'密码哈希排队已满（上限 {self.slots} 个并发，{self.queue_size} 个排队）')
+            try:
+                deadline = started + self.queue_timeout
+                while fd is None:
+                    if time.monotonic() >= deadline:
+                        self._reject(f'等待密码哈希超时（{self.queue_timeout}s，上限 {self.slots} 个并发）')
+                    time.sleep(POLL_INTERVAL)
+                    fd = self._try_any(self._paths)
+            finally:
+                self._release(ticket)
+        with self._lock:
+            self._counters['wait_time_ms'] += (time.monotonic() - started) * 1000
+            self._counters['in_progress'] += 1
+        return fd
+
+    def _run(self, func, *args):
+        fd = self._acquire()
+        started = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            self._release(fd)
+            with self._lock:
+                self._counters['operations'] += 1
+                self._counters['in_progress'] -= 1
+                self._counters['busy_time_ms'] += (time.monotonic() - started) * 1000
+
+    def hash(self, password):
+        """生成密码哈希（字符串）"""
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds))
+        return hashed.decode('utf-8')
+
+    def needs_rehash(self, hashed):
+        """已存哈希的 cost 与当前配置不同（登录成功后应重新哈希）"""
+        return hash_rounds(hashed) != self.rounds
+
+    def verify(self, password, hashed):
+        """校验密码是否与哈希匹配"""
+        if isinstance(hashed, str):
+            hashed = hashed.encode('utf-8')
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed)
+
+    @staticmethod
+    def _owner(path):
+        """锁文件中记录的持有者 pid；没有记录或持有者已退出（被杀死时来不及清除记录）时返回 None"""
+        try:
+            with open(path, 'rb') as f:
+                owner = f.read(OWNER_WIDTH).strip()
+        except FileNotFoundError:
+            return None
+        if not owner.isdigit():
+            return None
+        pid = int(owner)
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return None
+        except PermissionError:
+            pass
+        return pid
+
+    def _count_held(self, paths):
+        # 只读记录不加锁：统计时去抢锁会让同一时刻的哈希请求误以为槽位被占用
+        return sum(1 for path in paths if self._owner(path) is not None)
+
+    def slots_in_use(self):
+        """整台机器上正在使用的槽位数（读取各个锁文件记录的持有者）"""
+        return self._count_held(self._paths)
+
+    def queued(self):
+        """整台机器上正在等待槽位的请求数"""
+        return self._count_held(self._queue_paths)
+
+    def stats(self):
+        """本进程的哈希统计，以及整台机器当前的槽位占用"""
+        with self._lock:
+            stats = dict(self._counters)
+        elapsed_ms = (time.monotonic() - self._started) * 1000
+        stats['wait_time_ms'] = round(stats['wait_time_ms'], 2)
+        stats['busy_time_ms'] = round(stats['busy_time_ms'], 2)
+        stats['rounds'] = self.rounds
+        stats['slots'] = self.slots
+        stats['slots_in_use'] = self.slots_in_use()
+        stats['queue_size'] = self.queue_size
+        stats['queued'] = self.queued()
+        # 本进程占用槽位的时间占全部槽位时间的比例
+        stats['utilization'] = round(stats['busy_time_ms'] / (elapsed_ms * self.slots), 4) if elapsed_ms else 0.0
+        return stats
+
+
+def _time_hashes(rounds, samples):
+    """在当前进程中连续哈希 samples 次，返回每次的耗时（秒）"""
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b'benchmark-password', bcrypt.gensalt(rounds))
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def benchmark(rounds_list, samples=10, processes=None):
+    """测量每个 cost 的哈希速度
+
+    单核速度在当前进程中顺序测量；整机速度用 processes 个进程（默认 CPU 核数）同时哈希。
+    返回 [{rounds, mean_ms, p99_ms, per_core_per_sec, processes, total_per_sec}]。
+    """
+    processes = processes or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # 先启动全部进程，进程启动时间不计入测量
+        list(executor.map(_time_hashes, [MIN_ROUNDS] * processes, [1] * processes))
+        for rounds in rounds_list:
+            durations = sorted(_time_hashes(rounds, samples))
+            mean = sum(durations) / len(durations)
+            started = time.perf_counter()
+            list(executor.map(_time_hashes, [rounds] * processes, [samples] * processes))
+            elapsed = time.perf_counter() - started
+            results.append({
+                'rounds': rounds,
+                'mean_ms': round(mean * 1000, 2),
+                'p99_ms': round(durations[min(len(durations) - 1, int(len(durations) * 0.99))] * 1000, 2),
+                'per_core_per_sec': round(1 / mean, 2),
+                'processes': processes,
+                'total_per_sec': round(processes * samples / elapsed, 2),
+            })
+    return results
+
+
+def audit(conn):
+    """按 cost 统计账户数，返回 {cost: 账户数}（无法解析的哈希记为 None）"""
+    counts = {}
+    cursor = conn.cursor()
+    cursor.execute('SELECT password FROM users')
+    while True:
+        rows = cursor.fetchmany(1000)
+        if not rows:
+            break
+        for (hashed,) in rows:
+            rounds = hash_rounds(hashed)
+            counts[rounds] = counts.get(rounds, 0) + 1
+    return counts
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description='bcrypt cost 基准测试与账户统计')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench = subparsers.add_parser('benchmark', help='测量各个 cost 的哈希速度')
+    bench.add_argument('--rounds', type=int, nargs='+', default=[10, 11, 12, 13, 14])
+    bench.add_argument('--samples', type=int, default=10, help='每个进程每个 cost 的哈希次数')
+    bench.add_argument('--processes', type=int, default=None, help='整机测试的进程数（默认 CPU 核数）')
+    bench.add_argument('--budget-ms', type=float, default=None, help='单次哈希的 p99 预算，给出满足预算的最高 cost')
+    subparsers.add_parser('audit', help='统计数据库中各个 cost 的账户数')
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    configured = int(os.getenv('BCRYPT_ROUNDS', DEFAULT_ROUNDS))
+
+    if args.command == 'benchmark':
+        for rounds in args.rounds:
+            if not MIN_ROUNDS <= rounds <= MAX_ROUNDS:
+                parser.error(f'cost 必须在 {MIN_ROUNDS} 到 {MAX_ROUNDS} 之间')
+        results = benchmark(args.rounds, args.samples, args.processes)
+        print(f"{'cost':>4} {'平均(ms)':>10} {'p99(ms)':>10} {'单核(次/秒)':>12} {'整机(次/秒)':>12}")
+        for row in results:
+            print(f"{row['rounds']:>4} {row['mean_ms']:>10} {row['p99_ms']:>10} "
+                  f"{row['per_core_per_sec']:>12} {row['total_per_sec']:>12}")
+        print(f"整机测试使用 {results[0]['processes']} 个进程，当前配置 BCRYPT_ROUNDS={configured}")
+        if args.budget_ms is not None:
+            within = [row['rounds'] for row in results if row['p99_ms'] <= args.budget_ms]
+            if within:
+                print(f'满足 p99 ≤ {args.budget_ms}ms 的最高 cost: {max(within)}')
+            else:
+                print(f'没有满足 p99 ≤ {args.budget_ms}ms 的 cost')
+        return 0
+
+    from bulk_import import connect_from_env
+    conn, _ = connect_from_env()
+    try:
+        counts = audit(conn)
+    finally:
+        conn.close()
+    for rounds in sorted(counts, key=lambda value: (value is None, value or 0)):
+        label = '无法解析' if rounds is None else f'cost {rounds}'
+        note = '' if rounds == configured else '（下次登录时重新哈希）'
+        print(f'{label}: {counts[rounds]} 个账户{note}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
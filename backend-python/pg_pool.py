@@ -0,0 +1,177 @@
+"""
+PostgreSQL 连接池
+每个 gunicorn worker 在 fork 之后各自创建一个连接池，复用连接，避免每次查询都重新握手
+"""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """在 checkout 超时时间内没有拿到可用连接"""
+
+
+class PostgresPool:
+    """线程安全的连接池
+
+    - min_size/max_size: 常驻连接数与连接数上限
+    - max_lifetime: 连接最长存活时间（秒），超过后归还时关闭并重建
+    - checkout_timeout: 连接池耗尽时最长等待时间（秒），超时抛出 PoolTimeout
+    - health_check_idle: 连接空闲超过该秒数时，checkout 前先执行 SELECT 1 检查（0 表示每次都检查）
+    """
+
+    def __init__(self, connect, min_size=1, max_size=5, max_lifetime=1800,
+                 checkout_timeout=5.0, health_check_idle=30):
+        if max_size < 1:
+            raise ValueError('max_size 必须大于 0')
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_idle = health_check_idle
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._in_use = {}     # id(conn) -> created_at
+        self._size = 0
+        self._closed = False
+        self._counters = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'failed_health_checks': 0,
+            'wait_time_ms': 0.0,
+        }
+
+        for _ in range(self.min_size):
+            conn = self._connect()
+            now = time.monotonic()
+            self._idle.append((conn, now, now))
+            self._size += 1
+            self._counters['created'] += 1
+
+    def getconn(self):
+        """取出一个可用连接，连接池耗尽时最多等待 checkout_timeout 秒"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout('连接池已关闭')
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'等待数据库连接超时（{self.checkout_timeout}s，上限 {self.max_size} 个连接）'
+                        )
+                    self._cond.wait(remaining)
+                if self._idle:
+                    # LIFO：优先复用最近归还的连接，让多余的连接自然空闲
+                    conn, created_at, last_used = self._idle.pop()
+                else:
+                    conn, created_at, last_used = None, None, None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._discard(None)
+                    raise
+                created_at = time.monotonic()
+                with self._cond:
+                    self._counters['created'] += 1
+            elif not self._is_usable(conn, created_at, last_used):
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._in_use[id(conn)] = created_at
+                self._counters['checkouts'] += 1
+                self._counters['wait_time_ms'] += (time.monotonic() - started) * 1000
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """归还连接；未结束的事务会被回滚，过期或已损坏的连接直接关闭"""
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+        if created_at is None:
+            # 不是从本连接池取出的连接
+            return
+
+        if not discard and not conn.closed:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        if discard or conn.closed or self._closed or now - created_at > self.max_lifetime:
+            if not discard and not conn.closed and not self._closed:
+                with self._cond:
+                    self._counters['recycled'] += 1
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, now))
+            self._cond.notify()
+
+    def closeall(self):
+        """关闭所有空闲连接，正在使用的连接会在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """连接池状态，用于 /health/detailed"""
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'max_lifetime': self.max_lifetime,
+                'checkout_timeout': self.checkout_timeout,
+            })
+        stats['wait_time_ms'] = round(stats['wait_time_ms'], 3)
+        return stats
+
+    def _is_usable(self, conn, created_at, last_used):
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if now - created_at > self.max_lifetime:
+            with self._cond:
+                self._counters['recycled'] += 1
+            return False
+        if now - last_used >= self.health_check_idle:
+            try:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+                cursor.close()
+                conn.rollback()
+            except Exception:
+                with self._cond:
+                    self._counters['failed_health_checks'] += 1
+                return False
+        return True
+
+    def _discard(self, conn):
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
@@ -0,0 +1,61 @@
+"""
+名言导出
+把数据库游标逐行产出的记录编码为 NDJSON 或 CSV 文本块，可选 gzip 压缩。
+全程只持有一个输出缓冲区，内存占用与导出的行数无关
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_FIELDS = ('id', 'content', 'author', 'user_id', 'added_by', 'created_at')
+# 输出缓冲区攒到这个大小再交给 WSGI 服务器，避免每行一次 write
+CHUNK_SIZE = 64 * 1024
+
+
+def _plain(value):
+    """datetime（PostgreSQL）统一转成 ISO 字符串，与 SQLite 的文本时间格式一致"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def encode_rows(rows, fmt, chunk_size=CHUNK_SIZE):
+    """把记录迭代器编码为文本块迭代器"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}，只支持 {', '.join(EXPORT_FORMATS)}")
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+
+    for row in rows:
+        values = [_plain(row[field]) for field in EXPORT_FIELDS]
+        if writer is not None:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False))
+            buffer.write('\n')
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks):
+    """流式 gzip 压缩文本块"""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip 头部和校验
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,77 @@
+"""
+随机名言抽样
+在内存中保存全部名言 id 的紧凑数组（array('q')，每个 id 8 字节），抽样只需在数组下标上取随机数，
+不需要 ORDER BY RANDOM() 全表排序，id 有空洞（删除过数据）也保持均匀。
+数组随数据版本号刷新：只有新增时增量读取更大的 id，发生删除时整体重新加载
+"""
+import random
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class IdSampler:
+    """按数据版本号维护的 id 数组，线程安全
+
+    load_ids(after_id=0, author=None) 由调用方提供，返回按 id 升序的 id 列表。
+    """
+
+    def __init__(self, max_filtered=64):
+        self.max_filtered = max_filtered
+        self._ids = array('q')
+        self._version = None
+        # 按作者过滤的 id 数组：author -> (数据版本号, 数组)，LRU 淘汰
+        self._filtered = OrderedDict()
+        self._lock = threading.Lock()
+        self.full_reloads = 0
+        self.incremental_refreshes = 0
+
+    def _refresh_all(self, version, row_count, load_ids):
+        if self._version is not None and row_count >= len(self._ids):
+            max_id = self._ids[-1] if self._ids else 0
+            new_ids = load_ids(after_id=max_id)
+            # 数量对得上说明期间只有新增（任何删除都会让总数少于旧数组加新 id）
+            if len(self._ids) + len(new_ids) == row_count:
+                self._ids = self._ids + array('q', new_ids)
+                self.incremental_refreshes += 1
+                return
+        self._ids = array('q', load_ids())
+        self.full_reloads += 1
+
+    def ids(self, version, row_count, load_ids, author=None):
+        """返回当前数据版本下的 id 数组（数组创建后不再修改，可以在锁外读取）"""
+        with self._lock:
+            if author is None:
+                if version != self._version:
+                    self._refresh_all(version, row_count, load_ids)
+                    self._version = version
+                return self._ids
+
+            entry = self._filtered.get(author)
+            if entry is None or entry[0] != version:
+                entry = (version, array('q', load_ids(author=author)))
+                self._filtered[author] = entry
+                while len(self._filtered) > self.max_filtered:
+                    self._filtered.popitem(last=False)
+            self._filtered.move_to_end(author)
+            return entry[1]
+
+    def sample(self, version, row_count, load_ids, n=1, author=None, rng=random):
+        """均匀抽取 n 个不重复的 id（不足 n 个时全部返回，顺序随机）"""
+        ids = self.ids(version, row_count, load_ids, author)
+        picks = rng.sample(range(len(ids)), min(n, len(ids)))
+        return [ids[i] for i in picks]
+
+    def clear(self):
+        with self._lock:
+            self._ids = array('q')
+            self._version = None
+            self._filtered.clear()
+
+    def stats(self):
+        return {
+            'ids': len(self._ids),
+            'filtered_sets': len(self._filtered),
+            'full_reloads': self.full_reloads,
+            'incremental_refreshes': self.incremental_refreshes,
+        }
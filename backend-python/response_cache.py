@@ -0,0 +1,178 @@
+"""
+响应缓存
+缓存序列化好的响应字节，分两级：进程内 LRU，以及可选的多 worker 共享 Redis。
+缓存键带上数据版本号（由数据库触发器在每次写入时递增），写入提交后旧版本的缓存自然失效
+"""
+import threading
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # 共享缓存是可选功能
+    redis = None
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存，按条目数限制大小"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            return count
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class RedisTier:
+    """多 worker 共享的缓存层（任何兼容 Redis 协议的存储），出错时当作未命中处理"""
+
+    def __init__(self, url, prefix='quote-api:response:', ttl=300):
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key):
+        try:
+            value = self._client.get(self.prefix + key)
+        except redis.RedisError:
+            self.errors += 1
+            return None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            self._client.set(self.prefix + key, value, ex=self.ttl)
+        except redis.RedisError:
+            self.errors += 1
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'errors': self.errors, 'ttl': self.ttl}
+
+
+class ResponseCache:
+    """两级响应缓存
+
+    get/set 都需要传入当前数据版本；发现更新的版本时清空本进程的 LRU，
+    共享层的旧版本条目因为键不同不会再被读到，等待 TTL 过期即可。
+    """
+
+    def __init__(self, max_entries=256, redis_url=None, redis_ttl=300):
+        self.local = LRUCache(max_entries)
+        self.shared = None
+        if redis_url:
+            if redis is None:
+                print("⚠️ 已配置 RESPONSE_CACHE_REDIS_URL，但未安装 redis 包，共享缓存未启用")
+            else:
+                self.shared = RedisTier(redis_url, ttl=redis_ttl)
+        self._version = None
+        self._lock = threading.Lock()
+        self.invalidations = 0
+        self.stale = 0
+
+    @property
+    def enabled(self):
+        return self.local.max_entries > 0 or self.shared is not None
+
+    def _key(self, version, key):
+        return f'{version}|{key}'
+
+    def _check_version(self, version):
+        """版本更新时清空本地 LRU 并前移版本号，返回 version 是否为当前版本
+
+        只会前移：读到旧快照的请求（例如另一个 worker 的写入刚提交、本请求的查询早于它）
+        带来的是更小的版本号，这时只当作未命中，不清空也不回退，避免新旧请求交替时反复清空
+        """
+        if self._version is None or version > self._version:
+            with self._lock:
+                if self._version is None or version > self._version:
+                    if self.local.clear():
+                        self.invalidations += 1
+                    self._version = version
+        current = self._version
+        if current is not None and version < current:
+            with self._lock:
+                self.stale += 1
+            return False
+        return True
+
+    def get(self, version, key):
+        """读取缓存，未命中或 version 比当前版本旧时返回 None"""
+        if not self.enabled or not self._check_version(version):
+            return None
+        full_key = self._key(version, key)
+        value = self.local.get(full_key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(full_key)
+            if value is not None:
+                self.local.set(full_key, value)
+        return value
+
+    def set(self, version, key, value):
+        """写入缓存，version 比当前版本旧时不写入"""
+        if not self.enabled or not self._check_version(version):
+            return
+        full_key = self._key(version, key)
+        self.local.set(full_key, value)
+        if self.shared is not None:
+            self.shared.set(full_key, value)
+
+    def clear(self):
+        self.local.clear()
+        self._version = None
+
+    def stats(self):
+        stats = {'local': self.local.stats(), 'invalidations': self.invalidations, 'stale': self.stale}
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
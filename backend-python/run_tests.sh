@@ -79,6 +79,7 @@ run_security_tests() {
 run_performance_tests() {
     echo -e "${BLUE}运行性能测试...${NC}"
     python3 -m pytest tests/test_performance.py -v
+    python3 -m pytest -v -m performance --ignore=tests/test_performance.py
 }
 
 # 运行覆盖率测试
@@ -0,0 +1,102 @@
+"""
+名言搜索辅助函数
+解析搜索词、构造 FTS5 查询表达式和 LIKE 模式，以及生成高亮摘要。
+一两个字的短词不走 trigram 索引，改用按相邻两个字符切分的二元组索引查找候选行，再用 LIKE 精确过滤。
+摘要在 Python 中生成并做 HTML 转义，两种数据库返回的格式一致，前端可以直接当 HTML 渲染
+"""
+import html
+import re
+
+# trigram 分词器只能匹配不少于 3 个字符的子串，更短的词只能逐行比较
+MIN_INDEXED_TERM_LENGTH = 3
+MAX_TERMS = 8
+MAX_QUERY_LENGTH = 100
+
+
+def parse_terms(q):
+    """按空白切分搜索词，去重并保持顺序；查询为空时返回空列表"""
+    terms = []
+    for term in (q or '').strip()[:MAX_QUERY_LENGTH].split():
+        if term.lower() not in (t.lower() for t in terms):
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def split_indexed_terms(terms):
+    """把搜索词分成可以走全文索引的长词和只能逐行比较的短词"""
+    indexed = [t for t in terms if len(t) >= MIN_INDEXED_TERM_LENGTH]
+    short = [t for t in terms if len(t) < MIN_INDEXED_TERM_LENGTH]
+    return indexed, short
+
+
+def split_bigram_terms(terms):
+    """把短词分成可以走二元组索引的词和不含文字字符（只有标点、符号）的词
+
+    SQLite 的二元组表用 unicode61 分词，标点会被当作分隔符丢掉，只由标点组成的词无法按索引查找
+    """
+    bigram = [t for t in terms if any(ch.isalnum() for ch in t)]
+    unindexed = [t for t in terms if not any(ch.isalnum() for ch in t)]
+    return bigram, unindexed
+
+
+def needs_gram_index(term):
+    """PostgreSQL 的 pg_trgm 只从连续 3 个以上的文字字符中提取 trigram，其余的词改用二元组数组索引"""
+    return re.search(r'[^\W_]{3}', term) is None
+
+
+def term_grams(term):
+    """词包含的相邻两字（单字词为这个字本身），小写，与 PostgreSQL 的 quote_grams() 对应"""
+    term = term.lower()
+    if len(term) == 1:
+        return [term]
+    return sorted({term[i:i + 2] for i in range(len(term) - 1)})
+
+
+def bigram_match_expression(terms):
+    """构造二元组表的 MATCH 表达式：两个字的词按整个词查找，单字词按前缀查找，词之间为 AND"""
+    parts = []
+    for term in terms:
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        parts.append(phrase + '*' if len(term) == 1 else phrase)
+    return ' '.join(parts)
+
+
+def fts_match_expression(terms):
+    """构造 FTS5 MATCH 表达式：每个词作为短语加引号（避免用户输入被当成查询语法），词之间为 AND"""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def like_pattern(term):
+    """构造子串匹配的 LIKE 模式，转义通配符（配合 ESCAPE '\\' 使用）"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def make_snippet(text, terms, width=40, mark=('<mark>', '</mark>')):
+    """截取第一个匹配附近的文字，并用 <mark> 标出所有匹配；其余文字做 HTML 转义"""
+    if not text:
+        return ''
+    pattern = re.compile('|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE) \
+        if terms else None
+    first = pattern.search(text) if pattern else None
+
+    start = 0
+    if first is not None and len(text) > width:
+        start = max(0, min(first.start() - width // 4, len(text) - width))
+    end = min(len(text), start + width)
+    window = text[start:end]
+
+    parts, pos = [], 0
+    if pattern is not None:
+        for match in pattern.finditer(window):
+            parts.append(html.escape(window[pos:match.start()]))
+            parts.append(mark[0] + html.escape(match.group()) + mark[1])
+            pos = match.end()
+    parts.append(html.escape(window[pos:]))
+
+    snippet = ''.join(parts)
+    if start > 0:
+        snippet = '…' + snippet
+    if end < len(text):
+        snippet += '…'
+    return snippet
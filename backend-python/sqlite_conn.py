@@ -0,0 +1,182 @@
+"""
+SQLite 持久连接管理
+每个线程（每个 gunicorn worker）对每个数据库文件只打开一次连接，并按配置档设置 PRAGMA：
+WAL 模式下读写互不阻塞，busy_timeout 让写入者排队等待而不是直接报 database is locked
+"""
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+
+# PRAGMA 配置档，可通过 SQLITE_PROFILE 选择
+PROFILES = {
+    # 单机部署默认配置：WAL + NORMAL，断电最多丢失最后几个事务，不会损坏数据库
+    'default': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000,  # 负数表示 KiB，约 16MB
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+    # 每次提交都 fsync
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+    # 小内存机器
+    'low_memory': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 0,
+        'cache_size': -2000,
+        'busy_timeout': 5000,
+        'temp_store': 'DEFAULT',
+    },
+}
+
+# 按顺序设置：journal_mode 需要最先设置
+PRAGMA_ORDER = ['journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'busy_timeout', 'temp_store']
+
+
+def parse_pragma_overrides(value):
+    """解析 "cache_size=-32000,mmap_size=0" 形式的 PRAGMA 覆盖配置"""
+    overrides = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, _, setting = item.partition('=')
+        name = name.strip().lower()
+        if name not in PRAGMA_ORDER or not setting.strip():
+            raise ValueError(f'不支持的 SQLite PRAGMA 配置: {item}')
+        overrides[name] = setting.strip()
+    return overrides
+
+
+class ManagedConnection(sqlite3.Connection):
+    """由连接管理器持有的连接（子类化以支持弱引用和附加属性）"""
+
+
+class SQLiteConnectionManager:
+    """每个线程、每个数据库文件一个持久连接
+
+    - profile: PROFILES 中的配置档名称
+    - overrides: 覆盖配置档中的单项 PRAGMA
+    - checkpoint_interval: 距上次 wal_checkpoint 超过该秒数时，在归还连接时执行一次（0 表示不主动执行）
+    """
+
+    def __init__(self, profile='default', overrides=None, checkpoint_interval=300,
+                 checkpoint_mode='PASSIVE'):
+        if profile not in PROFILES:
+            raise ValueError(f'未知的 SQLite 配置档: {profile}')
+        self.profile = profile
+        self.pragmas = dict(PROFILES[profile])
+        self.pragmas.update(overrides or {})
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_mode = checkpoint_mode
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = weakref.WeakSet()
+        self._inherited = []           # fork 前打开的连接，子进程中不能使用也不能关闭
+        self._last_checkpoint = {}     # path -> monotonic 时间
+        self._counters = {'opened': 0, 'checkpoints': 0, 'checkpoint_errors': 0}
+
+    def acquire(self, db_path):
+        """获取当前线程对应数据库文件的连接，不存在时创建"""
+        connections = self._thread_connections()
+        conn = connections.get(db_path)
+        if conn is None:
+            conn = self._open(db_path)
+            connections[db_path] = conn
+        return conn
+
+    def release(self, conn):
+        """请求结束后归还连接：持久连接保持打开，必要时做一次 WAL checkpoint"""
+        if not isinstance(conn, ManagedConnection):
+            # 不是由管理器创建的连接（例如测试中替换的连接），直接关闭
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        if self.checkpoint_interval > 0:
+            self._maybe_checkpoint(conn)
+
+    def checkpoint(self, conn):
+        """执行一次 wal_checkpoint"""
+        try:
+            conn.execute(f'PRAGMA wal_checkpoint({self.checkpoint_mode})').fetchone()
+            with self._lock:
+                self._counters['checkpoints'] += 1
+        except sqlite3.Error as e:
+            with self._lock:
+                self._counters['checkpoint_errors'] += 1
+            print(f"SQLite wal_checkpoint 失败: {e}")
+
+    def close_all(self):
+        """关闭本进程中所有由管理器打开的连接"""
+        pid = os.getpid()
+        with self._lock:
+            connections = [conn for conn in self._connections if conn.pid == pid]
+            self._connections = weakref.WeakSet()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def stats(self):
+        """连接管理器状态，用于 /health/detailed"""
+        pid = os.getpid()
+        with self._lock:
+            stats = dict(self._counters)
+            stats['open'] = sum(1 for conn in self._connections if conn.pid == pid)
+        stats['profile'] = self.profile
+        stats['pragmas'] = dict(self.pragmas)
+        return stats
+
+    def _thread_connections(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            if getattr(self._local, 'connections', None):
+                # fork 之后继承来的连接：保留引用，避免析构时在子进程里关闭父进程的连接
+                self._inherited.extend(self._local.connections.values())
+            self._local.pid = pid
+            self._local.connections = {}
+        return self._local.connections
+
+    def _open(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+            print(f"📁 创建数据库目录: {db_dir}")
+
+        conn = sqlite3.connect(db_path, factory=ManagedConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name in PRAGMA_ORDER:
+            if name in self.pragmas:
+                conn.execute(f'PRAGMA {name} = {self.pragmas[name]}').fetchall()
+        conn.path = db_path
+        conn.pid = os.getpid()
+
+        with self._lock:
+            self._connections.add(conn)
+            self._counters['opened'] += 1
+            self._last_checkpoint.setdefault(db_path, time.monotonic())
+        return conn
+
+    def _maybe_checkpoint(self, conn):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_checkpoint.get(conn.path, now)
+            if now - last < self.checkpoint_interval:
+                return
+            self._last_checkpoint[conn.path] = now
+        self.checkpoint(conn)
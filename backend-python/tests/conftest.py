@@ -1,10 +1,23 @@
+import json
 import os
+import sqlite3
 import tempfile
 import pytest
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app import app, get_db_connection
-from database import init_database, seed_quotes
+import app as app_module
+from app import app
+from migrations import migrate
+from password_hashing import PasswordHasher
+
+# 测试在同一个进程中用线程模拟并发请求，不经过 gunicorn，没有 worker 数的限制；
+# 排队位置放宽到能容纳并发测试的线程数，限流行为由 test_password_hashing 单独测试
+app_module.password_hasher = PasswordHasher(
+    slots=app_module.password_hasher.slots,
+    queue_size=8,
+    queue_timeout=app_module.password_hasher.queue_timeout,
+    rounds=app_module.password_hasher.rounds
+)
 
 @pytest.fixture
 def client():
@@ -24,13 +37,63 @@ def client():
             init_test_db()
         yield client
     
-    # 清理临时数据库
+    # 关闭应用持有的持久连接，再清理临时数据库（包括 WAL 文件）
+    app_module.close_db_connections()
+    app_module.reset_caches()
     os.close(db_fd)
-    os.unlink(app.config['DATABASE'])
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(app.config['DATABASE'] + suffix):
+            os.unlink(app.config['DATABASE'] + suffix)
+
+@pytest.fixture
+def query(client):
+    """在测试数据库上执行 SQL，提交后返回所有行"""
+    def run(sql, params=()):
+        conn = sqlite3.connect(app.config['DATABASE'])
+        rows = conn.execute(sql, params).fetchall()
+        conn.commit()
+        conn.close()
+        return rows
+    return run
+
+@pytest.fixture
+def db_conn(client):
+    """测试数据库的 sqlite 连接，供需要 DB-API 连接的函数使用，测试结束后关闭"""
+    conn = sqlite3.connect(app.config['DATABASE'])
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def insert_quotes(client):
+    """向测试数据库批量插入名言，rows 的每一项依次对应 columns 中的列"""
+    def run(rows, columns=('content', 'author')):
+        conn = sqlite3.connect(app.config['DATABASE'])
+        conn.executemany(
+            f"INSERT INTO quotes ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows
+        )
+        conn.commit()
+        conn.close()
+    return run
+
+@pytest.fixture
+def login(client):
+    """注册并登录用户，返回登录响应（包含 token 和 refresh_token）"""
+    def run(username='testuser', password='testpass123'):
+        client.post('/api/auth/register', json={'username': username, 'password': password})
+        response = client.post('/api/auth/login', json={'username': username, 'password': password})
+        assert response.status_code == 200
+        return json.loads(response.data)
+    return run
+
+@pytest.fixture
+def auth_headers(login):
+    """注册并登录用户，返回带访问令牌的请求头"""
+    def run(username='testuser'):
+        return {'Authorization': f"Bearer {login(username)['token']}"}
+    return run
 
 def init_test_db():
     """初始化测试数据库"""
-    import sqlite3
     conn = sqlite3.connect(app.config['DATABASE'])
     cursor = conn.cursor()
     
@@ -56,6 +119,9 @@ def init_test_db():
         )
     ''')
     
+    # 执行迁移（索引等）
+    migrate(conn, 'sqlite')
+    
     # 插入测试数据
     test_quotes = [
         ("测试名言1", "测试作者1"),
@@ -71,18 +137,3 @@ def init_test_db():
     
     conn.commit()
     conn.close()
-
-# 修改 app.py 中的 get_db_connection 函数来支持测试
-def get_test_db_connection():
-    """获取测试数据库连接"""
-    import sqlite3
-    if hasattr(app, 'config') and 'DATABASE' in app.config:
-        conn = sqlite3.connect(app.config['DATABASE'])
-    else:
-        conn = sqlite3.connect('./db/quote.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-# 在测试期间替换数据库连接函数
-import app as app_module
-app_module.get_db_connection = get_test_db_connection
@@ -57,6 +57,44 @@ class TestAPI:
         data = json.loads(response.data)
         assert data['message'] == '用户已存在'
     
+    def test_register_single_insert(self, client):
+        """测试注册只执行一条 INSERT ... RETURNING，不先查询也不回查"""
+        import app as app_module
+        from unittest.mock import patch
+        original = app_module.execute_query
+        calls = []
+
+        def recording_execute(query, *args, **kwargs):
+            calls.append(query)
+            return original(query, *args, **kwargs)
+
+        with patch('app.execute_query', recording_execute):
+            response = client.post('/api/auth/register',
+                                   json={'username': 'testuser', 'password': 'testpass123'})
+        assert response.status_code == 201
+        assert len(calls) == 1
+        assert 'RETURNING id' in calls[0]
+
+    def test_register_concurrent_same_username(self, client):
+        """测试并发注册同一个用户名时只有一个成功，其余返回用户已存在"""
+        import threading
+        results = []
+
+        def register():
+            with app.test_client() as thread_client:
+                response = thread_client.post('/api/auth/register',
+                                              json={'username': 'racer', 'password': 'testpass123'})
+                results.append((response.status_code, json.loads(response.data)['message']))
+
+        threads = [threading.Thread(target=register) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(status for status, _ in results) == [201, 400, 400, 400]
+        assert all(message == '用户已存在' for status, message in results if status == 400)
+
     def test_login_success(self, client):
         """测试用户登录成功"""
         # 先注册用户
@@ -157,6 +195,14 @@ class TestAPI:
         assert data['message'] == '添加成功'
         assert data['content'] == '测试名言内容'
         assert data['author'] == '测试作者'
+        assert isinstance(data['id'], int)
+        assert data['created_at']
+        
+        # 返回的 id 可以直接读取这条名言
+        detail = json.loads(client.get(f"/api/quotes/{data['id']}").data)
+        assert detail['content'] == '测试名言内容'
+        assert detail['created_at'] == data['created_at']
+        assert detail['added_by'] == 'testuser'
     
     def test_add_quote_unauthorized(self, client):
         """测试未授权添加名言"""
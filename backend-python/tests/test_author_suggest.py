@@ -0,0 +1,214 @@
+"""
+作者联想测试
+"""
+import json
+import random
+import string
+import time
+import pytest
+import app as app_module
+from author_index import AuthorIndex
+
+
+class FakeSource:
+    """模拟作者数据源，记录加载次数"""
+
+    def __init__(self, authors):
+        self.authors = list(authors)
+        self.new_rows = []
+        self.full_loads = 0
+
+    def load_authors(self):
+        self.full_loads += 1
+        return list(self.authors), 100
+
+    def load_new_authors(self, after_id):
+        return list(self.new_rows)
+
+    def total(self):
+        return sum(count for _, _, count in self.authors)
+
+
+class TestAuthorIndex:
+    """前缀索引测试类"""
+
+    def make(self, scan_limit=2000):
+        source = FakeSource([(1, 'Albert Camus', 5), (2, 'alan turing', 9), (3, 'Ada Lovelace', 9),
+                             (4, 'Bob', 1), (5, '鲁迅', 7), (6, '鲁迅之弟', 2)])
+        return AuthorIndex(scan_limit=scan_limit), source
+
+    def suggest(self, index, source, prefix, version=1, mutation_version=0, limit=10):
+        return index.suggest(version, mutation_version, source.total(), source.load_authors,
+                             source.load_new_authors, prefix, limit)
+
+    def test_prefix_ranked_by_count(self):
+        """测试不区分大小写的前缀匹配，名言数多的在前，相同时按名字"""
+        index, source = self.make()
+        names = [name for _, name, _ in self.suggest(index, source, 'A')]
+        assert names == ['Ada Lovelace', 'alan turing', 'Albert Camus']
+        assert [name for _, name, _ in self.suggest(index, source, 'al')] == ['alan turing', 'Albert Camus']
+        assert [name for _, name, _ in self.suggest(index, source, '鲁')] == ['鲁迅', '鲁迅之弟']
+        assert self.suggest(index, source, 'x') == []
+
+    def test_wide_prefix_matches_narrow_path(self):
+        """测试匹配区间超过 scan_limit 时沿名言数顺序查找，结果与区间内选取一致"""
+        narrow, source = self.make()
+        wide = AuthorIndex(scan_limit=1)
+        for prefix in ('', 'a', 'al', '鲁'):
+            for limit in (1, 2, 10):
+                assert (self.suggest(wide, source, prefix, limit=limit)
+                        == self.suggest(narrow, source, prefix, limit=limit))
+
+    def test_incremental_refresh(self):
+        """测试只有新增时增量更新计数和新作者，不整体重新加载"""
+        index, source = self.make(scan_limit=1)
+        self.suggest(index, source, 'a')
+        source.new_rows = [(4, 'Bob', 20, 101), (7, 'Alice', 3, 102)]
+        source.authors[3] = (4, 'Bob', 21)
+        source.authors.append((7, 'Alice', 3))
+        assert self.suggest(index, source, '', version=2, limit=2) == [(4, 'Bob', 21), (3, 'Ada Lovelace', 9)]
+        assert (7, 'Alice', 3) in self.suggest(index, source, 'ali', version=2)
+        assert source.full_loads == 1
+        assert index.stats()['incremental_refreshes'] == 1
+
+    def test_reload_on_mutation(self):
+        """测试修改或删除后整体重新加载"""
+        index, source = self.make()
+        self.suggest(index, source, 'a')
+        source.authors = [author for author in source.authors if author[0] != 3]
+        names = [name for _, name, _ in self.suggest(index, source, 'a', version=2, mutation_version=1)]
+        assert 'Ada Lovelace' not in names
+        assert source.full_loads == 2
+
+    def test_reload_when_total_mismatch(self):
+        """测试增量结果与总数对不上（有名言晚于更大的 id 提交）时整体重新加载"""
+        index, source = self.make()
+        self.suggest(index, source, 'a')
+        source.authors.append((8, 'Anna', 1))
+        self.suggest(index, source, 'a', version=2)
+        assert source.full_loads == 2
+
+    def large_index(self):
+        """10 万位作者的索引，以及 2000 个随机前缀"""
+        rng = random.Random(0)
+        authors = [(i, ''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(4, 12))) + f' {i}',
+                    rng.randint(1, 50)) for i in range(1, 100001)]
+        source = FakeSource(authors)
+        index = AuthorIndex()
+        total = source.total()
+        index.suggest(1, 0, total, source.load_authors, source.load_new_authors, '')
+        prefixes = [authors[rng.randrange(len(authors))][1][:rng.randint(0, 6)] for _ in range(2000)]
+        return index, source, total, prefixes
+
+    def test_work_bounded_at_scale(self):
+        """测试 10 万位作者时每次前缀查询检查的作者数不超过 scan_limit"""
+        index, source, total, prefixes = self.large_index()
+        for prefix in prefixes:
+            before = index.examined
+            index.suggest(1, 0, total, source.load_authors, source.load_new_authors, prefix)
+            assert index.examined - before <= index.scan_limit, prefix
+        assert index.stats()['lookups'] == len(prefixes) + 1
+
+    def test_wide_prefix_at_bottom_of_ranking(self):
+        """测试匹配的作者都排在名言数顺序末尾时，大区间前缀查询在写入前后都不扫描全部作者"""
+        rng = random.Random(1)
+        authors = [(i, rng.choice('abcdefgh') + f'{i}', rng.randint(10, 50)) for i in range(1, 50001)]
+        authors += [(i, f'zz{i}', 1) for i in range(50001, 53001)]
+        source = FakeSource(authors)
+        index = AuthorIndex(scan_limit=2000)
+        expected = [(i, f'zz{i}', 1) for i in sorted(range(50001, 53001), key=lambda i: f'zz{i}')[:10]]
+        for version in (1, 2, 3):
+            before = index.examined
+            assert index.suggest(version, 0, source.total(), source.load_authors, source.load_new_authors,
+                                 'zz') == expected
+            assert index.examined - before <= 10
+            # 每次写入都让下一次查询看到新的数据版本
+            source.new_rows = [(1, authors[0][1], 1, 100 + version)]
+            authors[0] = (1, authors[0][1], authors[0][2] + 1)
+            source.authors = list(authors)
+        assert source.full_loads == 1 and index.stats()['incremental_refreshes'] == 2
+
+    def test_wide_prefix_lists_follow_increments(self):
+        """测试增量刷新（新作者、名言数增加）后大区间前缀的结果与在区间内选取一致"""
+        rng = random.Random(2)
+        authors = {i: (i, ''.join(rng.choice('ab') for _ in range(rng.randint(1, 4))), rng.randint(1, 5))
+                   for i in range(1, 41)}
+        source = FakeSource(authors.values())
+        wide, narrow = AuthorIndex(scan_limit=2, max_limit=3), AuthorIndex(scan_limit=10 ** 6)
+        prefixes = ['', 'a', 'b', 'aa', 'ab', 'ba', 'bb', 'aba']
+        max_id = 100
+        for version in range(1, 30):
+            for index in (wide, narrow):
+                for prefix in prefixes:
+                    for limit in (1, 3):
+                        index.suggest(version, 0, source.total(), source.load_authors, source.load_new_authors,
+                                      prefix, limit)
+            for prefix in prefixes:
+                assert (wide.suggest(version, 0, source.total(), source.load_authors, source.load_new_authors,
+                                     prefix, 3)
+                        == narrow.suggest(version, 0, source.total(), source.load_authors,
+                                          source.load_new_authors, prefix, 3)), (version, prefix)
+            author_id = rng.randint(1, 50)
+            added = rng.randint(1, 3)
+            max_id += 1
+            name = authors[author_id][1] if author_id in authors else rng.choice(['a', 'ab', 'ba', 'abab'])
+            count = authors[author_id][2] + added if author_id in authors else added
+            authors[author_id] = (author_id, name, count)
+            source.new_rows = [(author_id, name, added, max_id)]
+            source.authors = list(authors.values())
+        assert wide.stats()['full_reloads'] == 1
+
+    @pytest.mark.slow
+    @pytest.mark.performance
+    def test_latency_at_scale(self):
+        """测试 10 万位作者时前缀查询的 p99 低于 1 毫秒（耗时受机器负载影响，只在性能测试中运行）"""
+        index, source, total, prefixes = self.large_index()
+        durations = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.suggest(1, 0, total, source.load_authors, source.load_new_authors, prefix)
+            durations.append(time.perf_counter() - start)
+        durations.sort()
+        assert durations[int(len(durations) * 0.99)] < 0.001
+
+
+class TestSuggestEndpoint:
+    """作者联想接口测试类"""
+
+    def test_suggest(self, client, query):
+        """测试按前缀返回作者及名言数"""
+        query("INSERT INTO quotes (content, author) VALUES ('一', '苏轼'), ('二', '苏轼'), ('三', '苏辙')")
+        data = json.loads(client.get('/api/authors/suggest?prefix=苏').data)
+        assert [(a['name'], a['quote_count']) for a in data['authors']] == [('苏轼', 2), ('苏辙', 1)]
+
+    def test_prefix_canonicalized(self, client, query):
+        """测试前缀与作者名一样做规范化"""
+        query("INSERT INTO quotes (content, author) VALUES ('一', 'Steve Jobs')")
+        data = json.loads(client.get('/api/authors/suggest', query_string={'prefix': ' ｓｔｅｖｅ　'}).data)
+        assert data['prefix'] == 'steve'
+        assert [a['name'] for a in data['authors']] == ['Steve Jobs']
+
+    def test_new_quotes_refresh_incrementally(self, client, query):
+        """测试新增名言后联想结果随之更新，且为增量刷新"""
+        client.get('/api/authors/suggest?prefix=苏')
+        query("INSERT INTO quotes (content, author) VALUES ('一', '苏洵')")
+        data = json.loads(client.get('/api/authors/suggest?prefix=苏').data)
+        assert [a['name'] for a in data['authors']] == ['苏洵']
+        assert app_module.author_index.stats()['incremental_refreshes'] == 1
+
+    def test_deleted_author_removed(self, client, query):
+        """测试作者的名言全部删除后不再出现在联想中"""
+        query("INSERT INTO quotes (content, author) VALUES ('一', '苏洵')")
+        client.get('/api/authors/suggest?prefix=苏')
+        query("DELETE FROM quotes WHERE author = '苏洵'")
+        data = json.loads(client.get('/api/authors/suggest?prefix=苏').data)
+        assert data['authors'] == []
+
+    def test_etag(self, client):
+        """测试数据未变化时返回 304"""
+        etag = client.get('/api/authors/suggest?prefix=测').headers['ETag']
+        assert client.get('/api/authors/suggest?prefix=测', headers={'If-None-Match': etag}).status_code == 304
+
+    def test_invalid_n(self, client):
+        """测试 n 不是整数时返回 400"""
+        assert client.get('/api/authors/suggest?prefix=a&n=x').status_code == 400
@@ -0,0 +1,163 @@
+"""
+作者表与作者列表测试
+"""
+import json
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+import pytest
+import app as app_module
+from migrations import migrate
+from validation import canonical_author
+
+
+class TestCanonicalAuthor:
+    """作者名规范化测试类"""
+
+    @pytest.mark.parametrize('raw', ['李白', ' 李白 ', '李白　', '\t李白\n'])
+    def test_whitespace_variants(self, raw):
+        """测试首尾空白（含全角空格）被去掉"""
+        assert canonical_author(raw) == '李白'
+
+    def test_width_and_inner_spaces(self):
+        """测试全角字母转半角，连续空白合并"""
+        assert canonical_author('Ｓｔｅｖｅ　 Ｊｏｂｓ') == 'Steve Jobs'
+
+
+class TestAuthorMigration:
+    """作者表迁移测试类"""
+
+    def test_backfill_existing_rows(self):
+        """测试旧数据的作者名被规范化并回填作者表和计数"""
+        fd, path = tempfile.mkstemp()
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute('''
+                CREATE TABLE quotes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    user_id INTEGER,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.executemany('INSERT INTO quotes (content, author) VALUES (?, ?)',
+                             [('一', '李白'), ('二', '李白 '), ('三', '李白　'), ('四', '杜甫')])
+            conn.commit()
+            migrate(conn, 'sqlite')
+
+            authors = dict(conn.execute('SELECT name, quote_count FROM authors').fetchall())
+            assert authors == {'李白': 3, '杜甫': 1}
+            rows = conn.execute('SELECT q.author, a.name FROM quotes q JOIN authors a ON a.id = q.author_id')
+            assert all(author == name for author, name in rows)
+        finally:
+            conn.close()
+            os.close(fd)
+            os.unlink(path)
+
+
+class TestAuthorCounts:
+    """作者计数触发器测试类"""
+
+    @pytest.fixture
+    def counts(self, query):
+        return lambda: dict(query('SELECT name, quote_count FROM authors'))
+
+    def test_insert_update_delete(self, query, counts):
+        """测试插入、改作者、删除时计数同步更新"""
+        query("INSERT INTO quotes (content, author) VALUES ('甲一', '甲'), ('甲二', '甲')")
+        assert counts()['甲'] == 2
+        query("UPDATE quotes SET author = '乙' WHERE content = '甲一'")
+        assert counts()['甲'] == 1 and counts()['乙'] == 1
+        query("DELETE FROM quotes WHERE content = '甲二'")
+        assert counts()['甲'] == 0
+        author_ids = query("SELECT q.author_id, a.id FROM quotes q JOIN authors a ON a.name = q.author "
+                           "WHERE q.content = '甲一'")
+        assert author_ids[0][0] == author_ids[0][1]
+
+    def test_add_quote_canonicalizes(self, client, auth_headers, counts):
+        """测试添加名言时作者名被规范化，变体归入同一位作者"""
+        headers = auth_headers('authoruser')
+        client.post('/api/quotes', json={'content': '床前明月光', 'author': '李白'}, headers=headers)
+        response = client.post('/api/quotes', json={'content': '举头望明月', 'author': '  李白　'},
+                               headers=headers)
+        assert json.loads(response.data)['author'] == '李白'
+        assert counts()['李白'] == 2
+
+    def test_bulk_import_canonicalizes(self, client, auth_headers, counts):
+        """测试批量导入同样规范化作者名"""
+        body = '\n'.join(json.dumps({'content': f'导入{i}', 'author': name}, ensure_ascii=False)
+                         for i, name in enumerate(['王维 ', '王维', '王　维'])).encode('utf-8')
+        client.post('/api/quotes/bulk', data=body, content_type='application/x-ndjson',
+                    headers=auth_headers('authoruser'))
+        authors = counts()
+        assert authors['王维'] == 2
+        assert authors['王 维'] == 1
+
+
+class TestAuthorsEndpoint:
+    """作者列表接口测试类"""
+
+    @pytest.fixture(autouse=True)
+    def seed(self, query):
+        query("INSERT INTO quotes (content, author) VALUES "
+              "('a', '多产作者'), ('b', '多产作者'), ('c', '多产作者'), ('d', '阿作者')")
+
+    def test_sort_by_name(self, client, query):
+        """测试按名字排序，不返回没有名言的作者"""
+        query("DELETE FROM quotes WHERE author = '测试作者1'")
+        data = json.loads(client.get('/api/authors?pageSize=100').data)
+        names = [a['name'] for a in data['authors']]
+        assert names == sorted(names)
+        assert '测试作者1' not in names
+
+    def test_sort_by_count(self, client):
+        """测试按名言数排序"""
+        data = json.loads(client.get('/api/authors?sort=count&pageSize=2').data)
+        assert data['authors'][0] == {'id': data['authors'][0]['id'], 'name': '多产作者', 'quote_count': 3}
+        assert data['has_more'] is True
+
+    def test_author_filter_uses_canonical_name(self, client):
+        """测试名言列表的 author 过滤按规范化后的名字匹配"""
+        data = json.loads(client.get('/api/quotes', query_string={'author': ' 多产作者　'}).data)
+        assert data['total'] == 3
+
+    def test_author_id_filter(self, client, query):
+        """测试按 author_id 过滤"""
+        author_id = query("SELECT id FROM authors WHERE name = '多产作者'")[0][0]
+        data = json.loads(client.get(f'/api/quotes?author_id={author_id}').data)
+        assert data['total'] == 3
+        assert all(q['author_id'] == author_id for q in data['quotes'])
+
+    def test_author_total_from_maintained_count(self, client, query):
+        """测试只按作者过滤时总数读作者表的计数，不对 quotes 做 COUNT(*)；组合过滤仍然精确计数"""
+        author_id = query("SELECT id FROM authors WHERE name = '多产作者'")[0][0]
+        original = app_module.execute_query
+        calls = []
+
+        def recording_execute(sql, *args, **kwargs):
+            calls.append(sql)
+            return original(sql, *args, **kwargs)
+
+        with patch('app.execute_query', recording_execute):
+            for params in ({'author': '多产作者'}, {'author_id': author_id}, {'author': '没有这个人'}):
+                data = json.loads(client.get('/api/quotes', query_string=params).data)
+                assert data['total'] == (0 if params.get('author') == '没有这个人' else 3)
+        assert not any('COUNT(' in sql for sql in calls)
+
+        data = json.loads(client.get('/api/quotes', query_string={
+            'author': '多产作者', 'created_before': '2000-01-01'}).data)
+        assert data['total'] == 0
+
+    def test_list_uses_index(self, query):
+        """测试作者列表两种排序都按索引顺序读取，不需要排序"""
+        for order in ('name', 'quote_count DESC, name'):
+            plan = ' '.join(row[3] for row in query(
+                f'EXPLAIN QUERY PLAN SELECT id, name, quote_count FROM authors '
+                f'WHERE quote_count > 0 ORDER BY {order} LIMIT 20'))
+            assert 'TEMP B-TREE' not in plan
+
+    def test_invalid_sort(self, client):
+        """测试非法排序参数"""
+        assert client.get('/api/authors?sort=age').status_code == 400
@@ -0,0 +1,78 @@
+"""
+批量获取名言测试
+"""
+import json
+from unittest.mock import patch
+import pytest
+import app as app_module
+
+
+@pytest.fixture
+def quote_ids(query):
+    """种子数据的名言 id，按 id 升序"""
+    return [row[0] for row in query('SELECT id FROM quotes ORDER BY id')]
+
+
+class TestBatchGet:
+    """批量获取测试类"""
+
+    def test_get_by_ids_preserves_order(self, client, quote_ids):
+        """测试按请求顺序返回，并列出不存在的 id"""
+        a, b, c = quote_ids
+        response = client.get(f'/api/quotes?ids={c},999999,{a},{c}')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [q['id'] for q in data['quotes']] == [c, a]
+        assert data['missing'] == [999999]
+
+    def test_same_serialization_as_list(self, client):
+        """测试与列表接口的字段一致"""
+        listed = json.loads(client.get('/api/quotes').data)['quotes'][0]
+        batch = json.loads(client.get(f"/api/quotes?ids={listed['id']}").data)['quotes'][0]
+        assert batch == listed
+
+    def test_post_batch(self, client, quote_ids):
+        """测试 POST 请求体批量获取"""
+        ids = quote_ids
+        response = client.post('/api/quotes/batch', json={'ids': list(reversed(ids))})
+        assert response.status_code == 200
+        assert [q['id'] for q in json.loads(response.data)['quotes']] == list(reversed(ids))
+
+    def test_single_query(self, client, quote_ids):
+        """测试所有 id 在一次查询中读取"""
+        original = app_module.execute_query
+        calls = []
+
+        def counting_execute(query, *args, **kwargs):
+            calls.append(query)
+            return original(query, *args, **kwargs)
+
+        with patch('app.execute_query', counting_execute):
+            client.post('/api/quotes/batch', json={'ids': quote_ids})
+        assert len(calls) == 1
+
+    def test_max_batch_size(self, client, monkeypatch):
+        """测试超过最大数量时返回 400"""
+        monkeypatch.setattr('app.QUOTES_BATCH_MAX', 2)
+        response = client.get('/api/quotes?ids=1,2,3')
+        assert response.status_code == 400
+        assert '最多' in json.loads(response.data)['message']
+
+    def test_oversized_batch_rejected_early(self, client):
+        """测试超长 id 列表在超过上限时立即拒绝，重复的 id 不计入上限"""
+        # 上限之后的非法元素不会被解析到
+        response = client.post('/api/quotes/batch', json={'ids': list(range(1, 200001)) + ['abc']})
+        assert response.status_code == 400
+        assert '最多' in json.loads(response.data)['message']
+        ids = [1] * 1000 + list(range(2, app_module.QUOTES_BATCH_MAX + 1))
+        assert client.post('/api/quotes/batch', json={'ids': ids}).status_code == 200
+
+    def test_invalid_ids(self, client):
+        """测试非法 id 返回 400"""
+        assert client.get('/api/quotes?ids=1,abc').status_code == 400
+        assert client.get('/api/quotes?ids=').status_code == 400
+        assert client.get('/api/quotes?ids=0').status_code == 400
+        assert client.post('/api/quotes/batch', json={'ids': [1.5]}).status_code == 400
+        assert client.post('/api/quotes/batch', json={'ids': [True]}).status_code == 400
+        assert client.post('/api/quotes/batch', json=[1, 2]).status_code == 400
+        assert client.post('/api/quotes/batch', data='not json').status_code == 400
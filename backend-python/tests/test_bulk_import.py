@@ -0,0 +1,145 @@
+"""
+批量导入测试
+"""
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import pytest
+from bulk_import import ImportFormatError, import_quotes, iter_rows, main
+from migrations import migrate
+
+
+def ndjson(*rows):
+    return '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows).encode('utf-8')
+
+
+class TestRowParsing:
+    """导入文件解析测试类"""
+
+    def test_ndjson_rows(self):
+        """测试 NDJSON 解析，空行跳过，坏行带行号报错"""
+        body = b'{"content": "a", "author": "b"}\n\nnot json\n[1, 2]\n'
+        rows = list(iter_rows(io.BytesIO(body), 'ndjson'))
+        assert rows[0] == (1, {'content': 'a', 'author': 'b'}, None)
+        assert rows[1][0] == 3 and rows[1][2]
+        assert rows[2][0] == 4 and rows[2][2] == '每行必须是 JSON 对象'
+
+    def test_csv_gzip_rows(self):
+        """测试 gzip 压缩的 CSV 解析"""
+        body = gzip.compress('content,author\n"你好,世界",作者\n'.encode('utf-8'))
+        rows = list(iter_rows(io.BytesIO(body), 'csv', gzipped=True))
+        assert rows == [(2, {'content': '你好,世界', 'author': '作者'}, None)]
+
+    def test_csv_missing_header(self):
+        """测试 CSV 缺少必需的表头"""
+        with pytest.raises(ImportFormatError):
+            list(iter_rows(io.BytesIO(b'text,who\na,b\n'), 'csv'))
+
+    def test_corrupt_gzip(self):
+        """测试损坏的 gzip 数据"""
+        with pytest.raises(ImportFormatError):
+            list(iter_rows(io.BytesIO(b'not gzip'), 'ndjson', gzipped=True))
+
+
+class TestImportQuotes:
+    """批量写入测试类"""
+
+    def setup_method(self):
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        self.conn = sqlite3.connect(self.db_path)
+        migrate(self.conn, 'sqlite')
+
+    def teardown_method(self):
+        self.conn.close()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def test_batches_and_errors(self):
+        """测试按批写入并汇总逐行错误"""
+        rows = [(i, {'content': f'名言{i}', 'author': '作者'}, None) for i in range(1, 6)]
+        rows.append((6, {'content': '  ', 'author': '作者'}, None))
+        report = import_quotes(self.conn, 'sqlite', iter(rows), batch_size=2)
+        self.conn.commit()
+        assert report['inserted'] == 5
+        assert report['batches'] == 3
+        assert report['failed'] == 1
+        assert report['errors'] == [{'line': 6, 'message': '内容和作者不能为空'}]
+        assert self.conn.execute('SELECT COUNT(*) FROM quotes').fetchone()[0] == 5
+        # 触发器维护的计数随批量写入同步更新
+        row = self.conn.execute("SELECT row_count FROM table_stats WHERE table_name = 'quotes'").fetchone()
+        assert row[0] == 5
+
+    def test_error_report_truncated(self, monkeypatch):
+        """测试错误报告条数有上限"""
+        monkeypatch.setattr('bulk_import.MAX_REPORTED_ERRORS', 2)
+        rows = [(i, None, '坏行') for i in range(5)]
+        report = import_quotes(self.conn, 'sqlite', iter(rows))
+        assert report['failed'] == 5
+        assert len(report['errors']) == 2
+        assert report['errors_truncated'] is True
+
+    def test_cli(self, monkeypatch, tmp_path, capsys):
+        """测试命令行导入"""
+        path = tmp_path / 'quotes.csv'
+        path.write_text('content,author\n命令行名言,命令行作者\n', encoding='utf-8')
+        monkeypatch.delenv('DATABASE_URL', raising=False)
+        monkeypatch.setenv('DATABASE_PATH', self.db_path)
+        assert main([str(path)]) == 0
+        assert '成功 1 条' in capsys.readouterr().out
+        assert self.conn.execute('SELECT COUNT(*) FROM quotes').fetchone()[0] == 1
+
+
+class TestBulkEndpoint:
+    """批量导入接口测试类"""
+
+    @pytest.fixture
+    def headers(self, auth_headers):
+        return auth_headers('bulkuser')
+
+    @pytest.fixture
+    def count_quotes(self, query):
+        return lambda: query('SELECT COUNT(*) FROM quotes')[0][0]
+
+    def test_requires_auth(self, client):
+        """测试未认证时拒绝导入"""
+        response = client.post('/api/quotes/bulk', data=ndjson({'content': 'a', 'author': 'b'}),
+                               content_type='application/x-ndjson')
+        assert response.status_code == 401
+
+    def test_import_ndjson(self, client, headers, count_quotes):
+        """测试导入 NDJSON 并返回逐行错误"""
+        before = count_quotes()
+        body = ndjson({'content': '批量一', 'author': '甲'}, {'content': '批量二', 'author': '乙'},
+                      {'content': '', 'author': '丙'})
+        response = client.post('/api/quotes/bulk?batch_size=1', data=body,
+                               content_type='application/x-ndjson',
+                               headers=headers)
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['inserted'] == 2
+        assert data['batches'] == 2
+        assert data['errors'] == [{'line': 3, 'message': '内容和作者不能为空'}]
+        assert count_quotes() == before + 2
+
+    def test_import_gzip_csv(self, client, headers):
+        """测试导入 gzip 压缩的 CSV，新数据出现在列表中"""
+        body = gzip.compress('content,author\n压缩名言,压缩作者\n'.encode('utf-8'))
+        response = client.post('/api/quotes/bulk', data=body, content_type='text/csv',
+                               headers={**headers, 'Content-Encoding': 'gzip'})
+        assert response.status_code == 201
+        quotes = json.loads(client.get('/api/quotes').data)['quotes']
+        assert any(q['content'] == '压缩名言' and q['added_by'] == 'bulkuser' for q in quotes)
+
+    def test_bad_format_rolls_back(self, client, headers, count_quotes):
+        """测试格式错误时返回 400 且不写入任何数据"""
+        before = count_quotes()
+        response = client.post('/api/quotes/bulk', data=b'text\nabc\n', content_type='text/csv',
+                               headers=headers)
+        assert response.status_code == 400
+        response = client.post('/api/quotes/bulk?format=xml', data=b'<quotes/>',
+                               headers=headers)
+        assert response.status_code == 400
+        assert count_quotes() == before
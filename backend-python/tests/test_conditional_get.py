@@ -0,0 +1,96 @@
+"""
+条件请求（ETag / Last-Modified）测试
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import app as app_module
+
+
+class TestConditionalGet:
+    """条件请求测试类"""
+
+    def test_validators_present(self, client):
+        """测试列表响应带有 ETag、Last-Modified 和 Cache-Control"""
+        response = client.get('/api/quotes')
+        assert response.status_code == 200
+        assert response.headers.get('ETag')
+        assert response.headers.get('Last-Modified')
+        assert response.headers.get('Cache-Control') == 'no-cache'
+
+    def test_if_none_match_returns_304(self, client):
+        """测试 ETag 匹配时返回 304 且没有响应体"""
+        etag = client.get('/api/quotes').headers['ETag']
+        response = client.get('/api/quotes', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+    def test_304_skips_quote_queries(self, client):
+        """测试返回 304 时只查询一次版本号"""
+        etag = client.get('/api/quotes').headers['ETag']
+        original = app_module.execute_query
+        calls = []
+
+        def counting_execute(query, *args, **kwargs):
+            calls.append(query)
+            return original(query, *args, **kwargs)
+
+        with patch('app.execute_query', counting_execute):
+            response = client.get('/api/quotes', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert len(calls) == 1
+        assert 'table_stats' in calls[0]
+
+    def test_write_changes_etag(self, client, insert_quotes):
+        """测试数据写入后 ETag 改变，旧 ETag 不再返回 304"""
+        etag = client.get('/api/quotes').headers['ETag']
+        insert_quotes([('条件请求名言', '条件作者')])
+        response = client.get('/api/quotes', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_etag_depends_on_params(self, client):
+        """测试不同查询参数的 ETag 不同"""
+        first = client.get('/api/quotes?page=1&pageSize=1').headers['ETag']
+        second = client.get('/api/quotes?page=2&pageSize=1').headers['ETag']
+        assert first != second
+        response = client.get('/api/quotes?page=2&pageSize=1', headers={'If-None-Match': first})
+        assert response.status_code == 200
+
+    def test_if_modified_since_not_trusted(self, client):
+        """测试只带 If-Modified-Since 时不返回 304（Last-Modified 只精确到秒，只按 ETag 判断）"""
+        last_modified = client.get('/api/quotes').headers['Last-Modified']
+        response = client.get('/api/quotes', headers={'If-Modified-Since': last_modified})
+        assert response.status_code == 200
+
+    def test_two_writes_in_same_second(self, client, query, insert_quotes):
+        """测试同一秒内的两次写入：Last-Modified 相同，但客户端拿着第一次写入后的缓存再验证时拿到新数据"""
+        insert_quotes([('第一次写入', '条件作者')])
+        first = client.get('/api/quotes')
+        # 第二次写入落在同一秒：把 updated_at 恢复成第一次写入后的值
+        updated_at = query("SELECT updated_at FROM table_stats WHERE table_name = 'quotes'")[0][0]
+        insert_quotes([('第二次写入', '条件作者')])
+        query("UPDATE table_stats SET updated_at = ? WHERE table_name = 'quotes'", (updated_at,))
+
+        for headers in ({'If-Modified-Since': first.headers['Last-Modified']},
+                        {'If-None-Match': first.headers['ETag']},
+                        {'If-None-Match': first.headers['ETag'], 'If-Modified-Since': first.headers['Last-Modified']}):
+            response = client.get('/api/quotes', headers=headers)
+            assert response.status_code == 200
+            assert response.headers['Last-Modified'] == first.headers['Last-Modified']
+            assert response.json['quotes'][0]['content'] == '第二次写入'
+
+    def test_http_datetime_in_utc(self):
+        """测试带时区的时间（PostgreSQL timestamptz）转换为 UTC，SQLite 的字符串按 UTC 解释"""
+        local = datetime(2024, 1, 1, 8, 0, 0, 500000, tzinfo=timezone(timedelta(hours=8)))
+        assert app_module.to_http_datetime(local) == datetime(2024, 1, 1, 0, 0, tzinfo=timezone.utc)
+        assert app_module.to_http_datetime('2024-01-01 00:00:00') == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def test_if_none_match_takes_precedence(self, client):
+        """测试同时带两个条件头时以 If-None-Match 为准"""
+        last_modified = client.get('/api/quotes').headers['Last-Modified']
+        response = client.get('/api/quotes', headers={
+            'If-None-Match': '"stale"',
+            'If-Modified-Since': last_modified
+        })
+        assert response.status_code == 200
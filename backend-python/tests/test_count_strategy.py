@@ -0,0 +1,55 @@
+"""
+名言总数策略测试
+"""
+import json
+
+
+class TestCountStrategy:
+    """总数策略测试类"""
+
+    def test_default_exact(self, client):
+        """测试默认使用计数行返回精确总数"""
+        data = json.loads(client.get('/api/quotes').data)
+        assert data['count_strategy'] == 'exact'
+        assert data['total'] == 3
+        assert data['total_pages'] == 1
+
+    def test_counter_follows_insert_and_delete(self, client, query):
+        """测试计数行随插入/删除在同一事务内更新"""
+        query("INSERT INTO quotes (content, author) VALUES ('计数名言', '计数作者')")
+        assert json.loads(client.get('/api/quotes').data)['total'] == 4
+
+        query("DELETE FROM quotes WHERE content = '计数名言'")
+        assert json.loads(client.get('/api/quotes').data)['total'] == 3
+
+    def test_counter_matches_count_after_bulk_insert(self, client, query, insert_quotes):
+        """测试批量插入后计数与 COUNT(*) 一致"""
+        insert_quotes([(f'批量{i}', '作者') for i in range(25)])
+        count = query('SELECT COUNT(*) FROM quotes')[0][0]
+        assert json.loads(client.get('/api/quotes').data)['total'] == count == 28
+
+    def test_count_none_omits_total(self, client):
+        """测试 count=none 时不返回总数"""
+        data = json.loads(client.get('/api/quotes?count=none').data)
+        assert data['count_strategy'] == 'none'
+        assert 'total' not in data
+        assert 'total_pages' not in data
+        assert len(data['quotes']) == 3
+
+    def test_estimate_without_stats_falls_back_to_exact(self, client):
+        """测试没有统计信息时 estimate 退回精确计数"""
+        data = json.loads(client.get('/api/quotes?count=estimate').data)
+        assert data['count_strategy'] == 'exact'
+        assert data['total'] == 3
+
+    def test_estimate_uses_sqlite_stats(self, client, query):
+        """测试 ANALYZE 之后 estimate 读取 sqlite_stat1"""
+        query('ANALYZE')
+        data = json.loads(client.get('/api/quotes?count=estimate').data)
+        assert data['count_strategy'] == 'estimate'
+        assert data['total'] == 3
+
+    def test_invalid_strategy(self, client):
+        """测试不支持的 count 参数返回 400"""
+        response = client.get('/api/quotes?count=bogus')
+        assert response.status_code == 400
@@ -0,0 +1,81 @@
+"""
+名言导出测试
+"""
+import csv
+import gzip
+import io
+import json
+from quote_export import encode_rows, gzip_chunks
+
+# 导出测试插入的名言带创建时间
+COLUMNS = ('content', 'author', 'created_at')
+
+
+def read_ndjson(data):
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+class TestEncodeRows:
+    """导出编码测试类"""
+
+    ROW = {'id': 1, 'content': '内容,带逗号', 'author': '作者', 'user_id': None,
+           'added_by': None, 'created_at': '2024-01-01 00:00:00'}
+
+    def test_chunks_bounded(self):
+        """测试输出按块产出，块大小不随行数增长"""
+        chunks = list(encode_rows(iter([self.ROW] * 1000), 'ndjson', chunk_size=1024))
+        assert len(chunks) > 10
+        assert max(len(chunk) for chunk in chunks) < 2048
+        assert len(read_ndjson(''.join(chunks).encode('utf-8'))) == 1000
+
+    def test_csv_and_gzip(self):
+        """测试 CSV 编码和流式 gzip 压缩"""
+        data = b''.join(gzip_chunks(encode_rows(iter([self.ROW]), 'csv')))
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(data).decode('utf-8'))))
+        assert rows[0]['content'] == '内容,带逗号'
+        assert rows[0]['user_id'] == ''
+
+
+class TestExportEndpoint:
+    """导出接口测试类"""
+
+    def test_export_ndjson(self, client, insert_quotes, monkeypatch):
+        """测试导出全部名言，跨越多个取数批次"""
+        insert_quotes([(f'导出{i}', '导出作者', '2024-06-01 00:00:00') for i in range(25)], COLUMNS)
+        monkeypatch.setattr('app.EXPORT_FETCH_SIZE', 4)
+        response = client.get('/api/quotes/export')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert 'attachment' in response.headers['Content-Disposition']
+        rows = read_ndjson(response.data)
+        assert len(rows) == 28
+        assert [row['id'] for row in rows] == sorted(row['id'] for row in rows)
+        assert set(rows[0]) == {'id', 'content', 'author', 'user_id', 'added_by', 'created_at'}
+
+    def test_export_csv_gzip(self, client):
+        """测试 CSV 导出和 gzip 压缩"""
+        response = client.get('/api/quotes/export?format=csv&gzip=1')
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.data).decode('utf-8'))))
+        assert len(rows) == 3
+
+    def test_export_filters(self, client, insert_quotes):
+        """测试按作者和日期范围过滤"""
+        insert_quotes([
+            ('早', '过滤作者', '2023-01-01 00:00:00'),
+            ('中', '过滤作者', '2023-06-01 12:00:00'),
+            ('晚', '过滤作者', '2024-01-01 00:00:00'),
+            ('别人', '其他作者', '2023-06-01 12:00:00'),
+        ], COLUMNS)
+        response = client.get('/api/quotes/export?author=过滤作者&from=2023-03-01&to=2024-01-01')
+        assert [row['content'] for row in read_ndjson(response.data)] == ['中']
+
+        response = client.get('/api/quotes/export?user_id=999')
+        assert response.data == b''
+
+    def test_invalid_params(self, client):
+        """测试非法参数返回 400"""
+        assert client.get('/api/quotes/export?format=xml').status_code == 400
+        assert client.get('/api/quotes/export?from=yesterday').status_code == 400
+        assert client.get('/api/quotes/export?user_id=abc').status_code == 400
@@ -0,0 +1,61 @@
+"""
+稀疏字段（fields 参数）测试
+"""
+import json
+from unittest.mock import patch
+import app as app_module
+
+
+class TestSparseFields:
+    """稀疏字段测试类"""
+
+    def test_fields_narrow_output(self, client):
+        """测试只返回请求的字段"""
+        response = client.get('/api/quotes?fields=id,content,author')
+        assert response.status_code == 200
+        quotes = json.loads(response.data)['quotes']
+        assert all(set(q) == {'id', 'content', 'author'} for q in quotes)
+
+    def test_fields_narrow_sql(self, client):
+        """测试不需要 added_by 时 SQL 只查询必要的列且不 JOIN users"""
+        original = app_module.execute_query
+        queries = []
+
+        def recording_execute(query, *args, **kwargs):
+            queries.append(query)
+            return original(query, *args, **kwargs)
+
+        with patch('app.execute_query', recording_execute):
+            client.get('/api/quotes?fields=content')
+        list_query = next(q for q in queries if 'ORDER BY' in q)
+        assert 'users' not in list_query
+        assert 'q.*' not in list_query
+        assert 'q.content' in list_query
+
+    def test_added_by_keeps_join(self, client):
+        """测试请求 added_by 时仍然 JOIN users"""
+        quotes = json.loads(client.get('/api/quotes?fields=added_by').data)['quotes']
+        assert all(set(q) == {'added_by'} for q in quotes)
+
+    def test_cursor_works_without_key_fields(self, client):
+        """测试未请求 id/created_at 时游标分页仍然可用"""
+        first = json.loads(client.get('/api/quotes?fields=content&pageSize=2').data)
+        assert first['next_cursor']
+        second = json.loads(client.get(
+            f"/api/quotes?fields=content&pageSize=2&cursor={first['next_cursor']}").data)
+        contents = [q['content'] for q in first['quotes'] + second['quotes']]
+        assert len(contents) == 3 and len(set(contents)) == 3
+
+    def test_cached_separately(self, client):
+        """测试不同字段集合的响应分别缓存，字段顺序不影响缓存键"""
+        full = client.get('/api/quotes')
+        narrow = client.get('/api/quotes?fields=content,id')
+        reordered = client.get('/api/quotes?fields=id,content')
+        assert full.headers['ETag'] != narrow.headers['ETag']
+        assert narrow.headers['ETag'] == reordered.headers['ETag']
+        assert len(narrow.data) < len(full.data)
+
+    def test_invalid_fields(self, client):
+        """测试未知字段或空字段返回 400"""
+        assert client.get('/api/quotes?fields=password').status_code == 400
+        assert client.get('/api/quotes?fields=').status_code == 400
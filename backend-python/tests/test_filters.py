@@ -0,0 +1,159 @@
+"""
+名言列表过滤与排序测试
+"""
+import itertools
+import json
+from unittest.mock import patch
+import pytest
+import app as app_module
+from pagination import decode_cursor, encode_cursor
+
+# 过滤测试插入的名言带添加者和创建时间
+COLUMNS = ('content', 'author', 'user_id', 'created_at')
+
+
+def get_list(client, **params):
+    response = client.get('/api/quotes', query_string=params)
+    assert response.status_code == 200, response.data
+    return json.loads(response.data)
+
+
+class TestSortCursor:
+    """带排序的游标测试类"""
+
+    def test_author_cursor_roundtrip(self):
+        """测试按作者排序的游标包含作者并可还原"""
+        cursor = encode_cursor('作者', '2024-01-01 00:00:00', 5, sort='author')
+        assert decode_cursor(cursor, 'author') == ('作者', '2024-01-01 00:00:00', 5)
+
+    def test_cursor_sort_mismatch(self):
+        """测试游标不能用于另一种排序"""
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor('2024-01-01 00:00:00', 5), 'author')
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor('2024-01-01 00:00:00', 5, sort='oldest'), 'newest')
+
+
+class TestListFilters:
+    """列表过滤与排序测试类"""
+
+    @pytest.fixture(autouse=True)
+    def seed(self, insert_quotes):
+        insert_quotes([
+            ('甲一', '甲', 1, '2024-01-01 00:00:00'),
+            ('乙一', '乙', 2, '2024-02-01 00:00:00'),
+            ('甲二', '甲', 2, '2024-03-01 00:00:00'),
+            ('丙一', '丙', 1, '2024-04-01 00:00:00'),
+        ], COLUMNS)
+
+    def test_author_filter(self, client):
+        """测试按作者过滤，总数为过滤后的数量"""
+        data = get_list(client, author='甲')
+        assert [q['content'] for q in data['quotes']] == ['甲二', '甲一']
+        assert data['total'] == 2
+
+    def test_user_filter(self, client):
+        """测试按添加者过滤"""
+        data = get_list(client, user_id=1)
+        assert [q['content'] for q in data['quotes']] == ['丙一', '甲一']
+
+    def test_date_range(self, client):
+        """测试 created_after 含、created_before 不含"""
+        data = get_list(client, created_after='2024-02-01', created_before='2024-04-01')
+        assert [q['content'] for q in data['quotes']] == ['甲二', '乙一']
+
+    def test_sort_oldest(self, client):
+        """测试按时间正序"""
+        data = get_list(client, sort='oldest', created_before='2025-01-01')
+        assert [q['content'] for q in data['quotes']] == ['甲一', '乙一', '甲二', '丙一']
+        assert data['sort'] == 'oldest'
+
+    def test_sort_author_with_cursor(self, client):
+        """测试按作者排序并用游标翻页，结果与一次取完一致"""
+        expected = [q['id'] for q in get_list(client, sort='author', pageSize=50)['quotes']]
+        seen, cursor = [], None
+        while True:
+            params = {'sort': 'author', 'pageSize': 2}
+            if cursor:
+                params['cursor'] = cursor
+            data = get_list(client, **params)
+            seen += [q['id'] for q in data['quotes']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        assert seen == expected
+        authors = [q['author'] for q in get_list(client, sort='author', pageSize=50)['quotes']]
+        assert authors == sorted(authors)
+
+    def test_filters_cached_separately(self, client):
+        """测试不同过滤条件使用不同的缓存键和 ETag"""
+        first = client.get('/api/quotes?author=甲')
+        second = client.get('/api/quotes?author=乙')
+        assert first.headers['ETag'] != second.headers['ETag']
+        assert json.loads(second.data)['quotes'][0]['author'] == '乙'
+
+    def test_invalid_params(self, client):
+        """测试非法排序、日期或游标返回 400"""
+        assert client.get('/api/quotes?sort=random').status_code == 400
+        assert client.get('/api/quotes?created_after=tomorrow').status_code == 400
+        cursor = get_list(client, pageSize=1)['next_cursor']
+        assert client.get(f'/api/quotes?sort=author&cursor={cursor}').status_code == 400
+
+
+class TestListQueryPlans:
+    """过滤/排序组合的查询计划测试类（大数据量 + ANALYZE 后检查 SQLite 的执行计划）"""
+
+    FILTERS = [
+        {},
+        {'author': '作者5'},
+        {'user_id': '3'},
+        {'created_after': '2024-03-01', 'created_before': '2024-04-01'},
+        {'author': '作者5', 'created_after': '2024-03-01'},
+        {'user_id': '3', 'created_before': '2024-05-01'},
+    ]
+
+    @pytest.fixture
+    def large_db(self, query, insert_quotes):
+        query('INSERT INTO users (username, password) VALUES '
+              + ', '.join(f"('plan_user{i}', 'x')" for i in range(50)))
+        insert_quotes(
+            [(f'名言{i}', f'作者{i % 200}', i % 50 + 1, f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 00:00:00')
+             for i in range(5000)],
+            COLUMNS
+        )
+        query('ANALYZE')
+        return query
+
+    def list_query_plan(self, client, query, params):
+        """执行一次列表请求，取出实际执行的列表 SQL 并返回它的查询计划"""
+        original = app_module.execute_query
+        recorded = []
+
+        def recording_execute(sql, sql_params=None, **kwargs):
+            recorded.append((sql, sql_params))
+            return original(sql, sql_params, **kwargs)
+
+        with patch('app.execute_query', recording_execute):
+            response = client.get('/api/quotes', query_string={**params, 'count': 'none'})
+        assert response.status_code == 200
+        sql, sql_params = next(item for item in recorded if 'ORDER BY' in item[0])
+        rows = query('EXPLAIN QUERY PLAN ' + sql, sql_params)
+        return [row[3] for row in rows], json.loads(response.data)
+
+    @pytest.mark.parametrize('filters,sort', list(itertools.product(FILTERS, ['newest', 'oldest', 'author'])))
+    def test_no_table_scan(self, client, large_db, filters, sort):
+        """测试每种过滤/排序组合（含游标翻页）都走索引，不全表扫描"""
+        params = {**filters, 'sort': sort, 'pageSize': 5}
+        plan, data = self.list_query_plan(client, large_db, params)
+        pages = [plan]
+        if data['next_cursor']:
+            pages.append(self.list_query_plan(client, large_db, {**params, 'cursor': data['next_cursor']})[0])
+
+        for plan in pages:
+            quote_steps = [step for step in plan if step.startswith(('SCAN q', 'SEARCH q'))]
+            assert quote_steps and all('USING' in step for step in quote_steps), plan
+            if filters:
+                assert quote_steps[0].startswith('SEARCH q'), plan
+            # 只有"日期范围 + 按作者排序"需要对范围内的行排序，其余组合直接按索引顺序读取
+            if not (sort == 'author' and set(filters) <= {'created_after', 'created_before'} and filters):
+                assert not any('TEMP B-TREE' in step for step in plan), plan
@@ -0,0 +1,91 @@
+"""
+JWT 解码缓存测试
+"""
+import time
+from datetime import timedelta
+from flask_jwt_extended import JWTManager, create_access_token
+import app as app_module
+from app import app
+
+
+def cache_stats():
+    return app_module.jwt.token_cache_stats()
+
+
+class TestJWTCache:
+    """已验证 token 缓存测试类"""
+
+    def test_repeated_token_hits_cache(self, client, auth_headers):
+        """测试同一个 token 第二次请求命中缓存"""
+        headers = auth_headers()
+        before = cache_stats()
+        for _ in range(3):
+            assert client.get('/api/users/me/quotes', headers=headers).status_code == 200
+        stats = cache_stats()
+        assert stats['misses'] - before['misses'] == 1
+        assert stats['hits'] - before['hits'] == 2
+        assert stats['entries'] == 1
+
+    def test_invalid_token_not_cached(self, client):
+        """测试校验失败的 token 不进入缓存"""
+        for _ in range(2):
+            response = client.get('/api/users/me/quotes', headers={'Authorization': 'Bearer invalid_token'})
+            assert response.status_code == 422
+        assert cache_stats()['entries'] == 0
+
+    def test_entry_expires_with_token(self, client, auth_headers):
+        """测试缓存条目不晚于 token 的 exp 过期，过期后按原逻辑拒绝"""
+        auth_headers()
+        with app.app_context():
+            token = create_access_token(identity='1', expires_delta=timedelta(seconds=1))
+        headers = {'Authorization': f'Bearer {token}'}
+        expired = cache_stats()['expired']
+        assert client.get('/api/users/me/quotes', headers=headers).status_code == 200
+        time.sleep(1.1)
+        assert client.get('/api/users/me/quotes', headers=headers).status_code == 401
+        assert cache_stats()['expired'] == expired + 1
+
+    def test_blocklist_checked_on_hit(self, client, auth_headers, monkeypatch):
+        """测试命中缓存时仍然检查吊销（黑名单）"""
+        headers = auth_headers()
+        assert client.get('/api/users/me/quotes', headers=headers).status_code == 200
+        hits = cache_stats()['hits']
+        monkeypatch.setattr(app_module.jwt, '_token_in_blocklist_callback', lambda header, payload: True)
+        assert client.get('/api/users/me/quotes', headers=headers).status_code == 401
+        assert cache_stats()['hits'] == hits + 1
+
+    def test_secret_change_invalidates(self, client, auth_headers, monkeypatch):
+        """测试更换密钥后缓存的 token 不再被接受"""
+        headers = auth_headers()
+        assert client.get('/api/users/me/quotes', headers=headers).status_code == 200
+        monkeypatch.setitem(app.config, 'JWT_SECRET_KEY', 'another-secret-key')
+        assert client.get('/api/users/me/quotes', headers=headers).status_code == 422
+
+
+class TestJWTCacheBenchmark:
+    """解码缓存微基准测试类"""
+
+    def test_hit_cheaper_than_verify(self, client):
+        """测试命中缓存比重新校验签名快，并能从统计中读出节省的时间"""
+        rounds = 2000
+        with app.app_context():
+            token = create_access_token(identity='1')
+            manager = app_module.jwt
+
+            started = time.perf_counter()
+            for _ in range(rounds):
+                JWTManager._decode_jwt_from_config(manager, token)
+            uncached = time.perf_counter() - started
+
+            manager._decode_jwt_from_config(token)
+            hits = cache_stats()['hits']
+            started = time.perf_counter()
+            for _ in range(rounds):
+                manager._decode_jwt_from_config(token)
+            cached = time.perf_counter() - started
+
+        stats = cache_stats()
+        assert stats['hits'] - hits == rounds
+        assert stats['hit_rate'] > 0.5
+        assert stats['saved_ms'] > 0
+        assert cached < uncached
@@ -0,0 +1,107 @@
+"""
+数据库迁移测试
+"""
+import os
+import sqlite3
+import tempfile
+import pytest
+from migrations import LATEST_VERSION, MIGRATIONS, current_version, migrate
+
+
+class TestMigrations:
+    """迁移测试类"""
+
+    def setup_method(self):
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        self.conn = sqlite3.connect(self.db_path)
+
+    def teardown_method(self):
+        self.conn.close()
+        os.close(self.db_fd)
+        os.unlink(self.db_path)
+
+    def index_names(self):
+        rows = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'quotes'"
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def test_migrate_fresh_database(self):
+        """测试在空数据库上执行全部迁移"""
+        applied = migrate(self.conn, 'sqlite')
+        assert applied == [m['version'] for m in MIGRATIONS]
+        assert current_version(self.conn, 'sqlite') == LATEST_VERSION
+        assert 'idx_quotes_created_at_id' in self.index_names()
+        assert 'idx_quotes_user_id_created_at' in self.index_names()
+
+    def test_migrate_is_idempotent(self):
+        """测试 schema 已是最新时不再执行迁移"""
+        migrate(self.conn, 'sqlite')
+        assert migrate(self.conn, 'sqlite') == []
+        rows = self.conn.execute('SELECT COUNT(*) FROM schema_version').fetchone()
+        assert rows[0] == len(MIGRATIONS)
+
+    def test_migrate_legacy_database(self):
+        """测试没有 schema_version 的旧数据库（已有表和数据）可以升级"""
+        self.conn.execute('''
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE quotes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content TEXT NOT NULL,
+                author TEXT NOT NULL,
+                user_id INTEGER,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            )
+        ''')
+        self.conn.execute("INSERT INTO quotes (content, author) VALUES ('旧数据', '旧作者')")
+        self.conn.commit()
+
+        assert current_version(self.conn, 'sqlite') == 0
+        migrate(self.conn, 'sqlite')
+        assert current_version(self.conn, 'sqlite') == LATEST_VERSION
+        assert self.conn.execute('SELECT COUNT(*) FROM quotes').fetchone()[0] == 1
+        # 计数行按已有数据回填
+        row = self.conn.execute("SELECT row_count FROM table_stats WHERE table_name = 'quotes'").fetchone()
+        assert row[0] == 1
+
+    def test_failed_migration_rolls_back(self, monkeypatch):
+        """测试迁移失败时整体回滚"""
+        broken = MIGRATIONS + [{
+            'version': LATEST_VERSION + 1,
+            'description': '错误的迁移',
+            'sqlite': ['CREATE INDEX idx_broken ON missing_table (id)'],
+            'postgresql': [],
+        }]
+        monkeypatch.setattr('migrations.MIGRATIONS', broken)
+        monkeypatch.setattr('migrations.LATEST_VERSION', LATEST_VERSION + 1)
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(self.conn, 'sqlite')
+        assert current_version(self.conn, 'sqlite') == 0
+
+    def test_unknown_dialect(self):
+        """测试不支持的数据库类型"""
+        with pytest.raises(ValueError):
+            migrate(self.conn, 'mysql')
+
+    def test_list_query_uses_index(self):
+        """测试名言列表查询（首页和游标翻页）走索引，不需要额外排序"""
+        migrate(self.conn, 'sqlite')
+        queries = [
+            ('SELECT q.*, u.username as added_by FROM quotes q LEFT JOIN users u ON q.user_id = u.id '
+             'ORDER BY q.created_at DESC, q.id DESC LIMIT ? OFFSET ?', (10, 0)),
+            ('SELECT q.*, u.username as added_by FROM quotes q LEFT JOIN users u ON q.user_id = u.id '
+             'WHERE (q.created_at, q.id) < (?, ?) ORDER BY q.created_at DESC, q.id DESC LIMIT ?',
+             ('2024-01-01 00:00:00', 10, 10)),
+        ]
+        for query, params in queries:
+            plan = ' '.join(row[3] for row in self.conn.execute('EXPLAIN QUERY PLAN ' + query, params))
+            assert 'idx_quotes_created_at_id' in plan
+            assert 'TEMP B-TREE' not in plan
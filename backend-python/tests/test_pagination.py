@@ -0,0 +1,92 @@
+"""
+游标分页测试
+"""
+import json
+import pytest
+from pagination import encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def add_quotes(insert_quotes):
+    """插入 count 条创建时间相同的名言"""
+    def run(count, created_at='2024-01-01 00:00:00'):
+        insert_quotes([(f'分页名言{i}', '分页作者', created_at) for i in range(count)],
+                      columns=('content', 'author', 'created_at'))
+    return run
+
+
+class TestCursorEncoding:
+    """游标编码测试类"""
+
+    def test_roundtrip(self):
+        """测试游标编码后可以还原"""
+        cursor = encode_cursor('2024-01-01 12:00:00', 42)
+        assert decode_cursor(cursor) == ('2024-01-01 12:00:00', 42)
+        assert '=' not in cursor
+
+    @pytest.mark.parametrize('cursor', ['', 'not-a-cursor', encode_cursor('x', 1)[:-3], 'WzEsMl0'])
+    def test_invalid_cursor(self, cursor):
+        """测试无效游标抛出 ValueError"""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+class TestCursorPagination:
+    """游标分页 API 测试类"""
+
+    def walk(self, client, page_size):
+        """沿着 next_cursor 遍历所有页"""
+        response = client.get(f'/api/quotes?pageSize={page_size}')
+        data = json.loads(response.data)
+        ids = [q['id'] for q in data['quotes']]
+        while data['next_cursor']:
+            response = client.get(f"/api/quotes?pageSize={page_size}&cursor={data['next_cursor']}")
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert len(data['quotes']) <= page_size
+            ids.extend(q['id'] for q in data['quotes'])
+        return ids
+
+    def test_walk_all_pages(self, client, add_quotes):
+        """测试游标遍历所有名言，不重复不遗漏"""
+        add_quotes(20)
+        ids = self.walk(client, 7)
+        assert len(ids) == 23
+        assert len(set(ids)) == 23
+
+    def test_order_is_newest_first_with_id_tiebreak(self, client, add_quotes):
+        """测试同一时间创建的名言按 id 倒序排列"""
+        add_quotes(5, created_at='2030-01-01 00:00:00')
+        data = json.loads(client.get('/api/quotes?pageSize=5').data)
+        ids = [q['id'] for q in data['quotes']]
+        assert ids == sorted(ids, reverse=True)
+
+    def test_pages_stable_when_new_quotes_arrive(self, client, add_quotes):
+        """测试翻页过程中新增名言不会导致重复或遗漏"""
+        add_quotes(10)
+        expected = [q['id'] for q in json.loads(client.get('/api/quotes?pageSize=50').data)['quotes']]
+        first = json.loads(client.get('/api/quotes?pageSize=5').data)
+        add_quotes(3, created_at='2099-01-01 00:00:00')
+        second = json.loads(client.get(f"/api/quotes?pageSize=5&cursor={first['next_cursor']}").data)
+
+        ids = [q['id'] for q in first['quotes'] + second['quotes']]
+        assert ids == expected[:10]
+
+    def test_last_page_has_no_cursor(self, client):
+        """测试最后一页 next_cursor 为空"""
+        data = json.loads(client.get('/api/quotes?pageSize=50').data)
+        assert data['next_cursor'] is None
+
+    def test_page_mode_still_supported(self, client, add_quotes):
+        """测试旧的 page/pageSize 参数仍然可用，并返回 next_cursor"""
+        add_quotes(5)
+        data = json.loads(client.get('/api/quotes?page=2&pageSize=3').data)
+        assert data['page'] == 2
+        assert data['total_pages'] == 3
+        assert len(data['quotes']) == 3
+        assert data['next_cursor'] is not None
+
+    def test_invalid_cursor_returns_400(self, client):
+        """测试无效游标返回 400"""
+        response = client.get('/api/quotes?cursor=garbage')
+        assert response.status_code == 400
@@ -0,0 +1,261 @@
+"""
+密码哈希并发限制测试
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+from flask import g
+import app as app_module
+from password_hashing import HashPoolBusy, PasswordHasher, audit, benchmark, hash_rounds
+
+
+def hold_slot(hasher, index, paths=None):
+    """在测试进程中占住一个槽位（或排队位置），返回需要关闭的文件描述符"""
+    fd = hasher._try_lock((paths or hasher._paths)[index])
+    assert fd is not None
+    return fd
+
+
+class TestPasswordHasher:
+    """哈希槽位测试类"""
+
+    def test_hash_and_verify(self, tmp_path):
+        """测试哈希与校验，校验接受字符串或字节形式的哈希"""
+        hasher = PasswordHasher(slots=1, lock_dir=str(tmp_path))
+        hashed = hasher.hash('secret')
+        assert hasher.verify('secret', hashed)
+        assert hasher.verify('secret', hashed.encode('utf-8'))
+        assert not hasher.verify('wrong', hashed)
+        stats = hasher.stats()
+        assert stats['operations'] == 4
+        assert stats['in_progress'] == 0 and stats['slots_in_use'] == 0
+
+    def test_busy_after_queue_timeout(self, tmp_path):
+        """测试所有槽位被占用时在等待时间后抛出 HashPoolBusy"""
+        hasher = PasswordHasher(slots=2, queue_timeout=0.05, lock_dir=str(tmp_path))
+        fds = [hold_slot(hasher, i) for i in range(2)]
+        try:
+            assert hasher.stats()['slots_in_use'] == 2
+            started = time.monotonic()
+            with pytest.raises(HashPoolBusy):
+                hasher.hash('secret')
+            assert time.monotonic() - started < 1
+            assert hasher.stats()['rejected'] == 1
+        finally:
+            for fd in fds:
+                os.close(fd)
+        assert hasher.verify('secret', hasher.hash('secret'))
+
+    def test_queue_full_rejects_immediately(self, tmp_path):
+        """测试排队位置也被占满时不等待，直接抛出 HashPoolBusy"""
+        hasher = PasswordHasher(slots=1, queue_size=1, queue_timeout=5, lock_dir=str(tmp_path))
+        fds = [hold_slot(hasher, 0), hold_slot(hasher, 0, hasher._queue_paths)]
+        try:
+            assert hasher.stats()['queued'] == 1
+            started = time.monotonic()
+            with pytest.raises(HashPoolBusy):
+                hasher.hash('secret')
+            assert time.monotonic() - started < 1
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def test_free_slot_used(self, tmp_path):
+        """测试有空闲槽位时不等待"""
+        hasher = PasswordHasher(slots=2, queue_timeout=0, lock_dir=str(tmp_path))
+        fd = hold_slot(hasher, os.getpid() % 2)
+        try:
+            assert hasher.verify('secret', hasher.hash('secret'))
+        finally:
+            os.close(fd)
+
+    def test_slot_released_when_process_dies(self, tmp_path):
+        """测试持有槽位的进程被杀死后槽位自动释放"""
+        hasher = PasswordHasher(slots=1, queue_timeout=0.05, lock_dir=str(tmp_path))
+        script = (
+            'import fcntl, os, sys, time\n'
+            f'fd = os.open({hasher._paths[0]!r}, os.O_RDWR | os.O_CREAT)\n'
+            'fcntl.flock(fd, fcntl.LOCK_EX)\n'
+            'print("locked", flush=True)\n'
+            'time.sleep(60)\n'
+        )
+        child = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE, text=True)
+        try:
+            assert child.stdout.readline().strip() == 'locked'
+            with pytest.raises(HashPoolBusy):
+                hasher.hash('secret')
+        finally:
+            child.kill()
+            child.wait()
+        assert hasher.verify('secret', hasher.hash('secret'))
+
+    def test_stats_do_not_take_locks(self, tmp_path):
+        """测试另一个进程持续哈希时反复读取统计，不会让它拿不到槽位"""
+        hasher = PasswordHasher(slots=1, queue_size=0, queue_timeout=0, lock_dir=str(tmp_path), rounds=4)
+        script = (
+            'import sys, time\n'
+            f'sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})\n'
+            'from password_hashing import HashPoolBusy, PasswordHasher\n'
+            f'hasher = PasswordHasher(slots=1, queue_size=0, queue_timeout=0, lock_dir={str(tmp_path)!r}, rounds=4)\n'
+            'print("ready", flush=True)\n'
+            'deadline = time.monotonic() + 1\n'
+            'while time.monotonic() < deadline:\n'
+            '    try:\n'
+            '        hasher.hash("secret")\n'
+            '    except HashPoolBusy:\n'
+            '        pass\n'
+            'print(hasher.stats()["rejected"], flush=True)\n'
+        )
+        child = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE, text=True)
+        try:
+            assert child.stdout.readline().strip() == 'ready'
+            seen_busy = False
+            while child.poll() is None:
+                seen_busy = hasher.stats()['slots_in_use'] == 1 or seen_busy
+            assert child.stdout.readline().strip() == '0'
+            assert seen_busy
+        finally:
+            child.kill()
+            child.wait()
+
+    def test_dead_owner_not_counted(self, tmp_path):
+        """测试持有者被杀死后留下的记录不计入占用"""
+        hasher = PasswordHasher(slots=1, lock_dir=str(tmp_path))
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        with open(hasher._paths[0], 'wb') as f:
+            f.write(str(child.pid).encode('ascii'))
+        assert hasher.stats()['slots_in_use'] == 0
+
+
+class TestAuthBackpressure:
+    """认证接口背压测试类"""
+
+    @pytest.fixture
+    def saturated(self, client, tmp_path, monkeypatch):
+        client.post('/api/auth/register', json={'username': 'busy', 'password': 'testpass123'})
+        hasher = PasswordHasher(slots=1, queue_timeout=0.01, lock_dir=str(tmp_path))
+        monkeypatch.setattr(app_module, 'password_hasher', hasher)
+        fd = hold_slot(hasher, 0)
+        yield hasher
+        os.close(fd)
+
+    def test_auth_returns_503(self, client, saturated):
+        """测试哈希槽位占满时登录和注册快速返回 503 和 Retry-After"""
+        for path, username in (('/api/auth/login', 'busy'), ('/api/auth/register', 'newcomer')):
+            response = client.post(path, json={'username': username, 'password': 'testpass123'})
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+        assert saturated.stats()['rejected'] == 2
+
+    def test_reads_unaffected(self, client, saturated):
+        """测试哈希繁忙时读请求不受影响"""
+        assert client.get('/api/quotes').status_code == 200
+
+    def test_login_releases_connection_during_verify(self, client, monkeypatch):
+        """测试登录校验密码时已归还请求的数据库连接，之后的写入重新取连接"""
+        client.post('/api/auth/register', json={'username': 'idle', 'password': 'testpass123'})
+        original = app_module.password_hasher.verify
+        held = []
+
+        def verify(password, hashed):
+            held.append('db_conn' in g)
+            return original(password, hashed)
+
+        monkeypatch.setattr(app_module.password_hasher, 'verify', verify)
+        response = client.post('/api/auth/login', json={'username': 'idle', 'password': 'testpass123'})
+        assert response.status_code == 200
+        assert held == [False]
+        assert client.post('/api/auth/refresh', headers={
+            'Authorization': f"Bearer {json.loads(response.data)['refresh_token']}"
+        }).status_code == 200
+
+    def test_metrics(self, client):
+        """测试详细健康检查包含哈希槽位使用情况"""
+        data = json.loads(client.get('/health/detailed').data)
+        metrics = data['metrics']['password_hashing']
+        assert {'slots', 'slots_in_use', 'rejected', 'utilization'} <= set(metrics)
+
+
+class TestWorkFactor:
+    """bcrypt cost 配置测试类"""
+
+    def test_rounds_and_needs_rehash(self, tmp_path):
+        """测试按配置的 cost 生成哈希，cost 不同的哈希需要重新哈希"""
+        hasher = PasswordHasher(lock_dir=str(tmp_path), rounds=4)
+        hashed = hasher.hash('secret')
+        assert hash_rounds(hashed) == 4
+        assert not hasher.needs_rehash(hashed)
+        assert PasswordHasher(lock_dir=str(tmp_path), rounds=5).needs_rehash(hashed)
+        assert hash_rounds('not-a-hash') is None
+
+    def test_invalid_rounds(self, tmp_path):
+        """测试 cost 超出范围时报错"""
+        with pytest.raises(ValueError):
+            PasswordHasher(lock_dir=str(tmp_path), rounds=3)
+
+    @pytest.fixture
+    def stored_password(self, query):
+        return lambda username: query('SELECT password FROM users WHERE username = ?', (username,))[0][0]
+
+    def test_login_rehashes(self, client, stored_password, tmp_path, monkeypatch):
+        """测试登录成功时把旧 cost 的哈希透明地换成新 cost，之后仍能登录"""
+        monkeypatch.setattr(app_module, 'password_hasher', PasswordHasher(lock_dir=str(tmp_path), rounds=4))
+        client.post('/api/auth/register', json={'username': 'rehash', 'password': 'testpass123'})
+        monkeypatch.setattr(app_module, 'password_hasher', PasswordHasher(lock_dir=str(tmp_path), rounds=5))
+        for _ in range(2):
+            response = client.post('/api/auth/login', json={'username': 'rehash', 'password': 'testpass123'})
+            assert response.status_code == 200
+            assert hash_rounds(stored_password('rehash')) == 5
+
+    def test_failed_login_keeps_hash(self, client, stored_password, tmp_path, monkeypatch):
+        """测试密码错误时不重新哈希"""
+        monkeypatch.setattr(app_module, 'password_hasher', PasswordHasher(lock_dir=str(tmp_path), rounds=4))
+        client.post('/api/auth/register', json={'username': 'rehash', 'password': 'testpass123'})
+        before = stored_password('rehash')
+        monkeypatch.setattr(app_module, 'password_hasher', PasswordHasher(lock_dir=str(tmp_path), rounds=5))
+        client.post('/api/auth/login', json={'username': 'rehash', 'password': 'wrong'})
+        assert stored_password('rehash') == before
+
+    def test_benchmark(self):
+        """测试基准测试返回每个 cost 的单核与整机速度"""
+        results = benchmark([4, 5], samples=2, processes=1)
+        assert [row['rounds'] for row in results] == [4, 5]
+        assert all(row['per_core_per_sec'] > 0 and row['total_per_sec'] > 0 for row in results)
+
+    def test_audit(self, client, db_conn, query, tmp_path, monkeypatch):
+        """测试按 cost 统计账户数"""
+        monkeypatch.setattr(app_module, 'password_hasher', PasswordHasher(lock_dir=str(tmp_path), rounds=4))
+        client.post('/api/auth/register', json={'username': 'audit', 'password': 'testpass123'})
+        counts = audit(db_conn)
+        assert counts[4] == 1
+        assert sum(counts.values()) == query('SELECT COUNT(*) FROM users')[0][0]
+
+
+class TestWorkerBudget:
+    """哈希与排队占用 worker 数的测试类"""
+
+    def test_defaults_leave_free_worker(self, tmp_path):
+        """测试默认配置在 4 个 worker 下不需要调整"""
+        hasher = PasswordHasher(lock_dir=str(tmp_path))
+        assert hasher.slots + hasher.queue_size < 4
+        assert not hasher.fit_workers(4)
+
+    def test_fit_workers(self, tmp_path):
+        """测试并发数加排队数不小于 worker 数时先减排队再减并发"""
+        hasher = PasswordHasher(slots=2, queue_size=4, lock_dir=str(tmp_path))
+        assert hasher.fit_workers(4)
+        assert (hasher.slots, hasher.queue_size) == (2, 1)
+        assert hasher.fit_workers(2)
+        assert (hasher.slots, hasher.queue_size) == (1, 0)
+        assert len(hasher._paths) == 1 and hasher._queue_paths == []
+        assert hasher.verify('secret', hasher.hash('secret'))
+
+    def test_single_worker(self, tmp_path):
+        """测试只有一个 worker 时保留一个槽位"""
+        hasher = PasswordHasher(slots=2, lock_dir=str(tmp_path))
+        hasher.fit_workers(1)
+        assert (hasher.slots, hasher.queue_size) == (1, 0)
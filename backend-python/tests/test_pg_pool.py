@@ -0,0 +1,150 @@
+"""
+PostgreSQL 连接池测试
+使用模拟连接，不需要真实的 PostgreSQL
+"""
+import json
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from pg_pool import PostgresPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise Exception('server closed the connection unexpectedly')
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class TestPostgresPool:
+    """连接池测试类"""
+
+    def make_pool(self, **kwargs):
+        self.connections = []
+
+        def connect():
+            conn = FakeConnection()
+            self.connections.append(conn)
+            return conn
+
+        options = {'min_size': 1, 'max_size': 2, 'checkout_timeout': 0.1}
+        options.update(kwargs)
+        return PostgresPool(connect, **options)
+
+    def test_prefill_min_size(self):
+        """测试创建时预先建立 min_size 个连接"""
+        pool = self.make_pool(min_size=2, max_size=3)
+        stats = pool.stats()
+        assert stats['size'] == 2
+        assert stats['idle'] == 2
+        assert len(self.connections) == 2
+
+    def test_connection_reused(self):
+        """测试归还的连接会被复用"""
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        assert pool.getconn() is conn
+        assert len(self.connections) == 1
+
+    def test_checkout_timeout(self):
+        """测试连接池耗尽时超时抛出 PoolTimeout"""
+        pool = self.make_pool(max_size=2)
+        pool.getconn()
+        pool.getconn()
+
+        start = time.monotonic()
+        with pytest.raises(PoolTimeout):
+            pool.getconn()
+        assert time.monotonic() - start < 1.0
+        assert pool.stats()['timeouts'] == 1
+
+    def test_waiter_gets_returned_connection(self):
+        """测试等待中的请求能拿到其他线程归还的连接"""
+        pool = self.make_pool(max_size=1, checkout_timeout=2)
+        conn = pool.getconn()
+        timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+        timer.start()
+        assert pool.getconn() is conn
+        timer.join()
+
+    def test_max_lifetime_recycles(self):
+        """测试超过最长存活时间的连接被关闭并重建"""
+        pool = self.make_pool(max_lifetime=0)
+        conn = pool.getconn()
+        assert conn is not self.connections[0]
+        assert self.connections[0].closed
+        pool.putconn(conn)
+        assert conn.closed
+        assert pool.stats()['recycled'] >= 2
+
+    def test_health_check_discards_broken_connection(self):
+        """测试健康检查失败的连接被丢弃"""
+        pool = self.make_pool(health_check_idle=0)
+        self.connections[0].broken = True
+        conn = pool.getconn()
+        assert conn is self.connections[1]
+        assert self.connections[0].closed
+        assert pool.stats()['failed_health_checks'] == 1
+
+    def test_putconn_rolls_back(self):
+        """测试归还连接时回滚未结束的事务"""
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        assert conn.rollbacks >= 1
+
+    def test_closed_connection_not_returned_to_pool(self):
+        """测试已断开的连接不会放回连接池"""
+        pool = self.make_pool()
+        conn = pool.getconn()
+        conn.closed = 2
+        pool.putconn(conn)
+        assert pool.stats()['size'] == 0
+        assert pool.getconn() is not conn
+
+    def test_closeall(self):
+        """测试关闭连接池"""
+        pool = self.make_pool(min_size=2)
+        pool.closeall()
+        assert all(conn.closed for conn in self.connections)
+        with pytest.raises(PoolTimeout):
+            pool.getconn()
+
+
+class TestPoolIntegration:
+    """连接池与 API 集成测试"""
+
+    def test_pool_timeout_returns_503(self, client):
+        """测试连接池耗尽时返回 503 而不是挂起"""
+        with patch('app.get_db_connection', side_effect=PoolTimeout('busy')):
+            response = client.get('/api/quotes')
+        assert response.status_code == 503
+        assert response.headers.get('Retry-After') == '1'
+        data = json.loads(response.data)
+        assert 'message' in data
@@ -0,0 +1,111 @@
+"""
+随机名言测试
+"""
+import json
+import random
+from collections import Counter
+from random_sample import IdSampler
+
+
+class FakeTable:
+    """模拟 quotes 表的 id 集合"""
+
+    def __init__(self, ids, authors=None):
+        self.ids = sorted(ids)
+        self.authors = authors or {}
+        self.calls = []
+
+    def load_ids(self, after_id=0, author=None):
+        self.calls.append((after_id, author))
+        if author is not None:
+            return [i for i in self.ids if self.authors.get(i) == author]
+        return [i for i in self.ids if i > after_id]
+
+
+class TestIdSampler:
+    """id 抽样测试类"""
+
+    def test_incremental_refresh_on_insert(self):
+        """测试只有新增时增量读取新 id"""
+        table = FakeTable([1, 2, 3])
+        sampler = IdSampler()
+        assert list(sampler.ids(1, 3, table.load_ids)) == [1, 2, 3]
+        table.ids += [7, 9]
+        assert list(sampler.ids(2, 5, table.load_ids)) == [1, 2, 3, 7, 9]
+        assert table.calls[-1] == (3, None)
+        assert sampler.stats()['incremental_refreshes'] == 1
+
+    def test_full_reload_after_delete(self):
+        """测试删除后整体重新加载，已删除的 id 不会被抽到"""
+        table = FakeTable([1, 2, 3])
+        sampler = IdSampler()
+        sampler.ids(1, 3, table.load_ids)
+        table.ids = [1, 3, 4]  # 删除 2，新增 4，总数不变
+        assert list(sampler.ids(2, 3, table.load_ids)) == [1, 3, 4]
+        assert sampler.stats()['full_reloads'] == 2
+
+    def test_same_version_no_query(self):
+        """测试版本号不变时不查询数据库"""
+        table = FakeTable([1, 2])
+        sampler = IdSampler()
+        sampler.ids(1, 2, table.load_ids)
+        sampler.ids(1, 2, table.load_ids)
+        assert len(table.calls) == 1
+
+    def test_sample_distinct_and_uniform(self):
+        """测试抽样不重复，并且稀疏 id 上大致均匀"""
+        table = FakeTable([1, 2, 1000, 5000])
+        sampler = IdSampler()
+        picks = sampler.sample(1, 4, table.load_ids, n=10)
+        assert sorted(picks) == [1, 2, 1000, 5000]
+
+        rng = random.Random(42)
+        counts = Counter(sampler.sample(1, 4, table.load_ids, rng=rng)[0] for _ in range(4000))
+        assert all(800 < counts[i] < 1200 for i in table.ids)
+
+    def test_author_filter(self):
+        """测试按作者过滤，数据版本变化后重新加载"""
+        table = FakeTable([1, 2, 3], authors={1: '甲', 3: '甲', 2: '乙'})
+        sampler = IdSampler(max_filtered=1)
+        assert sorted(sampler.sample(1, 3, table.load_ids, n=5, author='甲')) == [1, 3]
+        table.authors[2] = '甲'
+        assert sorted(sampler.sample(2, 3, table.load_ids, n=5, author='甲')) == [1, 2, 3]
+        sampler.sample(2, 3, table.load_ids, author='乙')
+        assert sampler.stats()['filtered_sets'] == 1
+
+
+class TestRandomEndpoint:
+    """随机名言接口测试类"""
+
+    def test_random_quote(self, client):
+        """测试返回一条完整的名言"""
+        response = client.get('/api/quotes/random')
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'no-store'
+        quotes = json.loads(response.data)['quotes']
+        assert len(quotes) == 1
+        assert {'id', 'content', 'author', 'added_by'} <= set(quotes[0])
+
+    def test_random_n_distinct(self, client):
+        """测试 n 条不重复，超过总数时返回全部"""
+        quotes = json.loads(client.get('/api/quotes/random?n=10').data)['quotes']
+        assert len(quotes) == 3
+        assert len({q['id'] for q in quotes}) == 3
+
+    def test_deleted_quotes_never_returned(self, client, query):
+        """测试删除后不会返回已删除的名言"""
+        client.get('/api/quotes/random')
+        query("DELETE FROM quotes WHERE content != '测试名言1'")
+        for _ in range(5):
+            quotes = json.loads(client.get('/api/quotes/random?n=3').data)['quotes']
+            assert [q['content'] for q in quotes] == ['测试名言1']
+
+    def test_author_filter(self, client):
+        """测试按作者过滤，作者不存在时返回空列表"""
+        quotes = json.loads(client.get('/api/quotes/random?author=测试作者2').data)['quotes']
+        assert [q['author'] for q in quotes] == ['测试作者2']
+        assert json.loads(client.get('/api/quotes/random?author=无名氏').data)['quotes'] == []
+
+    def test_invalid_n(self, client):
+        """测试 n 不是整数时返回 400"""
+        assert client.get('/api/quotes/random?n=abc').status_code == 400
@@ -0,0 +1,118 @@
+"""
+刷新令牌测试
+"""
+import json
+import app as app_module
+from password_hashing import PasswordHasher
+
+
+def refresh(client, refresh_token):
+    return client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+
+
+class CountingHasher(PasswordHasher):
+    """记录 bcrypt 调用次数的哈希器"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def hash(self, password):
+        self.calls += 1
+        return super().hash(password)
+
+    def verify(self, password, hashed):
+        self.calls += 1
+        return super().verify(password, hashed)
+
+
+class TestRefreshTokens:
+    """刷新令牌轮换测试类"""
+
+    def test_login_returns_refresh_token(self, client, login, query):
+        """测试登录返回刷新令牌并写入记录，注册不签发"""
+        data = login()
+        assert data['refresh_token'] and data['refresh_token'] != data['token']
+        assert query('SELECT COUNT(*) FROM refresh_tokens WHERE revoked_at IS NULL')[0][0] == 1
+
+    def test_refresh_without_password_hashing(self, client, login, tmp_path, monkeypatch):
+        """测试刷新换发可用的访问令牌，整个过程不进行 bcrypt 运算"""
+        hasher = CountingHasher(lock_dir=str(tmp_path), rounds=4)
+        monkeypatch.setattr(app_module, 'password_hasher', hasher)
+        data = login()
+        calls = hasher.calls
+        refresh_token = data['refresh_token']
+        for _ in range(3):
+            response = refresh(client, refresh_token)
+            assert response.status_code == 200
+            refreshed = json.loads(response.data)
+            headers = {'Authorization': f"Bearer {refreshed['token']}"}
+            assert client.get('/api/users/me/quotes', headers=headers).status_code == 200
+            refresh_token = refreshed['refresh_token']
+        assert hasher.calls == calls
+
+    def test_rotation_links_tokens(self, client, login, query):
+        """测试旧令牌被吊销并指向新令牌，新令牌属于同一个 family"""
+        data = login()
+        refresh(client, data['refresh_token'])
+        rows = query('SELECT jti, family, revoked_at, replaced_by FROM refresh_tokens ORDER BY rowid')
+        assert len(rows) == 2
+        assert rows[0][1] == rows[1][1]
+        assert rows[0][2] is not None and rows[0][3] == rows[1][0]
+        assert rows[1][2] is None
+
+    def test_rotated_token_rejected_within_grace(self, client, login):
+        """测试宽限期内重复使用刚换掉的令牌只被拒绝，新令牌仍然有效"""
+        data = login()
+        rotated = json.loads(refresh(client, data['refresh_token']).data)
+        response = refresh(client, data['refresh_token'])
+        assert response.status_code == 401
+        assert json.loads(response.data)['message'] == '登录已失效，请重新登录'
+        assert refresh(client, rotated['refresh_token']).status_code == 200
+
+    def test_reuse_revokes_family(self, client, login, monkeypatch):
+        """测试宽限期外重复使用已换掉的令牌时吊销整个 family"""
+        monkeypatch.setattr(app_module, 'REFRESH_TOKEN_REUSE_GRACE', -60)
+        data = login()
+        other = login('bystander')
+        rotated = json.loads(refresh(client, data['refresh_token']).data)
+        assert refresh(client, data['refresh_token']).status_code == 401
+        assert refresh(client, rotated['refresh_token']).status_code == 401
+        assert refresh(client, other['refresh_token']).status_code == 200
+
+    def test_access_token_rejected(self, client, login):
+        """测试访问令牌不能用来刷新，刷新令牌不能访问普通接口"""
+        data = login()
+        assert refresh(client, data['token']).status_code == 422
+        headers = {'Authorization': f"Bearer {data['refresh_token']}"}
+        assert client.get('/api/users/me/quotes', headers=headers).status_code == 422
+
+    def test_requires_token(self, client):
+        """测试不带令牌时返回 401"""
+        assert client.post('/api/auth/refresh').status_code == 401
+
+    def test_logout_revokes(self, client, login):
+        """测试退出登录后本次登录的刷新令牌都不能再用，其他登录不受影响"""
+        first = login()
+        second = login()
+        rotated = json.loads(refresh(client, first['refresh_token']).data)
+        response = client.post('/api/auth/logout', headers={'Authorization': f"Bearer {rotated['refresh_token']}"})
+        assert response.status_code == 200
+        assert refresh(client, rotated['refresh_token']).status_code == 401
+        assert refresh(client, second['refresh_token']).status_code == 200
+
+    def test_login_prunes_expired(self, client, login, query):
+        """测试登录时清理该用户已过期的记录"""
+        login()
+        query("UPDATE refresh_tokens SET expires_at = '2000-01-01 00:00:00'")
+        login()
+        assert query('SELECT COUNT(*) FROM refresh_tokens')[0][0] == 1
+
+    def test_lookup_uses_index(self, query):
+        """测试按 family 吊销和按用户清理都走索引"""
+        for sql, params in (
+            ('UPDATE refresh_tokens SET revoked_at = ? WHERE family = ? AND revoked_at IS NULL', ('now', 'f')),
+            ('DELETE FROM refresh_tokens WHERE user_id = ? AND expires_at <= ?', (1, 'now')),
+        ):
+            plan = [row[3] for row in query(f'EXPLAIN QUERY PLAN {sql}', params)]
+            assert any('INDEX' in step for step in plan), plan
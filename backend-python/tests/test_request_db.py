@@ -0,0 +1,77 @@
+"""
+请求级连接与事务测试
+"""
+import json
+import pytest
+from unittest.mock import patch
+import app as app_module
+
+
+class TestRequestScopedConnection:
+    """请求级连接测试类"""
+
+    @pytest.fixture
+    def connection_counter(self, client):
+        """统计每个请求获取和归还连接的次数"""
+        counts = {'acquired': 0, 'released': 0}
+        original_get = app_module.get_db_connection
+        original_release = app_module.release_db_connection
+
+        def counting_get():
+            counts['acquired'] += 1
+            return original_get()
+
+        def counting_release(conn):
+            counts['released'] += 1
+            original_release(conn)
+
+        with patch('app.get_db_connection', counting_get), \
+                patch('app.release_db_connection', counting_release):
+            yield counts
+
+    def test_get_quotes_uses_one_connection(self, client, connection_counter):
+        """测试获取名言列表（COUNT + 分页查询）只使用一个连接"""
+        response = client.get('/api/quotes?page=1&pageSize=2')
+        assert response.status_code == 200
+        assert connection_counter['acquired'] == 1
+        assert connection_counter['released'] == 1
+
+    def test_register_uses_one_connection(self, client, connection_counter):
+        """测试注册（查询 + 插入 + 查询）只使用一个连接"""
+        response = client.post('/api/auth/register',
+                               json={'username': 'scopeduser', 'password': 'testpass123'})
+        assert response.status_code == 201
+        assert connection_counter['acquired'] == 1
+        assert connection_counter['released'] == 1
+
+    def test_endpoint_without_queries_takes_no_connection(self, client, connection_counter):
+        """测试不访问数据库的端点不会占用连接"""
+        response = client.get('/')
+        assert response.status_code == 200
+        assert connection_counter['acquired'] == 0
+
+    def test_uncommitted_write_is_rolled_back(self, client):
+        """测试请求结束时未提交的修改被回滚"""
+        with app_module.app.test_request_context('/api/quotes', method='POST'):
+            app_module.execute_query(
+                'INSERT INTO quotes (content, author) VALUES (?, ?)',
+                ('未提交的名言', '测试作者')
+            )
+
+        response = client.get('/api/quotes?pageSize=50')
+        data = json.loads(response.data)
+        assert data['total'] == 3
+        assert all(q['content'] != '未提交的名言' for q in data['quotes'])
+
+    def test_committed_write_is_visible(self, client):
+        """测试 commit_db 提交后的修改对后续请求可见"""
+        with app_module.app.test_request_context('/api/quotes', method='POST'):
+            app_module.execute_query(
+                'INSERT INTO quotes (content, author) VALUES (?, ?)',
+                ('已提交的名言', '测试作者')
+            )
+            app_module.commit_db()
+
+        response = client.get('/api/quotes?pageSize=50')
+        data = json.loads(response.data)
+        assert data['total'] == 4
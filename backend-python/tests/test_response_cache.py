@@ -0,0 +1,129 @@
+"""
+响应缓存测试
+"""
+import json
+import pytest
+import app as app_module
+from response_cache import LRUCache, ResponseCache
+
+
+class FakeSharedTier:
+    """模拟共享缓存层"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def stats(self):
+        return {'entries': len(self.data)}
+
+
+class TestLRUCache:
+    """LRU 缓存测试类"""
+
+    def test_eviction_order(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = LRUCache(max_entries=2)
+        cache.set('a', b'1')
+        cache.set('b', b'2')
+        cache.get('a')
+        cache.set('c', b'3')
+        assert cache.get('b') is None
+        assert cache.get('a') == b'1'
+        assert cache.get('c') == b'3'
+        stats = cache.stats()
+        assert stats['evictions'] == 1
+        assert stats['hits'] == 3
+        assert stats['misses'] == 1
+
+    def test_disabled(self):
+        """测试容量为 0 时不缓存"""
+        cache = LRUCache(max_entries=0)
+        cache.set('a', b'1')
+        assert cache.get('a') is None
+
+
+class TestResponseCache:
+    """两级响应缓存测试类"""
+
+    def test_version_change_invalidates_local(self):
+        """测试数据版本变化后旧条目失效"""
+        cache = ResponseCache(max_entries=10)
+        cache.set(1, 'page=1', b'old')
+        assert cache.get(1, 'page=1') == b'old'
+        assert cache.get(2, 'page=1') is None
+        assert len(cache.local) == 0
+        assert cache.stats()['invalidations'] == 1
+
+    def test_older_version_is_miss(self):
+        """测试旧版本的读写只当作未命中，不清空本地 LRU 也不回退版本"""
+        cache = ResponseCache(max_entries=10)
+        cache.set(2, 'page=1', b'new')
+        assert cache.get(1, 'page=1') is None
+        cache.set(1, 'page=1', b'old')
+        assert cache.get(2, 'page=1') == b'new'
+        assert len(cache.local) == 1
+        stats = cache.stats()
+        assert stats['invalidations'] == 0
+        assert stats['stale'] == 2
+
+    def test_shared_tier_fills_local(self):
+        """测试共享层命中后回填本地 LRU"""
+        shared = FakeSharedTier()
+        writer = ResponseCache(max_entries=10)
+        writer.shared = shared
+        writer.set(5, 'page=1', b'body')
+
+        reader = ResponseCache(max_entries=10)
+        reader.shared = shared
+        assert reader.get(5, 'page=1') == b'body'
+        assert reader.local.stats()['entries'] == 1
+        assert 'shared' in reader.stats()
+
+
+class TestQuoteListCache:
+    """名言列表缓存集成测试类"""
+
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        app_module.reset_caches()
+        yield
+        app_module.reset_caches()
+
+    def test_repeat_request_served_from_cache(self, client):
+        """测试相同参数的重复请求命中缓存且内容一致"""
+        first = client.get('/api/quotes?page=1&pageSize=2')
+        hits_before = app_module.response_cache.local.hits
+        second = client.get('/api/quotes?page=1&pageSize=2')
+        assert second.status_code == 200
+        assert second.data == first.data
+        assert app_module.response_cache.local.hits == hits_before + 1
+
+    def test_different_params_cached_separately(self, client):
+        """测试不同参数使用不同的缓存键"""
+        first = json.loads(client.get('/api/quotes?page=1&pageSize=1').data)
+        second = json.loads(client.get('/api/quotes?page=2&pageSize=1').data)
+        assert first['quotes'][0]['id'] != second['quotes'][0]['id']
+
+    def test_add_quote_invalidates_cache(self, client, auth_headers):
+        """测试添加名言后列表缓存失效"""
+        headers = auth_headers('cacheuser')
+
+        before = json.loads(client.get('/api/quotes').data)
+        client.post('/api/quotes', json={'content': '缓存失效名言', 'author': '缓存作者'}, headers=headers)
+        after = json.loads(client.get('/api/quotes').data)
+
+        assert after['total'] == before['total'] + 1
+        assert after['quotes'][0]['content'] == '缓存失效名言'
+
+    def test_cache_stats_exposed(self, client):
+        """测试缓存统计出现在详细健康检查中"""
+        client.get('/api/quotes')
+        data = json.loads(client.get('/health/detailed').data)
+        stats = data['metrics']['response_cache']
+        assert {'hits', 'misses', 'evictions'} <= set(stats['local'])
@@ -0,0 +1,189 @@
+"""
+名言搜索测试
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import pytest
+import app as app_module
+from migrations import migrate
+from search import (
+    bigram_match_expression, fts_match_expression, like_pattern, make_snippet, needs_gram_index, parse_terms,
+    split_bigram_terms, term_grams
+)
+
+
+def search(client, q, **params):
+    response = client.get('/api/quotes/search', query_string={'q': q, **params})
+    return response.status_code, json.loads(response.data)
+
+
+class TestSearchHelpers:
+    """搜索辅助函数测试类"""
+
+    def test_parse_terms(self):
+        """测试切分、去重和空查询"""
+        assert parse_terms('  人生  Life life 人生 ') == ['人生', 'Life']
+        assert parse_terms('   ') == []
+        assert parse_terms(None) == []
+
+    def test_fts_expression_quotes_input(self):
+        """测试 FTS5 表达式对用户输入加引号"""
+        assert fts_match_expression(['a"b', 'OR']) == '"a""b" "OR"'
+
+    def test_bigram_expression(self):
+        """测试二元组表达式：两个字按整个词，单字按前缀，用户输入加引号"""
+        assert bigram_match_expression(['人生', '梦', 'a"']) == '"人生" "梦"* "a"""'
+        assert split_bigram_terms(['人生', '%', '!a']) == (['人生', '!a'], ['%'])
+
+    def test_term_grams(self):
+        """测试 PostgreSQL 二元组数组查询的元素，以及哪些词 pg_trgm 处理不了"""
+        assert term_grams('Ab') == ['ab']
+        assert term_grams('梦') == ['梦']
+        assert term_grams('100%') == ['0%', '00', '10']
+        assert needs_gram_index('人生') and needs_gram_index('a-b-c')
+        assert not needs_gram_index('知识就是')
+
+    def test_like_pattern_escapes_wildcards(self):
+        """测试 LIKE 模式转义通配符"""
+        assert like_pattern('100%_') == '%100\\%\\_%'
+
+    def test_snippet_highlight_and_escape(self):
+        """测试摘要高亮匹配词并转义 HTML"""
+        snippet = make_snippet('<b>知识</b>就是力量', ['知识'])
+        assert snippet == '&lt;b&gt;<mark>知识</mark>&lt;/b&gt;就是力量'
+
+    def test_snippet_window(self):
+        """测试长文本截取匹配附近的文字"""
+        text = '前' * 100 + '目标' + '后' * 100
+        snippet = make_snippet(text, ['目标'], width=20)
+        assert '<mark>目标</mark>' in snippet
+        assert snippet.startswith('…') and snippet.endswith('…')
+
+
+class TestSearchEndpoint:
+    """搜索接口测试类"""
+
+    @pytest.fixture(autouse=True)
+    def seed_quotes(self, insert_quotes):
+        insert_quotes([
+            ('知识就是力量', '培根'),
+            ('生存还是毁灭，这是一个问题', '莎士比亚'),
+            ('Stay hungry, stay foolish', 'Steve Jobs'),
+        ])
+
+    def test_search_chinese(self, client):
+        """测试中文子串搜索（走 FTS5 trigram 索引）"""
+        status, data = search(client, '知识就是')
+        assert status == 200
+        assert [q['content'] for q in data['quotes']] == ['知识就是力量']
+        assert data['quotes'][0]['highlight']['content'] == '<mark>知识就是</mark>力量'
+        assert 'rank' not in data['quotes'][0]
+
+    def test_search_author(self, client):
+        """测试按作者搜索"""
+        status, data = search(client, '莎士比亚')
+        assert status == 200
+        assert data['quotes'][0]['author'] == '莎士比亚'
+        assert data['quotes'][0]['highlight']['author'] == '<mark>莎士比亚</mark>'
+
+    def test_short_term_fallback(self, client):
+        """测试少于 3 个字符的词也能搜索"""
+        status, data = search(client, '生存')
+        assert status == 200
+        assert [q['content'] for q in data['quotes']] == ['生存还是毁灭，这是一个问题']
+
+    def test_single_character(self, client):
+        """测试单字搜索（二元组前缀索引），包括出现在末尾的字"""
+        assert [q['author'] for q in search(client, '根')[1]['quotes']] == ['培根']
+        assert [q['author'] for q in search(client, '题')[1]['quotes']] == ['莎士比亚']
+
+    def test_short_terms_exact(self, client, insert_quotes):
+        """测试二元组只用于缩小候选范围，结果仍然是精确的子串匹配"""
+        insert_quotes([('力，量', '某人'), ('力量', '某人')])
+        status, data = search(client, '力量 某人')
+        assert status == 200
+        assert [q['content'] for q in data['quotes']] == ['力量']
+        assert data['scan_limited'] is False
+
+    def test_short_term_index_updates(self, client, query, insert_quotes):
+        """测试修改和删除名言后二元组索引同步"""
+        insert_quotes([('天道酬勤', '古训')])
+        query("UPDATE quotes SET content = '厚德载物' WHERE author = '古训'")
+        assert search(client, '酬勤')[1]['quotes'] == []
+        assert len(search(client, '载物')[1]['quotes']) == 1
+        query("DELETE FROM quotes WHERE author = '古训'")
+        assert search(client, '载物')[1]['quotes'] == []
+
+    def test_unindexed_scan_limited(self, client, insert_quotes, monkeypatch):
+        """测试只由标点组成的搜索词只扫描最新的若干条，并在响应中说明"""
+        insert_quotes([('旧的！', '某人')] + [(f'新的{i}', '某人') for i in range(5)])
+        monkeypatch.setattr(app_module, 'SEARCH_SCAN_LIMIT', 3)
+        data = search(client, '！')[1]
+        assert data['quotes'] == [] and data['scan_limited'] is True
+
+    def test_multiple_terms_and(self, client, insert_quotes):
+        """测试多个词之间为 AND，长词和短词可以混合"""
+        insert_quotes([('学习使人进步', '佚名'), ('学习使人快乐', '佚名')])
+        status, data = search(client, '学习使人 进步')
+        assert [q['content'] for q in data['quotes']] == ['学习使人进步']
+
+    def test_new_quote_searchable(self, client, query, insert_quotes):
+        """测试新插入和删除的名言同步到索引"""
+        insert_quotes([('千里之行始于足下', '老子')])
+        assert len(search(client, '始于足下')[1]['quotes']) == 1
+
+        query("DELETE FROM quotes WHERE author = '老子'")
+        assert search(client, '始于足下')[1]['quotes'] == []
+
+    def test_pagination(self, client, insert_quotes):
+        """测试搜索结果分页"""
+        insert_quotes([(f'分页搜索名言{i}', '分页作者') for i in range(5)])
+        first = search(client, '分页搜索', pageSize=2)[1]
+        last = search(client, '分页搜索', pageSize=2, page=3)[1]
+        assert len(first['quotes']) == 2 and first['has_more'] is True
+        assert len(last['quotes']) == 1 and last['has_more'] is False
+
+    def test_case_insensitive(self, client):
+        """测试英文搜索不区分大小写"""
+        data = search(client, 'HUNGRY')[1]
+        assert data['quotes'][0]['highlight']['content'] == 'Stay <mark>hungry</mark>, stay foolish'
+
+    def test_special_characters(self, client, insert_quotes):
+        """测试查询语法字符和通配符按字面匹配"""
+        insert_quotes([('成功率100%_真的', '测试')])
+        assert len(search(client, '100%_')[1]['quotes']) == 1
+        assert search(client, '"AND OR NEAR(')[0] == 200
+        # 单个 % 只匹配真正包含 % 的名言，而不是全部
+        assert [q['content'] for q in search(client, '%')[1]['quotes']] == ['成功率100%_真的']
+
+    def test_empty_query(self, client):
+        """测试空搜索词返回 400"""
+        assert client.get('/api/quotes/search').status_code == 400
+        assert client.get('/api/quotes/search?q=%20').status_code == 400
+
+
+class TestSearchIndex:
+    """全文索引迁移测试类"""
+
+    def test_match_uses_fts_index(self):
+        """测试搜索查询走 FTS5 虚拟表而不是扫描 quotes"""
+        fd, path = tempfile.mkstemp()
+        conn = sqlite3.connect(path)
+        try:
+            migrate(conn, 'sqlite')
+            plan = ' '.join(row[3] for row in conn.execute(
+                'EXPLAIN QUERY PLAN SELECT q.* FROM quotes_fts JOIN quotes q ON q.id = quotes_fts.rowid '
+                'WHERE quotes_fts MATCH ? ORDER BY bm25(quotes_fts) LIMIT 10', ('"知识就是"',)))
+            assert 'VIRTUAL TABLE INDEX' in plan
+            assert 'SEARCH q USING INTEGER PRIMARY KEY' in plan
+            plan = ' '.join(row[3] for row in conn.execute(
+                'EXPLAIN QUERY PLAN SELECT q.* FROM quotes_bigram JOIN quotes q ON q.id = quotes_bigram.rowid '
+                'WHERE quotes_bigram MATCH ? ORDER BY bm25(quotes_bigram) LIMIT 10', ('"人生"',)))
+            assert 'VIRTUAL TABLE INDEX' in plan
+            assert 'SEARCH q USING INTEGER PRIMARY KEY' in plan
+        finally:
+            conn.close()
+            os.close(fd)
+            os.unlink(path)
@@ -0,0 +1,112 @@
+"""
+洗牌浏览测试
+"""
+import json
+import pytest
+import app as app_module
+from shuffle import FeistelPermutation
+
+
+def walk(client, **params):
+    """从头遍历一轮，返回看到的名言 id 列表"""
+    seen = []
+    params.setdefault('seed', 'walk')
+    response = json.loads(client.get('/api/quotes/shuffle', query_string=params).data)
+    seen += [q['id'] for q in response['quotes']]
+    while not response['done']:
+        response = json.loads(client.get('/api/quotes/shuffle', query_string={
+            'seed': response['seed'], 'position': response['position'],
+            'max_id': response['max_id'], 'n': params.get('n', 1)
+        }).data)
+        seen += [q['id'] for q in response['quotes']]
+    return seen
+
+
+class TestFeistelPermutation:
+    """Feistel 排列测试类"""
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 10, 17, 100, 1000])
+    def test_is_permutation(self, size):
+        """测试任意大小的域上都是双射"""
+        permutation = FeistelPermutation(size, 'seed')
+        assert sorted(permutation.permute(i) for i in range(size)) == list(range(size))
+
+    def test_seed_changes_order(self):
+        """测试同一 seed 结果稳定，不同 seed 顺序不同"""
+        first = [FeistelPermutation(100, 'a').permute(i) for i in range(100)]
+        again = [FeistelPermutation(100, 'a').permute(i) for i in range(100)]
+        other = [FeistelPermutation(100, 'b').permute(i) for i in range(100)]
+        assert first == again
+        assert first != other
+        assert first != list(range(100))
+
+    def test_out_of_range(self):
+        """测试位置越界"""
+        with pytest.raises(IndexError):
+            FeistelPermutation(10, 's').permute(10)
+
+
+class TestShuffleEndpoint:
+    """洗牌浏览接口测试类"""
+
+    def test_walk_covers_all_without_repeat(self, client, query, insert_quotes):
+        """测试一轮遍历不重复地覆盖全部名言"""
+        insert_quotes([(f'洗牌{i}', '洗牌作者') for i in range(20)])
+        # 制造 id 空洞
+        query("DELETE FROM quotes WHERE content IN ('洗牌3', '洗牌4', '洗牌11')")
+        all_ids = {row[0] for row in query('SELECT id FROM quotes')}
+
+        seen = walk(client)
+        assert len(seen) == len(set(seen))
+        assert set(seen) == all_ids
+        assert walk(client, n=4) == seen
+
+    def test_new_seed_generated(self, client):
+        """测试不传 seed 时生成一个并返回"""
+        data = json.loads(client.get('/api/quotes/shuffle').data)
+        assert data['seed']
+        assert data['position'] >= 1
+        assert len(data['quotes']) == 1
+
+    def test_new_quotes_wait_for_next_round(self, client, insert_quotes):
+        """测试本轮开始后新增的名言不会打乱当前排列"""
+        first = json.loads(client.get('/api/quotes/shuffle?seed=fixed').data)
+        insert_quotes([('新来的', '某人')])
+        rest = walk(client, seed='fixed', position=first['position'], max_id=first['max_id'])
+        assert len(rest) + 1 == first['max_id']
+
+    def test_delete_max_id_mid_walk(self, client, query, insert_quotes):
+        """测试遍历途中删除 id 最大的名言，排列不变，其余名言仍然不重复不遗漏"""
+        insert_quotes([(f'洗牌{i}', '洗牌作者') for i in range(20)])
+        for seed in range(30):
+            first = json.loads(client.get(f'/api/quotes/shuffle?seed={seed}&n=3').data)
+            max_id = query('SELECT MAX(id) FROM quotes')[0][0]
+            query('DELETE FROM quotes WHERE id = ?', (max_id,))
+            remaining = {row[0] for row in query('SELECT id FROM quotes')}
+            rest = walk(client, seed=seed, position=first['position'], max_id=first['max_id'])
+            seen = [q['id'] for q in first['quotes']] + rest
+            assert len(seen) == len(set(seen))
+            assert set(seen) - {max_id} == remaining
+
+    def test_max_id_validated_against_high_water(self, client, query):
+        """测试 max_id 不能超过分配过的最大 id，删除名言后原来的 max_id 仍然有效"""
+        data = json.loads(client.get('/api/quotes/shuffle').data)
+        assert client.get(f"/api/quotes/shuffle?max_id={data['max_id'] + 1}").status_code == 400
+        assert client.get('/api/quotes/shuffle?max_id=-1').status_code == 400
+        query('DELETE FROM quotes WHERE id = ?', (data['max_id'],))
+        assert client.get(f"/api/quotes/shuffle?max_id={data['max_id']}").status_code == 200
+
+    def test_probes_capped_per_request(self, client, query, insert_quotes, monkeypatch):
+        """测试 id 空洞很多时单次请求的探测位置数有上限，从返回的 position 继续能遍历完"""
+        monkeypatch.setattr(app_module, 'SHUFFLE_MAX_PROBES', 64)
+        insert_quotes([(5000, '远处的', '某人')], ('id', 'content', 'author'))
+        all_ids = {row[0] for row in query('SELECT id FROM quotes')}
+        data = json.loads(client.get('/api/quotes/shuffle?seed=sparse&n=50').data)
+        assert data['position'] <= 64 and not data['done']
+        seen = walk(client, seed='sparse', n=50)
+        assert set(seen) == all_ids and len(seen) == len(all_ids)
+
+    def test_invalid_params(self, client):
+        """测试非法参数"""
+        assert client.get('/api/quotes/shuffle?position=abc').status_code == 400
+        assert client.get('/api/quotes/shuffle?position=-1').status_code == 400
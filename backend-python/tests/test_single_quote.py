@@ -0,0 +1,99 @@
+"""
+单条名言接口测试
+"""
+import json
+from unittest.mock import patch
+import pytest
+import app as app_module
+
+
+@pytest.fixture
+def quote_id(query):
+    """种子数据中第一条名言的 id"""
+    return query("SELECT id FROM quotes WHERE content = '测试名言1'")[0][0]
+
+
+class TestSingleQuote:
+    """单条名言测试类"""
+
+    def test_get_quote(self, client, quote_id):
+        """测试按 id 获取名言，带长期缓存头"""
+        response = client.get(f'/api/quotes/{quote_id}')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['id'] == quote_id
+        assert data['content'] == '测试名言1'
+        assert 'added_by' in data
+        assert response.headers['Cache-Control'].startswith('public, max-age=')
+        assert response.headers.get('ETag')
+
+    def test_not_found(self, client):
+        """测试不存在的名言返回 404"""
+        response = client.get('/api/quotes/999999')
+        assert response.status_code == 404
+        assert json.loads(response.data)['message'] == '名言不存在'
+
+    def test_if_none_match(self, client, quote_id):
+        """测试 ETag 匹配时返回 304"""
+        etag = client.get(f'/api/quotes/{quote_id}').headers['ETag']
+        response = client.get(f'/api/quotes/{quote_id}', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['Cache-Control'].startswith('public')
+
+    def test_cached_after_first_request(self, client, quote_id):
+        """测试第二次请求只查询版本号，不再查询名言"""
+        client.get(f'/api/quotes/{quote_id}')
+        original = app_module.execute_query
+        calls = []
+
+        def counting_execute(query, *args, **kwargs):
+            calls.append(query)
+            return original(query, *args, **kwargs)
+
+        with patch('app.execute_query', counting_execute):
+            assert client.get(f'/api/quotes/{quote_id}').status_code == 200
+        assert len(calls) == 1
+        assert 'table_stats' in calls[0]
+
+    def test_insert_keeps_cache(self, client, quote_id, query):
+        """测试新增其他名言不会使单条缓存失效"""
+        client.get(f'/api/quotes/{quote_id}')
+        query("INSERT INTO quotes (content, author) VALUES ('另一条', '某人')")
+        hits = app_module.quote_cache.hits
+        client.get(f'/api/quotes/{quote_id}')
+        assert app_module.quote_cache.hits == hits + 1
+
+    def test_other_writes_keep_cache(self, client, quote_id, query):
+        """测试修改、删除其他名言后只核对本行版本号，不重新查询名言"""
+        client.get(f'/api/quotes/{quote_id}')
+        query('UPDATE quotes SET content = ? WHERE id = ?', ('修改另一条', quote_id + 1))
+        query('DELETE FROM quotes WHERE id = ?', (quote_id + 2,))
+        original = app_module.execute_query
+        calls = []
+
+        def counting_execute(query, *args, **kwargs):
+            calls.append(query)
+            return original(query, *args, **kwargs)
+
+        with patch('app.execute_query', counting_execute):
+            response = client.get(f'/api/quotes/{quote_id}')
+            assert json.loads(response.data)['content'] == '测试名言1'
+            assert client.get(f'/api/quotes/{quote_id}').status_code == 200
+        assert len(calls) == 3
+        assert 'SELECT version FROM quotes' in calls[1]
+        assert not any('JOIN' in sql for sql in calls)
+
+    def test_update_invalidates(self, client, quote_id, query):
+        """测试修改后返回新内容和新 ETag"""
+        etag = client.get(f'/api/quotes/{quote_id}').headers['ETag']
+        query('UPDATE quotes SET content = ? WHERE id = ?', ('修改后的名言', quote_id))
+        response = client.get(f'/api/quotes/{quote_id}', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)['content'] == '修改后的名言'
+        assert json.loads(response.data)['version'] == 1
+
+    def test_delete_invalidates(self, client, quote_id, query):
+        """测试删除后返回 404"""
+        client.get(f'/api/quotes/{quote_id}')
+        query('DELETE FROM quotes WHERE id = ?', (quote_id,))
+        assert client.get(f'/api/quotes/{quote_id}').status_code == 404
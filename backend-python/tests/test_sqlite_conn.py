@@ -0,0 +1,129 @@
+"""
+SQLite 持久连接管理测试
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import pytest
+from sqlite_conn import SQLiteConnectionManager, parse_pragma_overrides
+
+
+class TestSQLiteConnectionManager:
+    """SQLite 连接管理器测试类"""
+
+    def setup_method(self):
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+        conn.commit()
+        conn.close()
+        self.manager = SQLiteConnectionManager(checkpoint_interval=0)
+
+    def teardown_method(self):
+        self.manager.close_all()
+        os.close(self.db_fd)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.unlink(self.db_path + suffix)
+
+    def test_pragmas_applied(self):
+        """测试连接按配置档设置 PRAGMA"""
+        conn = self.manager.acquire(self.db_path)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+        assert conn.execute('PRAGMA temp_store').fetchone()[0] == 2  # MEMORY
+        assert conn.execute('PRAGMA cache_size').fetchone()[0] == -16000
+
+    def test_connection_reused_within_thread(self):
+        """测试同一线程多次获取得到同一个连接"""
+        conn = self.manager.acquire(self.db_path)
+        self.manager.release(conn)
+        assert self.manager.acquire(self.db_path) is conn
+        assert self.manager.stats()['opened'] == 1
+
+    def test_each_thread_gets_own_connection(self):
+        """测试不同线程使用不同的连接"""
+        main_conn = self.manager.acquire(self.db_path)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.manager.acquire(self.db_path)))
+        thread.start()
+        thread.join()
+        assert other[0] is not main_conn
+
+    def test_release_rolls_back_open_transaction(self):
+        """测试归还连接时回滚未结束的事务"""
+        conn = self.manager.acquire(self.db_path)
+        conn.execute("INSERT INTO items (name) VALUES ('pending')")
+        assert conn.in_transaction
+        self.manager.release(conn)
+        assert not conn.in_transaction
+        assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+
+    def test_release_closes_unmanaged_connection(self):
+        """测试归还不是由管理器创建的连接时直接关闭"""
+        conn = sqlite3.connect(self.db_path)
+        self.manager.release(conn)
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+    def test_reader_not_blocked_by_writer(self):
+        """测试 WAL 模式下写事务进行中仍然可以读取"""
+        writer = self.manager.acquire(self.db_path)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute("INSERT INTO items (name) VALUES ('uncommitted')")
+
+        counts = []
+
+        def read():
+            reader = self.manager.acquire(self.db_path)
+            counts.append(reader.execute('SELECT COUNT(*) FROM items').fetchone()[0])
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join(timeout=2)
+        writer.commit()
+        assert counts == [0]
+
+    def test_periodic_checkpoint(self):
+        """测试超过间隔后归还连接时执行 wal_checkpoint"""
+        manager = SQLiteConnectionManager(checkpoint_interval=0.001)
+        try:
+            conn = manager.acquire(self.db_path)
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+            conn.commit()
+            manager._last_checkpoint[self.db_path] -= 1
+            manager.release(conn)
+            assert manager.stats()['checkpoints'] == 1
+        finally:
+            manager.close_all()
+
+    def test_close_all(self):
+        """测试关闭所有连接"""
+        conn = self.manager.acquire(self.db_path)
+        self.manager.close_all()
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+        assert self.manager.acquire(self.db_path) is not conn
+
+    def test_profile_and_overrides(self):
+        """测试配置档与 PRAGMA 覆盖"""
+        manager = SQLiteConnectionManager(
+            profile='low_memory',
+            overrides=parse_pragma_overrides('cache_size=-4000, busy_timeout=250')
+        )
+        try:
+            conn = manager.acquire(self.db_path)
+            assert conn.execute('PRAGMA cache_size').fetchone()[0] == -4000
+            assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 250
+            assert conn.execute('PRAGMA mmap_size').fetchone()[0] == 0
+        finally:
+            manager.close_all()
+
+    def test_invalid_configuration(self):
+        """测试无效配置"""
+        with pytest.raises(ValueError):
+            SQLiteConnectionManager(profile='unknown')
+        with pytest.raises(ValueError):
+            parse_pragma_overrides('locking_mode=EXCLUSIVE')
@@ -0,0 +1,123 @@
+"""
+用户名言列表测试
+"""
+import json
+from unittest.mock import patch
+import pytest
+import app as app_module
+
+
+@pytest.fixture
+def sign_in(auth_headers, query):
+    """注册并登录用户，返回请求头和用户 id"""
+    def run(username):
+        headers = auth_headers(username)
+        return headers, query('SELECT id FROM users WHERE username = ?', (username,))[0][0]
+    return run
+
+
+@pytest.fixture
+def quote_count(query):
+    return lambda user_id: query('SELECT quote_count FROM users WHERE id = ?', (user_id,))[0][0]
+
+
+class TestUserQuoteCount:
+    """用户名言计数触发器测试类"""
+
+    def test_add_and_delete(self, client, query, sign_in, quote_count):
+        """测试添加、删除名言时计数同步更新"""
+        headers, user_id = sign_in('counter')
+        for i in range(3):
+            client.post('/api/quotes', json={'content': f'名言{i}', 'author': '某人'}, headers=headers)
+        assert quote_count(user_id) == 3
+        query('DELETE FROM quotes WHERE id = (SELECT MIN(id) FROM quotes WHERE user_id = ?)', (user_id,))
+        assert quote_count(user_id) == 2
+
+    def test_reassign(self, query, sign_in, quote_count):
+        """测试名言换了添加者时两边的计数都更新"""
+        _, first = sign_in('first')
+        _, second = sign_in('second')
+        query("INSERT INTO quotes (content, author, user_id) VALUES ('一', '某人', ?)", (first,))
+        query('UPDATE quotes SET user_id = ? WHERE user_id = ?', (second, first))
+        assert quote_count(first) == 0
+        assert quote_count(second) == 1
+
+
+class TestUserQuotesEndpoint:
+    """用户名言列表接口测试类"""
+
+    @pytest.fixture
+    def author(self, sign_in, insert_quotes):
+        headers, user_id = sign_in('writer')
+        insert_quotes([('别人的', '某人', None, '2024-01-01 00:00:00')] +
+                      [(f'我的{i}', '某人', user_id, f'2024-01-{i % 3 + 1:02d} 00:00:00') for i in range(7)],
+                      ('content', 'author', 'user_id', 'created_at'))
+        return headers, user_id
+
+    def test_me_requires_login(self, client):
+        """测试 /me 需要登录"""
+        assert client.get('/api/users/me/quotes').status_code == 401
+
+    def test_me(self, client, author):
+        """测试返回当前用户的名言和计数维护的总数"""
+        headers, user_id = author
+        response = client.get('/api/users/me/quotes?pageSize=50', headers=headers)
+        data = json.loads(response.data)
+        assert data['user'] == {'id': user_id, 'username': 'writer'}
+        assert data['total'] == 7
+        assert sorted(q['content'] for q in data['quotes']) == [f'我的{i}' for i in range(7)]
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    @pytest.mark.parametrize('sort', ['newest', 'oldest'])
+    def test_cursor_pages(self, client, author, sort):
+        """测试游标翻页不重复不遗漏，顺序与一次取完一致"""
+        _, user_id = author
+        expected = [q['id'] for q in
+                    json.loads(client.get(f'/api/users/{user_id}/quotes?pageSize=50&sort={sort}').data)['quotes']]
+        seen, cursor = [], None
+        while True:
+            params = {'pageSize': 3, 'sort': sort}
+            if cursor:
+                params['cursor'] = cursor
+            data = json.loads(client.get(f'/api/users/{user_id}/quotes', query_string=params).data)
+            seen += [q['id'] for q in data['quotes']]
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        assert seen == expected and len(seen) == 7
+
+    def test_total_not_counted(self, client, author):
+        """测试总数不对 quotes 做 COUNT(*)"""
+        _, user_id = author
+        original = app_module.execute_query
+        calls = []
+
+        def recording_execute(sql, *args, **kwargs):
+            calls.append(sql)
+            return original(sql, *args, **kwargs)
+
+        with patch('app.execute_query', recording_execute):
+            client.get(f'/api/users/{user_id}/quotes')
+        assert not any('COUNT(' in sql for sql in calls)
+
+    def test_unknown_user(self, client):
+        """测试用户不存在时返回 404"""
+        response = client.get('/api/users/999999/quotes')
+        assert response.status_code == 404
+        assert json.loads(response.data)['message'] == '用户不存在'
+
+    def test_invalid_sort(self, client, author):
+        """测试不支持的排序返回 400"""
+        _, user_id = author
+        assert client.get(f'/api/users/{user_id}/quotes?sort=author').status_code == 400
+
+    def test_query_uses_index(self, query, author):
+        """测试用户名言查询按 (user_id, created_at, id) 索引顺序读取，不需要排序"""
+        _, user_id = author
+        for order in ('q.created_at DESC, q.id DESC', 'q.created_at ASC, q.id ASC'):
+            plan = [row[3] for row in query(
+                f'EXPLAIN QUERY PLAN SELECT q.* FROM quotes q WHERE q.user_id = ? '
+                f'AND (q.created_at, q.id) < (?, ?) ORDER BY {order} LIMIT 11',
+                (user_id, '2024-01-02 00:00:00', 5))]
+            assert any('idx_quotes_user_id_created_at' in step for step in plan), plan
+            assert not any('TEMP B-TREE' in step for step in plan), plan
@@ -0,0 +1,36 @@
+"""
+名言字段校验
+单条添加（POST /api/quotes）和批量导入共用同一套规则
+"""
+import unicodedata
+
+
+def canonical_author(name):
+    """作者名规范化：NFKC（全角字母数字和全角空格转为半角），连续空白合并为一个空格并去掉首尾空白
+
+    规范化之后相同的名字视为同一位作者，例如 "李白"、"李白 " 和 "李白\u3000"。
+    """
+    return ' '.join(unicodedata.normalize('NFKC', name).split())
+
+
+def clean_quote_fields(data):
+    """从请求数据中取出并清理 content/author，返回 (content, author, error)
+
+    字段不是字符串时视为空；去掉首尾空白后为空则返回错误信息。
+    """
+    content = data.get('content') or ''
+    author = data.get('author') or ''
+
+    if isinstance(content, str):
+        content = content.strip()
+    else:
+        content = ''
+
+    if isinstance(author, str):
+        author = canonical_author(author)
+    else:
+        author = ''
+
+    if not content or not author:
+        return content, author, '内容和作者不能为空'
+    return content, author, None
@@ -1,25 +1,41 @@
-import React, { useState } from 'react'
+import React, { useEffect, useState } from 'react'
 import axios from 'axios'
 import { useNavigate } from 'react-router-dom'
-import { API_ENDPOINTS } from './config/api'
+import apiClient, { API_ENDPOINTS } from './config/api'
 
 export default function AddQuote() {
   const [content, setContent] = useState('')
   const [author, setAuthor] = useState('')
   const [msg, setMsg] = useState('')
+  const [suggestions, setSuggestions] = useState([])
   const navigate = useNavigate()
 
+  // 输入作者时联想已有作者，停顿 150ms 后再请求
+  useEffect(() => {
+    if (!author.trim()) {
+      setSuggestions([])
+      return
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const res = await axios.get(API_ENDPOINTS.AUTHORS.SUGGEST, { params: { prefix: author, n: 8 } })
+        setSuggestions(res.data.authors)
+      } catch {
+        setSuggestions([])
+      }
+    }, 150)
+    return () => clearTimeout(timer)
+  }, [author])
+
   const handleAdd = async (e) => {
     e.preventDefault()
-    const token = localStorage.getItem('token')
-    if (!token) {
+    if (!localStorage.getItem('token')) {
       setMsg('请先登录')
       return
     }
     try {
-      await axios.post(API_ENDPOINTS.QUOTES.CREATE, { content, author }, {
-        headers: { Authorization: `Bearer ${token}` }
-      })
+      // apiClient 自动带上 token，访问令牌过期时先用刷新令牌换新再重试
+      await apiClient.post(API_ENDPOINTS.QUOTES.CREATE, { content, author })
       setMsg('添加成功！')
       setTimeout(() => navigate('/'), 1000)
     } catch (err) {
@@ -32,7 +48,10 @@ export default function AddQuote() {
       <h2>添加名言</h2>
       <form onSubmit={handleAdd}>
         <input value={content} onChange={e => setContent(e.target.value)} placeholder="名言内容" />
-        <input value={author} onChange={e => setAuthor(e.target.value)} placeholder="作者" />
+        <input value={author} onChange={e => setAuthor(e.target.value)} placeholder="作者" list="author-suggestions" />
+        <datalist id="author-suggestions">
+          {suggestions.map(a => <option key={a.id} value={a.name} />)}
+        </datalist>
         <button type="submit">添加</button>
       </form>
       <div>{msg}</div>
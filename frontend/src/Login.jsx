@@ -14,6 +14,7 @@ export default function Login() {
     try {
       const res = await axios.post(API_ENDPOINTS.AUTH.LOGIN, { username, password })
       localStorage.setItem('token', res.data.token)
+      localStorage.setItem('refresh_token', res.data.refresh_token)
       setMsg('登录成功！')
       setTimeout(() => navigate('/'), 1000)
     } catch (err) {
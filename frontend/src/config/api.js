@@ -8,12 +8,18 @@ export const API_ENDPOINTS = {
   AUTH: {
     LOGIN: `${API_BASE_URL}/api/auth/login`,
     REGISTER: `${API_BASE_URL}/api/auth/register`,
+    REFRESH: `${API_BASE_URL}/api/auth/refresh`,
+    LOGOUT: `${API_BASE_URL}/api/auth/logout`,
   },
   QUOTES: {
     LIST: `${API_BASE_URL}/api/quotes`,
     CREATE: `${API_BASE_URL}/api/quotes`,
+    DETAIL: (id) => `${API_BASE_URL}/api/quotes/${id}`,
     DELETE: (id) => `${API_BASE_URL}/api/quotes/${id}`,
   },
+  AUTHORS: {
+    SUGGEST: `${API_BASE_URL}/api/authors/suggest`,
+  },
   HEALTH: `${API_BASE_URL}/health`,
 };
 
@@ -42,13 +48,53 @@ apiClient.interceptors.request.use(
   }
 );
 
+// 用刷新令牌换新的访问令牌，不需要重新输入密码；同时发生的多个 401 共用一次刷新
+let refreshing = null;
+
+export const refreshAccessToken = () => {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshing = (refreshToken
+      ? axios.post(API_ENDPOINTS.AUTH.REFRESH, null, {
+          headers: { Authorization: `Bearer ${refreshToken}` },
+        }).then((res) => {
+          localStorage.setItem('token', res.data.token);
+          localStorage.setItem('refresh_token', res.data.refresh_token);
+          return res.data.token;
+        }).catch((error) => {
+          // 另一个标签页刚刚完成了刷新时，直接使用它存下的新令牌
+          if (localStorage.getItem('refresh_token') !== refreshToken) {
+            return localStorage.getItem('token');
+          }
+          throw error;
+        })
+      : Promise.reject(new Error('no refresh token'))
+    ).finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+};
+
 // 响应拦截器 - 处理错误
 apiClient.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status === 401 && original && !original._retried) {
+      // 访问令牌过期：刷新一次后重试原请求
+      original._retried = true;
+      try {
+        const token = await refreshAccessToken();
+        original.headers.Authorization = `Bearer ${token}`;
+        return apiClient(original);
+      } catch {
+        // 刷新令牌也失效了，回到登录页
+      }
+    }
     if (error.response?.status === 401) {
-      // Token 过期或无效
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
       window.location.href = '/login';
     }
     return Promise.reject(error);